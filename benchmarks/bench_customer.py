@@ -0,0 +1,386 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Benchmarks for the customer data path. Each operation runs in a fresh
+# spawned process so its peak RSS is its own. Usage:
+#   python -m benchmarks.bench_customer                      # launches a local mysqld
+#   python -m benchmarks.bench_customer --host 127.0.0.1 --user u --password p --database bench
+#   python -m benchmarks.bench_customer --backend sqlite     # embedded database in a temp dir
+#   python -m benchmarks.compare old.json new.json
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(PROJECT_ROOT, 'benchmarks', 'results')
+DEFAULT_SIZES = [10000, 100000, 1000000]
+
+
+def _peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def _timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+
+# Operations: fn(context) -> (latencies in seconds, rows processed)
+
+def _query_one(query):
+    from config.database import DatabaseConfig
+
+    backend = DatabaseConfig().get_backend()
+    connection = backend.get_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(query)
+        return cursor.fetchone()[0]
+    finally:
+        backend.release_connection(connection)
+
+
+def op_reset(context):
+    from config.database import DatabaseConfig
+    from models.customer_schema import apply_migrations
+
+    backend = DatabaseConfig().get_backend()
+    connection = backend.get_connection()
+    try:
+        apply_migrations(connection, backend.schema, fulltext=backend.fulltext_available)
+        cursor = connection.cursor()
+        cursor.execute(backend.truncate_sql('customer'))
+        cursor.close()
+        connection.commit()
+    finally:
+        backend.release_connection(connection)
+    return [], 0
+
+
+def op_import_from_csv(context):
+    from controllers.customer_controller import CustomerController
+
+    controller = CustomerController()
+    # Cache the total first, as the window has, so the import has to move it
+    controller.get_customers(1, 0)
+    elapsed, (success, message) = _timed(controller.import_from_csv, context['csv_path'])
+    if not success:
+        raise RuntimeError(message)
+    # The cached total the pagination shows must agree with the table
+    _, shown = controller.get_customers(1, 0)
+    if controller.is_count_exact() and shown != _count_rows():
+        raise RuntimeError(f"cached total {shown} != {_count_rows()} rows after import")
+    return [elapsed], context['size']
+
+
+def _read_benchmark(context, call, cached=False):
+    from models.customer import Customer
+
+    model = Customer()
+    latencies = []
+    if cached:
+        call(model)
+    for _ in range(context['repeat']):
+        if not cached:
+            # Measure the uncached path: totals and results are normally
+            # served from the count and query caches
+            Customer.count_cache.invalidate()
+            Customer.query_cache.invalidate()
+        elapsed, (customers, _) = _timed(call, model)
+        latencies.append(elapsed)
+    return latencies, len(customers) * len(latencies)
+
+
+def op_first_page(context):
+    return _read_benchmark(context, lambda model: model.get_all_customers(limit=10, offset=0))
+
+
+def op_first_page_cached(context):
+    return _read_benchmark(context, lambda model: model.get_all_customers(limit=10, offset=0), cached=True)
+
+
+def op_deep_offset_page(context):
+    offset = max(context['size'] - 20, 0)
+    return _read_benchmark(context, lambda model: model.get_all_customers(limit=10, offset=offset))
+
+
+def op_deep_keyset_page(context):
+    from models.customer import PAGE_NEXT
+
+    cursor_idx = _min_idx() + 20
+    return _read_benchmark(context, lambda model: model.get_customers_page(
+        limit=10, cursor_idx=cursor_idx, direction=PAGE_NEXT))
+
+
+def op_search_name(context):
+    return _read_benchmark(context, lambda model: model.get_all_customers(limit=10, search_term="budi"))
+
+
+def op_search_salary(context):
+    return _read_benchmark(context, lambda model: model.get_all_customers(
+        limit=10, search_term="gaji:10000000..12000000"))
+
+
+def op_create_customer(context):
+    from datetime import date
+    from models.customer import Customer
+
+    model = Customer()
+    latencies = []
+    for number in range(context['repeat']):
+        elapsed, success = _timed(model.create_customer, f"Z{number:05d}", "Bench Insert",
+                                  date(1990, 1, 1), 1, 5000000)
+        if not success:
+            raise RuntimeError("create_customer failed")
+        latencies.append(elapsed)
+    return latencies, len(latencies)
+
+
+def _export_benchmark(context, file_name):
+    from controllers.customer_controller import CustomerController
+
+    export_path = os.path.join(context['work_dir'], file_name)
+    elapsed, (success, message) = _timed(CustomerController().export_to_csv, export_path)
+    if not success:
+        raise RuntimeError(message)
+    print(f"{file_name}: {os.path.getsize(export_path):,} bytes")
+    os.remove(export_path)
+    return [elapsed], _count_rows()
+
+
+def op_export_to_csv(context):
+    return _export_benchmark(context, 'export.csv')
+
+
+def op_export_csv_gzip(context):
+    return _export_benchmark(context, 'export.csv.gz')
+
+
+def op_export_parquet(context):
+    return _export_benchmark(context, 'export.parquet')
+
+
+def _parse_benchmark(context, parse):
+    # parse(path) -> (validated record count, errors)
+    latencies = []
+    for _ in range(max(context['repeat'] // 10, 1)):
+        elapsed, (record_count, errors) = _timed(parse, context['csv_path'])
+        if errors:
+            raise RuntimeError(f"{len(errors)} rows failed to parse")
+        latencies.append(elapsed)
+    return latencies, record_count * len(latencies)
+
+
+def op_parse_serial(context):
+    from models.customer_csv import iter_csv_rows, validate_rows
+
+    def parse(path):
+        records, errors = validate_rows(iter_csv_rows(path))
+        return len(records), errors
+    return _parse_benchmark(context, parse)
+
+
+def _ranges_parser(parse_workers, engine='csv'):
+    from models.customer_import import iter_parsed_ranges
+
+    def parse(path):
+        # Records are kept as each engine hands them to the writers: tuples
+        # from csv, RecordColumns from numpy
+        record_count, errors = 0, []
+        for _, _, range_records, range_errors, _ in iter_parsed_ranges(path, parse_workers, engine=engine):
+            record_count += len(range_records)
+            errors.extend(range_errors)
+        return record_count, errors
+    return parse
+
+
+def op_parse_parallel(context):
+    return _parse_benchmark(context, _ranges_parser(os.cpu_count() or 2))
+
+
+def op_parse_numpy(context):
+    return _parse_benchmark(context, _ranges_parser(1, engine='numpy'))
+
+
+def _min_idx():
+    return _query_one("SELECT MIN(idx) FROM customer") or 0
+
+
+def _count_rows():
+    return _query_one("SELECT COUNT(*) FROM customer")
+
+
+# Run order matters: the import populates the table the reads run against
+OPERATIONS = [
+    ('parse_csv.serial', op_parse_serial),
+    ('parse_csv.process_pool', op_parse_parallel),
+    ('parse_csv.numpy', op_parse_numpy),
+    ('import_from_csv', op_import_from_csv),
+    ('get_all_customers.first_page', op_first_page),
+    ('get_all_customers.first_page.cached', op_first_page_cached),
+    ('get_all_customers.deep_offset_page', op_deep_offset_page),
+    ('get_customers_page.deep_keyset_page', op_deep_keyset_page),
+    ('get_all_customers.search_name', op_search_name),
+    ('get_all_customers.search_salary_range', op_search_salary),
+    ('export_to_csv', op_export_to_csv),
+    ('export_to_csv.gzip', op_export_csv_gzip),
+    ('export_to_csv.parquet', op_export_parquet),
+    ('create_customer', op_create_customer),
+]
+
+
+def _child(operation, context, environ, queue):
+    os.environ.update(environ)
+    sys.path.insert(0, PROJECT_ROOT)
+    try:
+        latencies, rows = dict(OPERATIONS + [('reset', op_reset)])[operation](context)
+        queue.put({'latencies': latencies, 'rows': rows, 'peak_rss_kb': _peak_rss_kb()})
+    except Exception as e:
+        queue.put({'error': f"{type(e).__name__}: {e}"})
+
+
+def run_in_child(operation, context, environ):
+    spawn = multiprocessing.get_context('spawn')
+    queue = spawn.Queue()
+    process = spawn.Process(target=_child, args=(operation, context, environ, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    if 'error' in result:
+        raise RuntimeError(f"{operation}: {result['error']}")
+    return result
+
+
+def summarize(latencies, rows):
+    if not latencies:
+        return {}
+    ordered = sorted(latencies)
+
+    def percentile(fraction):
+        return ordered[min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)] * 1000
+
+    total = sum(latencies)
+    return {
+        'calls': len(latencies),
+        'latency_ms': {
+            'min': ordered[0] * 1000,
+            'p50': percentile(0.50),
+            'p90': percentile(0.90),
+            'p99': percentile(0.99),
+            'max': ordered[-1] * 1000,
+            'mean': statistics.mean(latencies) * 1000,
+        },
+        'rows': rows,
+        'rows_per_second': rows / total if total > 0 else 0.0,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT, text=True,
+            stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_suite(sizes, repeat, environ, operations=None, backend='mysql'):
+    from benchmarks.datagen import write_import_csv
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='customer-bench-') as work_dir:
+        for size in sizes:
+            csv_path = write_import_csv(os.path.join(work_dir, f'customers-{size}.csv'), size)
+            context = {'size': size, 'repeat': repeat, 'csv_path': csv_path, 'work_dir': work_dir}
+            run_in_child('reset', context, environ)
+
+            for name, _ in OPERATIONS:
+                if operations and name not in operations and name != 'import_from_csv':
+                    continue
+                result = run_in_child(name, context, environ)
+                entry = {'size': size, 'operation': name, 'peak_rss_kb': result['peak_rss_kb']}
+                entry.update(summarize(result['latencies'], result['rows']))
+                results.append(entry)
+                print(f"{size:>9,} {name:<40} p50 {entry['latency_ms']['p50']:>10.2f} ms  "
+                      f"{entry['rows_per_second']:>12,.0f} rows/s  {entry['peak_rss_kb'] / 1024:>8.1f} MB")
+
+            os.remove(csv_path)
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'backend': backend,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def save_results(report, output_dir=RESULTS_DIR):
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = report['meta']['timestamp'].replace(':', '').replace('-', '')
+    path = os.path.join(output_dir, f"{stamp}-{report['meta']['commit']}.json")
+    with open(path, 'w', encoding='utf-8') as result_file:
+        json.dump(report, result_file, indent=2)
+    return path
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the customer data path")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=20, help="calls per point-query operation")
+    parser.add_argument('--operations', nargs='+', help="only run these operations")
+    parser.add_argument('--output-dir', default=RESULTS_DIR)
+    parser.add_argument('--backend', choices=['mysql', 'sqlite'], default='mysql')
+    parser.add_argument('--host', help="use an existing MySQL server instead of launching one")
+    parser.add_argument('--port', type=int, default=3306)
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--database', default='customer_bench')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.backend == 'sqlite':
+        with tempfile.TemporaryDirectory(prefix='customer-bench-db-') as db_dir:
+            environ = {
+                'CUSTOMER_DB_BACKEND': 'sqlite',
+                'CUSTOMER_DB_PATH': os.path.join(db_dir, 'customers.db'),
+            }
+            report = run_suite(args.sizes, args.repeat, environ, args.operations, backend='sqlite')
+    elif args.host:
+        environ = {
+            'CUSTOMER_DB_HOST': args.host,
+            'CUSTOMER_DB_PORT': str(args.port),
+            'CUSTOMER_DB_NAME': args.database,
+            'CUSTOMER_DB_USER': args.user,
+            'CUSTOMER_DB_PASSWORD': args.password,
+        }
+        report = run_suite(args.sizes, args.repeat, environ, args.operations)
+    else:
+        from benchmarks.local_mysql import LocalMySQLServer
+
+        with LocalMySQLServer() as server:
+            report = run_suite(args.sizes, args.repeat, server.environ(), args.operations)
+
+    print(f"Saved {save_results(report, args.output_dir)}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
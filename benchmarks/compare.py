@@ -0,0 +1,52 @@
+import argparse
+import json
+
+# Compare two benchmark result files:
+#   python -m benchmarks.compare benchmarks/results/old.json benchmarks/results/new.json
+# Exits with 1 when any operation's p50 latency regressed beyond --threshold.
+
+
+def load(path):
+    with open(path, encoding='utf-8') as result_file:
+        report = json.load(result_file)
+    return report['meta'], {(entry['size'], entry['operation']): entry for entry in report['results']}
+
+
+def change(old, new):
+    return (new - old) / old * 100 if old else 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark runs")
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=10.0, help="allowed p50 slowdown in percent")
+    args = parser.parse_args(argv)
+
+    old_meta, old_results = load(args.baseline)
+    new_meta, new_results = load(args.candidate)
+    print(f"baseline {old_meta['commit']} ({old_meta['timestamp']}) -> "
+          f"candidate {new_meta['commit']} ({new_meta['timestamp']})")
+    print(f"{'size':>9} {'operation':<40} {'p50 ms':>21} {'rows/s':>8} {'peak RSS':>9}")
+
+    regressions = 0
+    for key in sorted(set(old_results) & set(new_results)):
+        old, new = old_results[key], new_results[key]
+        p50_change = change(old['latency_ms']['p50'], new['latency_ms']['p50'])
+        flag = ""
+        if p50_change > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{key[0]:>9,} {key[1]:<40} "
+              f"{old['latency_ms']['p50']:>9.2f}->{new['latency_ms']['p50']:<9.2f} "
+              f"{change(old['rows_per_second'], new['rows_per_second']):>+7.1f}% "
+              f"{change(old['peak_rss_kb'], new['peak_rss_kb']):>+8.1f}%{flag}")
+
+    for key in sorted(set(old_results) ^ set(new_results)):
+        print(f"{key[0]:>9,} {key[1]:<40} only in {'baseline' if key in old_results else 'candidate'}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
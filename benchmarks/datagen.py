@@ -0,0 +1,49 @@
+import random
+from datetime import date, timedelta
+
+# Deterministic synthetic customers shaped like the real table:
+# nik VARCHAR(6), name VARCHAR(50), born DATE, active 0/1, salary INT
+
+FIRST_NAMES = [
+    "Adi", "Agus", "Ahmad", "Andi", "Ani", "Arif", "Ayu", "Bambang", "Budi", "Dewi",
+    "Dian", "Eko", "Fajar", "Fitri", "Gita", "Hadi", "Hendra", "Indah", "Joko", "Kartika",
+    "Lestari", "Lina", "Made", "Maya", "Nur", "Putri", "Rangga", "Rina", "Rudi", "Sari",
+    "Siti", "Sri", "Taufik", "Tri", "Wahyu", "Wulan", "Yanti", "Yudi", "Yuni", "Zainal",
+]
+LAST_NAMES = [
+    "Pratama", "Saputra", "Wijaya", "Santoso", "Hidayat", "Kusuma", "Nugroho", "Setiawan",
+    "Gunawan", "Hakim", "Halim", "Harahap", "Lubis", "Nasution", "Siregar", "Sitompul",
+    "Suryadi", "Susanto", "Utami", "Wibowo", "Wahyudi", "Permana", "Ramadhan", "Firmansyah",
+]
+NIK_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+BORN_START = date(1960, 1, 1)
+BORN_DAYS = (date(2005, 12, 31) - BORN_START).days
+
+
+def make_nik(number):
+    # Unique 6-character base-36 NIK for number < 36**6
+    digits = []
+    for _ in range(6):
+        number, remainder = divmod(number, 36)
+        digits.append(NIK_ALPHABET[remainder])
+    return ''.join(reversed(digits))
+
+
+def generate_customers(count, seed=42, start=0):
+    # Yields (nik, name, born, active, salary) tuples
+    rng = random.Random(seed + start)
+    for number in range(start, start + count):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        born = BORN_START + timedelta(days=rng.randrange(BORN_DAYS))
+        active = 1 if rng.random() < 0.8 else 0
+        salary = rng.randrange(3000, 30000) * 1000
+        yield make_nik(number), name, born, active, salary
+
+
+def write_import_csv(file_path, count, seed=42):
+    # Same layout CustomerController.import_from_csv reads
+    with open(file_path, 'w', encoding='utf-8', newline='') as csvfile:
+        csvfile.write("nik;name;born;active;salary\n")
+        for nik, name, born, active, salary in generate_customers(count, seed):
+            csvfile.write(f"{nik};{name};{born.isoformat()};{active};{salary}\n")
+    return file_path
@@ -0,0 +1,123 @@
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+import mysql.connector
+
+BENCH_DATABASE = 'customer_bench'
+BENCH_USER = 'bench'
+BENCH_PASSWORD = 'bench'
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _find_server():
+    for name in ('mariadbd', 'mysqld'):
+        path = shutil.which(name) or next(
+            (candidate for candidate in (f'/usr/sbin/{name}', f'/usr/local/mysql/bin/{name}')
+             if os.path.exists(candidate)), None)
+        if path:
+            return name, path
+    return None, None
+
+
+class LocalMySQLServer:
+    # Throwaway MySQL/MariaDB instance in a temp directory, so benchmarks
+    # never touch the real database:
+    #   with LocalMySQLServer() as server:
+    #       server.environ()  -> CUSTOMER_DB_* variables for the app
+    def __init__(self, keep_data=False):
+        self.keep_data = keep_data
+        self.port = _free_port()
+        self.base_dir = None
+        self.process = None
+        self.flavor, self.binary = _find_server()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def socket_path(self):
+        return os.path.join(self.base_dir, 'mysqld.sock')
+
+    def start(self, timeout=60):
+        if not self.binary:
+            raise RuntimeError("mysqld/mariadbd not found; pass --host to use an existing server")
+
+        self.base_dir = tempfile.mkdtemp(prefix='customer-bench-')
+        data_dir = os.path.join(self.base_dir, 'data')
+        os.makedirs(data_dir)
+        self._initialize(data_dir)
+
+        self.process = subprocess.Popen([
+            self.binary,
+            '--no-defaults',
+            f'--datadir={data_dir}',
+            f'--port={self.port}',
+            f'--socket={self.socket_path}',
+            f'--pid-file={os.path.join(self.base_dir, "mysqld.pid")}',
+            '--bind-address=127.0.0.1',
+            '--skip-log-bin',
+            '--innodb-buffer-pool-size=256M',
+            '--innodb-flush-log-at-trx-commit=2',
+            '--local-infile=1',
+            '--user=' + (os.environ.get('USER') or 'root'),
+        ], stdout=subprocess.DEVNULL, stderr=open(os.path.join(self.base_dir, 'error.log'), 'w'))
+
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                connection = mysql.connector.connect(unix_socket=self.socket_path, user='root')
+                break
+            except mysql.connector.Error:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f"Local server did not start, see {self.base_dir}/error.log")
+                time.sleep(0.5)
+
+        cursor = connection.cursor()
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {BENCH_DATABASE}")
+        cursor.execute(f"CREATE USER IF NOT EXISTS '{BENCH_USER}'@'127.0.0.1' IDENTIFIED BY '{BENCH_PASSWORD}'")
+        cursor.execute(f"GRANT ALL ON {BENCH_DATABASE}.* TO '{BENCH_USER}'@'127.0.0.1'")
+        cursor.close()
+        connection.close()
+
+    def _initialize(self, data_dir):
+        user = '--user=' + (os.environ.get('USER') or 'root')
+        if self.flavor == 'mariadbd':
+            install_db = shutil.which('mariadb-install-db') or shutil.which('mysql_install_db')
+            command = [install_db, '--no-defaults', f'--datadir={data_dir}',
+                       '--auth-root-authentication-method=socket', user]
+        else:
+            command = [self.binary, '--no-defaults', '--initialize-insecure',
+                       f'--datadir={data_dir}', user]
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            self.process = None
+        if self.base_dir and not self.keep_data:
+            shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def environ(self):
+        return {
+            'CUSTOMER_DB_HOST': '127.0.0.1',
+            'CUSTOMER_DB_PORT': str(self.port),
+            'CUSTOMER_DB_NAME': BENCH_DATABASE,
+            'CUSTOMER_DB_USER': BENCH_USER,
+            'CUSTOMER_DB_PASSWORD': BENCH_PASSWORD,
+        }
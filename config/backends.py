@@ -0,0 +1,284 @@
+import abc
+import os
+import tempfile
+import threading
+from itertools import islice
+from config.instrumented import timed_connect
+from utils.metrics import metrics
+
+# Storage backends the Customer model codes against. A backend hands out
+# pooled connections that speak the mysql.connector subset the model uses
+# (cursor(dictionary=...), execute with %s placeholders, commit/rollback),
+# plus the few dialect-specific pieces of SQL.
+#
+# Pick one with DatabaseConfig.backend / CUSTOMER_DB_BACKEND: 'mysql', 'sqlite'
+# or 'replica' (a local SQLite copy of the MySQL table, see models.customer_sync).
+
+
+class StorageBackend(abc.ABC):
+    dialect = None
+    # Migration set in models.customer_schema.MIGRATIONS
+    schema = None
+    # fulltext_available: the engine can build the full-text name index (the
+    # migrations create it); supports_fulltext: searches may use it
+    fulltext_available = False
+    supports_fulltext = False
+    # Current time as stored in updated_at / deleted_at
+    now_sql = None
+    # Appended to a SELECT whose rows the transaction goes on to write: no
+    # other writer may change them, or insert matching rows, until commit
+    locking_read_sql = ""
+
+    def __init__(self, config, pool):
+        self.config = config
+        self.pool = pool
+
+    def get_connection(self):
+        with metrics.span('db.checkout'):
+            return self.pool.get_connection()
+
+    def release_connection(self, connection):
+        self.pool.release_connection(connection)
+
+    def discard_connection(self, connection):
+        self.pool.discard_connection(connection)
+
+    def get_pool_stats(self):
+        stats = self.pool.get_stats()
+        stats['backend'] = self.dialect
+        return stats
+
+    @abc.abstractmethod
+    def estimate_row_count(self, cursor, table):
+        # Cheap, possibly stale row count from table statistics
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def truncate_sql(self, table):
+        raise NotImplementedError
+
+    # Consistent snapshot across connections: hold off writers with
+    # lock_writes, start a snapshot on every reading connection, then
+    # unlock_writes. No write can commit in between, so all of them see the
+    # same point in time.
+    @abc.abstractmethod
+    def lock_writes(self, connection, table):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def unlock_writes(self, connection):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def start_snapshot(self, connection, table):
+        raise NotImplementedError
+
+    def begin_write(self, connection):
+        # Opens a transaction that reads, then writes what it read (with
+        # locking_read_sql); engines that lock per row need nothing here
+        pass
+
+    def get_bulk_load_connection(self):
+        # The connection a bulk load, and the statements around it, run on
+        return self.get_connection()
+
+    def release_bulk_load_connection(self, connection):
+        self.release_connection(connection)
+
+    def bulk_load(self, connection, cursor, table, columns, rows, batch_size=10000):
+        # Fastest way this engine has to fill a table from an iterable of
+        # tuples; runs in the caller's transaction on connection (from
+        # get_bulk_load_connection), through cursor. Returns the row count.
+        query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+        count = 0
+        iterator = iter(rows)
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                return count
+            cursor.executemany(query, batch)
+            count += len(batch)
+
+    def close(self):
+        self.pool.close()
+
+
+class MySQLBackend(StorageBackend):
+    dialect = 'mysql'
+    schema = 'mysql'
+    fulltext_available = True
+    now_sql = "CURRENT_TIMESTAMP(6)"
+    # Next-key locks on the index searched, so absent keys are locked too
+    locking_read_sql = " FOR UPDATE"
+
+    def __init__(self, config):
+        super().__init__(config, config.get_pool())
+        self._local_infile = None
+        self._fulltext_index = None
+        # Open connections with LOAD DATA LOCAL switched on
+        self._infile_connections = set()
+        self._infile_lock = threading.Lock()
+
+    @property
+    def supports_fulltext(self):
+        # MATCH ... AGAINST fails outright without ft_customer_name, which only
+        # `python -m models.customer_schema` creates; until it exists, names
+        # are searched by prefix. Checked on first use, so opening the backend
+        # (the replica's server side included) never waits on the server.
+        if self._fulltext_index is None:
+            from models.customer_schema import index_exists
+
+            connection = None
+            cursor = None
+            try:
+                connection = self.get_connection()
+                cursor = connection.cursor()
+                self._fulltext_index = index_exists(cursor, 'customer', 'ft_customer_name')
+            except Exception as e:
+                # Asked again next time
+                print(f"Error checking full-text index: {e}")
+                return False
+            finally:
+                if cursor is not None:
+                    cursor.close()
+                if connection is not None:
+                    self.release_connection(connection)
+        return self._fulltext_index
+
+    def estimate_row_count(self, cursor, table):
+        cursor.execute("""
+        SELECT TABLE_ROWS AS estimate FROM information_schema.tables
+        WHERE table_schema = DATABASE() AND table_name = %s
+        """, (table,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return row['estimate'] if isinstance(row, dict) else row[0]
+
+    def truncate_sql(self, table):
+        return f"TRUNCATE TABLE {table}"
+
+    def lock_writes(self, connection, table):
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f"LOCK TABLES {table} READ")
+        finally:
+            cursor.close()
+
+    def unlock_writes(self, connection):
+        cursor = connection.cursor()
+        try:
+            cursor.execute("UNLOCK TABLES")
+        finally:
+            cursor.close()
+
+    def start_snapshot(self, connection, table):
+        # InnoDB takes the read view right away with CONSISTENT SNAPSHOT
+        cursor = connection.cursor()
+        try:
+            cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+        finally:
+            cursor.close()
+
+    def get_bulk_load_connection(self):
+        # LOAD DATA LOCAL lets the server ask for any client file, so it is
+        # switched on only for a connection of the fast load's own, opened
+        # outside the pool and closed when the load is done
+        if not self.config.allow_local_infile:
+            return super().get_bulk_load_connection()
+        connection = timed_connect(lambda: self.config._connect(allow_local_infile=True))()
+        with self._infile_lock:
+            self._infile_connections.add(connection)
+        return connection
+
+    def release_bulk_load_connection(self, connection):
+        with self._infile_lock:
+            dedicated = connection in self._infile_connections
+            self._infile_connections.discard(connection)
+        if not dedicated:
+            super().release_bulk_load_connection(connection)
+            return
+        try:
+            connection.close()
+        except Exception as e:
+            print(f"Error closing bulk load connection: {e}")
+
+    def bulk_load(self, connection, cursor, table, columns, rows, batch_size=10000):
+        # LOAD DATA LOCAL INFILE from a normalized temp file: tab separated,
+        # backslash escaped, \N for NULL. Falls back to batched INSERTs on a
+        # pooled connection, or when the server has local infile switched off.
+        if not self._local_infile_enabled(connection, cursor):
+            return super().bulk_load(connection, cursor, table, columns, rows, batch_size)
+
+        count = 0
+        staging_file = tempfile.NamedTemporaryFile('w', encoding='utf-8', newline='\n', suffix='.tsv',
+                                                   delete=False)
+        try:
+            with staging_file:
+                for row in rows:
+                    staging_file.write('\t'.join(map(_tsv_field, row)))
+                    staging_file.write('\n')
+                    count += 1
+            cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} CHARACTER SET utf8mb4 "
+                r"FIELDS TERMINATED BY '\t' ESCAPED BY '\\' LINES TERMINATED BY '\n' "
+                f"({', '.join(columns)})",
+                (staging_file.name,)
+            )
+        finally:
+            os.remove(staging_file.name)
+        return count
+
+    def _local_infile_enabled(self, connection, cursor):
+        with self._infile_lock:
+            if connection not in self._infile_connections:
+                return False
+        if self._local_infile is None:
+            cursor.execute("SELECT @@GLOBAL.local_infile")
+            row = cursor.fetchone()
+            value = row[0] if not isinstance(row, dict) else next(iter(row.values()))
+            self._local_infile = bool(int(value))
+        return self._local_infile
+
+
+_TSV_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r', '\0': '\\0'})
+
+
+def _tsv_field(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, str):
+        return value.translate(_TSV_ESCAPES)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(config):
+    # One backend (and so one pool) per target database, shared process-wide
+    if config.backend == 'sqlite':
+        key = ('sqlite', config.sqlite_path)
+    elif config.backend == 'mysql':
+        key = ('mysql', config.host, config.port, config.database, config.user)
+    elif config.backend == 'replica':
+        key = ('replica', config.replica_path, config.host, config.port, config.database, config.user)
+    else:
+        raise ValueError(f"Unknown database backend: {config.backend}")
+
+    with _backends_lock:
+        backend = _backends.get(key)
+        if backend is None:
+            if config.backend == 'sqlite':
+                from config.sqlite_backend import SQLiteBackend
+                backend = SQLiteBackend(config)
+            elif config.backend == 'replica':
+                from config.replica_backend import ReplicaBackend
+                backend = ReplicaBackend(config)
+            else:
+                backend = MySQLBackend(config)
+            _backends[key] = backend
+        return backend
@@ -1,24 +1,344 @@
-import mysql.connector
-from mysql.connector import Error
+import os
+import threading
+import time
+from collections import deque
+from config.instrumented import timed_connect
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class PoolClosedError(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, connect, max_size=5, min_idle=1, checkout_timeout=10.0,
+                 idle_timeout=300.0, max_lifetime=1800.0, health_check_interval=30.0):
+        self._connect = connect
+        self.max_size = max_size
+        self.min_idle = min_idle
+        self.checkout_timeout = checkout_timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+
+        self._lock = threading.Condition(threading.Lock())
+        self._idle = deque()  # (connection, created_at, returned_at)
+        self._created_at = {}  # id(connection) -> created_at
+        self._size = 0
+        self._closed = False
+        self._stats = {
+            'checkouts': 0,
+            'returns': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'timeouts': 0,
+            'creations': 0,
+            'creation_failures': 0,
+            'health_check_failures': 0,
+            'idle_evictions': 0,
+            'lifetime_recycles': 0,
+            'discards': 0,
+        }
+
+    def get_connection(self, timeout=None):
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = False
+        wait_started = None
+        evicted = []
+
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise PoolClosedError("Connection pool is closed")
+
+                evicted.extend(self._evict_expired_locked())
+
+                if self._idle:
+                    connection, created_at, returned_at = self._idle.pop()
+                    break
+
+                if self._size < self.max_size:
+                    # Reserve the slot before connecting outside the lock
+                    self._size += 1
+                    connection = None
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeoutError(
+                        f"Timed out after {timeout:.1f}s waiting for a database connection"
+                    )
+                if not waited:
+                    waited = True
+                    wait_started = time.monotonic()
+                    self._stats['waits'] += 1
+                self._lock.wait(remaining)
+
+            if waited:
+                self._stats['wait_time'] += time.monotonic() - wait_started
+
+        for stale in evicted:
+            self._close_quietly(stale)
+
+        if connection is None:
+            connection = self._create_connection()
+        elif not self._is_healthy(connection, returned_at):
+            self._discard(connection, 'health_check_failures')
+            return self.get_connection(max(deadline - time.monotonic(), 0))
+
+        with self._lock:
+            self._stats['checkouts'] += 1
+        return connection
+
+    def release_connection(self, connection):
+        if connection is None:
+            return
+
+        try:
+            # Never hand a half-finished transaction to the next borrower
+            if connection.is_connected() and connection.in_transaction:
+                connection.rollback()
+            healthy = connection.is_connected()
+        except Exception:
+            healthy = False
+
+        with self._lock:
+            self._stats['returns'] += 1
+            created_at = self._created_at.get(id(connection))
+            expired = (created_at is None
+                       or time.monotonic() - created_at >= self.max_lifetime)
+            if self._closed or not healthy or expired:
+                if expired and healthy:
+                    self._stats['lifetime_recycles'] += 1
+                self._forget_locked(connection)
+            else:
+                self._idle.append((connection, created_at, time.monotonic()))
+                self._lock.notify()
+                return
+
+        self._close_quietly(connection)
+
+    def discard_connection(self, connection):
+        # For connections left in an unknown state, e.g. an abandoned streaming read
+        if connection is not None:
+            self._discard(connection, 'discards')
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            for connection, _, _ in idle:
+                self._forget_locked(connection)
+            self._lock.notify_all()
+
+        for connection, _, _ in idle:
+            self._close_quietly(connection)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = self._size
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._size - len(self._idle)
+            stats['max_size'] = self.max_size
+            return stats
+
+    def _create_connection(self):
+        try:
+            connection = self._connect()
+        except Exception:
+            with self._lock:
+                self._size -= 1
+                self._stats['creation_failures'] += 1
+                self._lock.notify()
+            raise
+
+        with self._lock:
+            self._created_at[id(connection)] = time.monotonic()
+            self._stats['creations'] += 1
+        return connection
+
+    def _is_healthy(self, connection, returned_at):
+        # Only ping connections that have been sitting idle for a while
+        if time.monotonic() - returned_at < self.health_check_interval:
+            return True
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, connection, reason):
+        with self._lock:
+            self._stats[reason] += 1
+            self._forget_locked(connection)
+        self._close_quietly(connection)
+
+    def _evict_expired_locked(self):
+        now = time.monotonic()
+        keep = deque()
+        evicted = []
+        # Idle deque is LIFO at the right end, so the oldest returns sit on the left
+        while self._idle:
+            entry = self._idle.popleft()
+            connection, created_at, returned_at = entry
+            if now - created_at >= self.max_lifetime:
+                self._stats['lifetime_recycles'] += 1
+                evicted.append(connection)
+            elif (now - returned_at >= self.idle_timeout
+                  and len(self._idle) + len(keep) >= self.min_idle):
+                self._stats['idle_evictions'] += 1
+                evicted.append(connection)
+            else:
+                keep.append(entry)
+        self._idle = keep
+
+        for connection in evicted:
+            self._forget_locked(connection)
+        return evicted
+
+    def _forget_locked(self, connection):
+        self._created_at.pop(id(connection), None)
+        self._size -= 1
+        self._lock.notify()
+
+    @staticmethod
+    def _close_quietly(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
 
 class DatabaseConfig:
+    _pools = {}
+    _pools_lock = threading.Lock()
+
     def __init__(self):
-        self.host = 'localhost'
-        self.database = 'testing'
-        self.user = 'rangga'
-        self.password = 'rangga'
-        self.port = 3306
-    
+        # CUSTOMER_DB_* environment variables point the app (or a benchmark
+        # run) at another server without editing this file
+        self.host = os.environ.get('CUSTOMER_DB_HOST', 'localhost')
+        self.database = os.environ.get('CUSTOMER_DB_NAME', 'testing')
+        self.user = os.environ.get('CUSTOMER_DB_USER', 'rangga')
+        self.password = os.environ.get('CUSTOMER_DB_PASSWORD', 'rangga')
+        self.port = int(os.environ.get('CUSTOMER_DB_PORT', 3306))
+
+        # Storage backend: 'mysql' (server above), 'sqlite' (embedded file) or 'replica'
+        self.backend = os.environ.get('CUSTOMER_DB_BACKEND', 'mysql')
+        self.sqlite_path = os.environ.get(
+            'CUSTOMER_DB_PATH',
+            os.path.join(os.path.expanduser('~'), '.customer_app', 'customers.db')
+        )
+        # 'replica': reads and writes hit a local copy synced with the server above
+        self.replica_path = os.environ.get(
+            'CUSTOMER_DB_REPLICA_PATH',
+            os.path.join(os.path.expanduser('~'), '.customer_app', 'replica.db')
+        )
+        self.replica_sync_interval = 30.0
+        self.replica_push_batch_size = 200
+        self.replica_pull_batch_size = 1000
+
+        # Connection pool sizing
+        self.pool_size = 5
+        self.pool_min_idle = 1
+        self.pool_checkout_timeout = 10.0
+        self.pool_idle_timeout = 300.0
+        self.pool_max_lifetime = 1800.0
+        self.pool_health_check_interval = 30.0
+
+        # Fast CSV loads may use LOAD DATA LOCAL INFILE (the server must
+        # also allow it); off sends the staging rows as batched INSERTs. Only
+        # the fast load's own connection has it on, never the pool's: it lets
+        # the server ask for any file the client can read.
+        self.allow_local_infile = os.environ.get('CUSTOMER_DB_LOCAL_INFILE', '0') == '1'
+
+        # Parallel exports: idx ranges read at once (bounded by pool_size)
+        self.export_parallelism = 4
+
+        # Change feed exports (models.customer_change_feed): where the
+        # watermarks are kept, and how old a change must be to be exported
+        self.change_feed_state_path = os.environ.get(
+            'CUSTOMER_CHANGE_FEED_STATE',
+            os.path.join(os.path.expanduser('~'), '.customer_app', 'change_feed.json')
+        )
+        self.change_feed_settle_seconds = 5.0
+
+        # Pagination totals
+        self.count_cache_ttl = 30.0
+        self.approximate_counts = False
+        self.approximate_count_threshold = 1000000
+
+        # Customer reads memoized in the model (models.query_cache): seconds
+        # an entry lives, and how many customers / list pages are kept
+        self.query_cache_ttl = 30.0
+        self.query_cache_customers = 1024
+        self.query_cache_pages = 256
+
+        # Seconds a page stays in the controller's page cache
+        # (controllers.page_cache): only this process's writes clear it, so
+        # edits by other clients show up once it expires
+        self.page_cache_ttl = 30.0
+
+        # Statements slower than this (milliseconds) are logged with their
+        # parameters as JSON lines; unset keeps the log off (utils.metrics).
+        # Applied once at start-up by controllers.services.Services
+        slow_query_ms = os.environ.get('CUSTOMER_SLOW_QUERY_MS')
+        self.slow_query_ms = float(slow_query_ms) if slow_query_ms else None
+        self.slow_query_log_path = os.environ.get(
+            'CUSTOMER_SLOW_QUERY_LOG',
+            os.path.join(os.path.expanduser('~'), '.customer_app', 'slow_queries.log')
+        )
+
     def get_connection(self):
+        from mysql.connector import Error
+
         try:
-            connection = mysql.connector.connect(
-                host=self.host,
-                database=self.database,
-                user=self.user,
-                password=self.password,
-                port=self.port
-            )
-            return connection
+            return self._connect()
         except Error as e:
             print(f"Error connecting to MySQL: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def get_backend(self):
+        from config.backends import get_backend
+
+        return get_backend(self)
+
+    def get_pool(self):
+        # One pool per target database, shared by every model instance
+        key = (self.host, self.port, self.database, self.user)
+        with DatabaseConfig._pools_lock:
+            pool = DatabaseConfig._pools.get(key)
+            if pool is None:
+                pool = self.create_pool(self._connect)
+                DatabaseConfig._pools[key] = pool
+            return pool
+
+    def create_pool(self, connect):
+        return ConnectionPool(
+            timed_connect(connect),
+            max_size=self.pool_size,
+            min_idle=self.pool_min_idle,
+            checkout_timeout=self.pool_checkout_timeout,
+            idle_timeout=self.pool_idle_timeout,
+            max_lifetime=self.pool_max_lifetime,
+            health_check_interval=self.pool_health_check_interval
+        )
+
+    def _connect(self, allow_local_infile=False):
+        # Imported here so the SQLite backend runs without the MySQL driver
+        import mysql.connector
+
+        return mysql.connector.connect(
+            host=self.host,
+            database=self.database,
+            user=self.user,
+            password=self.password,
+            port=self.port,
+            allow_local_infile=allow_local_infile
+        )
@@ -0,0 +1,77 @@
+import time
+from utils.metrics import metrics
+
+# Timing wrappers around pooled connections. DatabaseConfig.create_pool wraps
+# every connection it opens, so each statement, fetch and commit on any
+# backend is measured (utils.metrics) without touching the callers. Anything
+# not timed here passes straight through to the driver object.
+
+
+def timed_connect(connect):
+    def open_connection():
+        with metrics.span('db.connect'):
+            connection = connect()
+        return None if connection is None else TimedConnection(connection)
+    return open_connection
+
+
+class TimedConnection:
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self, *args, **kwargs):
+        return TimedCursor(self._connection.cursor(*args, **kwargs))
+
+    def commit(self):
+        with metrics.span('db.commit'):
+            self._connection.commit()
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+class TimedCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query, params=None):
+        started = time.perf_counter()
+        try:
+            if params is None:
+                return self._cursor.execute(query)
+            return self._cursor.execute(query, params)
+        finally:
+            metrics.record_query('db.execute', query, params, time.perf_counter() - started)
+
+    def executemany(self, query, seq_params):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, seq_params)
+        finally:
+            metrics.record_query('db.executemany', query, _batch_summary(seq_params),
+                                 time.perf_counter() - started)
+
+    def fetchone(self):
+        with metrics.span('db.fetch'):
+            return self._cursor.fetchone()
+
+    def fetchmany(self, size=1):
+        with metrics.span('db.fetch'):
+            return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        with metrics.span('db.fetch'):
+            return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def _batch_summary(seq_params):
+    # The slow query log gets the batch size and its first row, not every row
+    if isinstance(seq_params, (list, tuple)):
+        return {'rows': len(seq_params), 'first': seq_params[0] if seq_params else None}
+    return {'rows': None}
@@ -0,0 +1,28 @@
+import threading
+from config.backends import MySQLBackend
+from config.sqlite_backend import SQLiteBackend
+
+# Offline-first replica: every read and write of the Customer model goes to a
+# local SQLite copy of the customer table, and models.customer_sync keeps it
+# in step with the MySQL server (`remote`) whenever that is reachable.
+
+
+class ReplicaBackend(SQLiteBackend):
+    schema = 'replica'
+
+    def __init__(self, config):
+        super().__init__(config, path=config.replica_path)
+        # The server pool connects lazily, so opening the replica never
+        # waits on the VPN
+        self.remote = MySQLBackend(config)
+        # One sync at a time, whichever window or timer asked for it
+        self.sync_lock = threading.Lock()
+
+    def get_pool_stats(self):
+        stats = super().get_pool_stats()
+        stats['remote'] = self.remote.get_pool_stats()
+        return stats
+
+    def close(self):
+        super().close()
+        self.remote.close()
@@ -0,0 +1,209 @@
+import os
+import sqlite3
+from datetime import date, datetime
+from functools import lru_cache
+from config.backends import StorageBackend
+
+# Embedded SQLite engine for offline laptops, branch offices, tests and
+# benchmarks. Connections are wrapped to look like the mysql.connector ones
+# the model already uses, so the model SQL (with %s placeholders) runs as is.
+
+# Microsecond text like the datetime adapter below writes, so stored
+# versions and datetime parameters compare as equals
+SQLITE_NOW_SQL = "(strftime('%Y-%m-%d %H:%M:%f', 'now') || '000')"
+
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(sep=' ', timespec='microseconds'))
+sqlite3.register_converter('DATE', lambda value: date.fromisoformat(value.decode()))
+sqlite3.register_converter('DATETIME', lambda value: datetime.fromisoformat(value.decode()))
+
+
+@lru_cache(maxsize=1024)
+def translate(query):
+    # %s -> ? once per distinct statement; the same text then hits the
+    # connection's prepared statement cache on every later call
+    return query.replace('%s', '?')
+
+
+def fts5_available():
+    try:
+        probe = sqlite3.connect(':memory:')
+        probe.execute("CREATE VIRTUAL TABLE probe USING fts5(body)")
+        probe.close()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+class SQLiteCursor:
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        self._dictionary = dictionary
+        self._columns = None
+
+    def execute(self, query, params=()):
+        self._cursor.execute(translate(query), tuple(params))
+        self._columns = None
+        return self
+
+    def executemany(self, query, seq_params):
+        self._cursor.executemany(translate(query), (tuple(params) for params in seq_params))
+        return self
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return self._convert(row) if row is not None else None
+
+    def fetchmany(self, size=1):
+        return [self._convert(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._convert(row) for row in self._cursor.fetchall()]
+
+    def __iter__(self):
+        for row in self._cursor:
+            yield self._convert(row)
+
+    def close(self):
+        self._cursor.close()
+
+    def _convert(self, row):
+        if not self._dictionary:
+            return row
+        if self._columns is None:
+            self._columns = [column[0] for column in self._cursor.description]
+        return dict(zip(self._columns, row))
+
+
+class SQLiteConnection:
+    def __init__(self, path, cached_statements=256):
+        self._connection = sqlite3.connect(
+            path,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            # Pooled: used by one thread at a time, but not always the same one
+            check_same_thread=False,
+            cached_statements=cached_statements
+        )
+        self._open = True
+        for pragma in ("PRAGMA journal_mode=WAL",
+                       "PRAGMA synchronous=NORMAL",
+                       "PRAGMA busy_timeout=5000",
+                       "PRAGMA temp_store=MEMORY",
+                       "PRAGMA cache_size=-20000"):
+            self._connection.execute(pragma)
+
+    def cursor(self, dictionary=False, buffered=None, **kwargs):
+        # SQLite cursors already step lazily, so unbuffered reads need nothing extra
+        return SQLiteCursor(self._connection.cursor(), dictionary)
+
+    def start_transaction(self):
+        if not self._connection.in_transaction:
+            self._connection.execute("BEGIN")
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    @property
+    def in_transaction(self):
+        return self._connection.in_transaction
+
+    def is_connected(self):
+        return self._open
+
+    def ping(self, reconnect=False):
+        self._connection.execute("SELECT 1")
+
+    def close(self):
+        self._open = False
+        self._connection.close()
+
+
+class SQLiteBackend(StorageBackend):
+    dialect = 'sqlite'
+    schema = 'sqlite'
+    now_sql = SQLITE_NOW_SQL
+
+    def __init__(self, config, path=None):
+        self.path = path or config.sqlite_path
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        super().__init__(config, config.create_pool(lambda: SQLiteConnection(self.path)))
+        # The FTS5 table is created with the schema, on open
+        self.fulltext_available = self.supports_fulltext = fts5_available()
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        # An embedded database is created and migrated on first use
+        from models.customer_schema import apply_migrations
+
+        connection = self.get_connection()
+        try:
+            apply_migrations(connection, self.schema, fulltext=self.fulltext_available)
+        finally:
+            self.release_connection(connection)
+
+    def estimate_row_count(self, cursor, table):
+        # sqlite_stat1 is filled by ANALYZE; MAX(rowid) is an O(1) fallback
+        try:
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", (table,))
+            row = cursor.fetchone()
+        except sqlite3.OperationalError:
+            # ANALYZE has never run
+            row = None
+        if row:
+            stat = row['stat'] if isinstance(row, dict) else row[0]
+            return int(stat.split()[0])
+        cursor.execute(f"SELECT MAX(rowid) AS estimate FROM {table}")
+        row = cursor.fetchone()
+        estimate = row['estimate'] if isinstance(row, dict) else row[0]
+        return estimate or 0
+
+    def truncate_sql(self, table):
+        return f"DELETE FROM {table}"
+
+    def lock_writes(self, connection, table):
+        # The write lock is database wide
+        cursor = connection.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+        finally:
+            cursor.close()
+
+    def unlock_writes(self, connection):
+        connection.rollback()
+
+    def begin_write(self, connection):
+        # No row locks: take the database write lock before the first read
+        if not connection.in_transaction:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+            finally:
+                cursor.close()
+
+    def start_snapshot(self, connection, table):
+        # In WAL mode a read transaction pins its snapshot at the first read
+        connection.start_transaction()
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f"SELECT 1 FROM {table} LIMIT 1")
+            cursor.fetchall()
+        finally:
+            cursor.close()
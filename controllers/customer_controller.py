@@ -1,51 +1,153 @@
-import csv
+import os
 from datetime import datetime
-from models.customer import Customer
-from PySide6.QtWidgets import QMessageBox, QFileDialog
+from models.customer import Customer, PAGE_FIRST, PAGE_NEXT, PAGE_PREV, IMPORT_INSERT, IMPORT_MERGE
+from utils.metrics import metrics
+from utils.progress import TaskCancelled
+from controllers.page_cache import PageCache
+
+# The import, export and sync pipelines (multiprocessing, csv, pyarrow...)
+# are imported by the methods that run them, so they stay off the start-up
+# path of the window.
+
+# Below this size the process pool start-up costs more than parsing serially
+PARALLEL_IMPORT_MIN_BYTES = 16 * 1024 * 1024
+
 
 class CustomerController:
-    def __init__(self):
-        self.customer_model = Customer()
+    # One page cache for every controller, so forms and the main window share it
+    page_cache = None
+    # Pipeline counters of the last parallel import (see ImportStats)
+    last_import_metrics = None
+
+    def __init__(self, customer_model=None):
+        self.customer_model = customer_model or Customer()
+        if CustomerController.page_cache is None:
+            CustomerController.page_cache = PageCache(ttl=self.customer_model.db_config.page_cache_ttl)
     
     def get_customers(self, limit=10, offset=0, search_term=""):
         return self.customer_model.get_all_customers(limit, offset, search_term)
     
+    def get_customers_page(self, limit=10, search_term="", cursor_idx=None, direction=PAGE_FIRST, offset=0):
+        return self.page_cache.get_page(
+            self.customer_model.get_customers_page,
+            limit, search_term, cursor_idx, direction, offset
+        )
+    
+    def prefetch_pages(self, limit, search_term, first_idx, last_idx, has_prev, has_next):
+        # Warm the cache with the neighbours of the page on screen
+        if has_next and not self.page_cache.contains(limit, search_term, last_idx, PAGE_NEXT):
+            self.get_customers_page(limit, search_term, last_idx, PAGE_NEXT)
+        if has_prev and not self.page_cache.contains(limit, search_term, first_idx, PAGE_PREV):
+            self.get_customers_page(limit, search_term, first_idx, PAGE_PREV)
+    
+    def get_page_cache_stats(self):
+        return self.page_cache.stats()
+    
+    def get_query_cache_stats(self):
+        return self.customer_model.get_query_cache_stats()
+    
+    def get_latency_summaries(self):
+        # Span name -> count / last / p50 / p95 / max seconds (utils.metrics)
+        return metrics.summaries()
+    
+    def dump_metrics(self, file_path):
+        # .json for a snapshot, anything else for Prometheus text
+        try:
+            metrics.dump(file_path)
+            return True, f"Metrik disimpan ke {file_path}"
+        except Exception as e:
+            return False, f"Error: {str(e)}"
+    
+    def reset_metrics(self):
+        metrics.reset()
+    
+    def is_count_exact(self, search_term=""):
+        return self.customer_model.is_count_exact(search_term)
+    
+    def get_pool_stats(self):
+        return self.customer_model.get_pool_stats()
+    
+    def is_replica(self):
+        # From the settings, so asking does not open the database
+        return self.customer_model.db_config.backend == 'replica'
+    
+    def get_sync_interval(self):
+        return self.customer_model.db_config.replica_sync_interval
+    
+    def _replica_sync(self):
+        from models.customer_sync import CustomerSync
+
+        config = self.customer_model.db_config
+        return CustomerSync(
+            self.customer_model.backend,
+            push_batch_size=config.replica_push_batch_size,
+            pull_batch_size=config.replica_pull_batch_size
+        )
+    
+    def sync_replica(self):
+        # Push queued local changes, then pull server changes; the replica
+        # stays usable when the server cannot be reached
+        if not self.is_replica():
+            return False, "Replika lokal tidak aktif"
+        sync = self._replica_sync()
+        try:
+            result = sync.sync()
+        except Exception as e:
+            status = sync.status()
+            return False, f"Offline ({status['pending']} perubahan menunggu): {str(e)}"
+        
+        status = sync.status()
+        if result['skipped']:
+            return True, "Sinkronisasi sedang berjalan"
+        message = (f"Tersinkron: {result['pushed']} dikirim, {result['pulled']} diterima, "
+                   f"{result['deleted']} dihapus, {status['pending']} menunggu")
+        if status['conflicts']:
+            message += f", {status['conflicts']} konflik"
+        return True, message
+    
+    def get_sync_conflicts(self, limit=100):
+        if not self.is_replica():
+            return []
+        return self._replica_sync().get_conflicts(limit)
+    
     def get_customer(self, customer_id):
         return self.customer_model.get_customer_by_id(customer_id)
     
     def create_customer(self, nik, name, born, active, salary):
+        # Returns (success, message, the new row with its idx or None)
         try:
             # Validate data
             if not nik or not name:
-                return False, "NIK dan Nama harus diisi"
+                return False, "NIK dan Nama harus diisi", None
             
             # Convert born to date format
             if isinstance(born, str):
                 born = datetime.strptime(born, "%Y-%m-%d").date()
             
-            success = self.customer_model.create_customer(nik, name, born, active, salary)
-            if success:
-                return True, "Data berhasil disimpan"
+            customer = self.customer_model.create_customer(nik, name, born, active, salary)
+            if customer:
+                return True, "Data berhasil disimpan", customer
             else:
-                return False, "Gagal menyimpan data"
+                return False, "Gagal menyimpan data", None
         except Exception as e:
-            return False, f"Error: {str(e)}"
+            return False, f"Error: {str(e)}", None
     
     def update_customer(self, customer_id, nik, name, born, active, salary):
+        # Returns (success, message, the row as stored or None)
         try:
             if not nik or not name:
-                return False, "NIK dan Nama harus diisi"
+                return False, "NIK dan Nama harus diisi", None
             
             if isinstance(born, str):
                 born = datetime.strptime(born, "%Y-%m-%d").date()
             
-            success = self.customer_model.update_customer(customer_id, nik, name, born, active, salary)
-            if success:
-                return True, "Data berhasil diupdate"
+            customer = self.customer_model.update_customer(customer_id, nik, name, born, active, salary)
+            if customer:
+                return True, "Data berhasil diupdate", customer
             else:
-                return False, "Gagal mengupdate data"
+                return False, "Gagal mengupdate data", None
         except Exception as e:
-            return False, f"Error: {str(e)}"
+            return False, f"Error: {str(e)}", None
     
     def delete_customer(self, customer_id):
         try:
@@ -57,71 +159,192 @@ class CustomerController:
         except Exception as e:
             return False, f"Error: {str(e)}"
     
-    def export_to_csv(self, file_path):
+    def bulk_set_active(self, customer_ids, active, progress=None):
+        # The bulk_* methods return (success, message, undo_record)
+        from models.customer_bulk_edit import BulkEditor
+
+        status = "aktif" if active else "tidak aktif"
+        return self._run_bulk(
+            lambda: BulkEditor(self.customer_model).set_active(customer_ids, active, progress),
+            f"data diubah menjadi {status}"
+        )
+    
+    def bulk_adjust_salary(self, customer_ids, percent, progress=None):
+        from models.customer_bulk_edit import BulkEditor
+
+        return self._run_bulk(
+            lambda: BulkEditor(self.customer_model).adjust_salary(customer_ids, percent, progress),
+            f"gaji disesuaikan {percent:+g}%"
+        )
+    
+    def bulk_delete(self, customer_ids, progress=None):
+        from models.customer_bulk_edit import BulkEditor
+
+        return self._run_bulk(
+            lambda: BulkEditor(self.customer_model).delete(customer_ids, progress),
+            "data dihapus"
+        )
+    
+    def _run_bulk(self, action, done):
         try:
-            customers, _ = self.customer_model.get_all_customers(limit=999999)
-            
-            with open(file_path, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile, delimiter=';')
-                
-                # Write header
-                writer.writerow(['idx', 'nik', 'name', 'born', 'active', 'salary'])
-                
-                # Write data
-                for customer in customers:
-                    writer.writerow([
-                        customer['idx'],
-                        customer['nik'],
-                        customer['name'],
-                        customer['born'],
-                        customer['active'],
-                        customer['salary']
-                    ])
-            
-            return True, f"Berhasil mengekspor {len(customers)} data"
+            record = action()
+            return True, f"{record['affected']} {done}", record
+        except TaskCancelled:
+            return False, "Aksi massal dibatalkan, tidak ada data yang diubah", None
+        except Exception as e:
+            return False, f"Error: {str(e)}", None
+    
+    def undo_bulk(self, record, progress=None):
+        from models.customer_bulk_edit import BulkEditor
+
+        try:
+            result = BulkEditor(self.customer_model).undo(record, progress)
+            message = f"{result['restored']} data dikembalikan"
+            if result['skipped']:
+                message += f", {result['skipped']} dilewati karena sudah berubah"
+            return True, message
+        except TaskCancelled:
+            return False, "Urungkan dibatalkan, tidak ada data yang diubah"
         except Exception as e:
             return False, f"Error: {str(e)}"
     
-    def import_from_csv(self, file_path):
+    def get_export_formats(self):
+        from models.customer_export import available_export_formats
+
+        return available_export_formats()
+    
+    def export_to_csv(self, file_path, progress=None, batch_size=1000, export_format=None):
+        # export_format: 'csv', 'csv.gz', 'csv.zst', 'arrow' or 'parquet';
+        # None picks it from the file extension
+        from models.customer_export import export_customers, export_format_for_path
+
         try:
-            success_count = 0
-            error_count = 0
-            error_messages = [] # List to store error messages
-            
-            with open(file_path, 'r', encoding='utf-8') as csvfile:
-                reader = csv.reader(csvfile, delimiter=';')
-                
-                # Skip header
-                next(reader)
-                
-                for row_number, row in enumerate(reader, start=2): # Start from row 2 to account for header
-                    try:
-                        if len(row) >= 5:
-                            nik = row[0]
-                            name = row[1]
-                            born = datetime.strptime(row[2], "%Y-%m-%d").date() if row[3] else None
-                            active = int(row[3]) if row[3] else 0
-                            salary = int(row[4]) if row[4] else 0
-                            
-                            if self.customer_model.create_customer(nik, name, born, active, salary):
-                                success_count += 1
-                            else:
-                                error_messages.append(f"Row {row_number}: Gagal menyimpan data untuk NIK {nik}")
-                                error_count += 1
-                        else:
-                            error_messages.append(f"Row {row_number}: invalid row length")
-                            error_count += 1
-                    except ValueError as ve:
-                        error_messages.append(f"Row {row_number}: Value error - {str(ve)}")
-                        error_count += 1
-                    except Exception as e:
-                        error_messages.append(f"Row {row_number}: Unexpected error - {e}")
-                        error_count += 1
+            export_format = export_format or export_format_for_path(file_path)
+            if export_format not in self.get_export_formats():
+                return False, f"Format {export_format} tidak tersedia"
+            row_count = export_customers(
+                self.customer_model, file_path,
+                export_format=export_format,
+                progress=progress,
+                batch_size=batch_size
+            )
+            return True, f"Berhasil mengekspor {row_count} data"
+        except TaskCancelled:
+            return False, "Export dibatalkan"
+        except Exception as e:
+            return False, f"Error: {str(e)}"
+    
+    def export_parallel(self, file_path, progress=None, batch_size=1000, export_format=None,
+                        parallelism=None, merge=True, consistent_snapshot=True):
+        # Reads idx ranges over several connections at once; merge=False
+        # keeps one file per range (<name>.part-0001.csv, ...)
+        from models.customer_export import export_format_for_path
+        from models.customer_parallel_export import ParallelExporter
+
+        try:
+            export_format = export_format or export_format_for_path(file_path)
+            if export_format not in self.get_export_formats():
+                return False, f"Format {export_format} tidak tersedia"
+            exporter = ParallelExporter(
+                self.customer_model,
+                parallelism=parallelism,
+                batch_size=batch_size,
+                consistent_snapshot=consistent_snapshot,
+                merge=merge
+            )
+            result = exporter.run(file_path, export_format=export_format, progress=progress)
+            if merge:
+                return True, f"Berhasil mengekspor {result['rows']} data"
+            return True, f"Berhasil mengekspor {result['rows']} data ke {len(result['files'])} file"
+        except TaskCancelled:
+            return False, "Export dibatalkan"
+        except Exception as e:
+            return False, f"Error: {str(e)}"
+    
+    def export_changes(self, file_path, progress=None):
+        # Only inserts, updates and deletes since the previous call
+        from models.customer_change_feed import ChangeFeed
+
+        try:
+            feed = ChangeFeed(self.customer_model.backend, self.customer_model.db_config)
+            counts = feed.export(file_path, progress=progress)
+            return True, (f"Berhasil mengekspor perubahan: {counts['inserted']} baru, "
+                          f"{counts['updated']} diubah, {counts['deleted']} dihapus")
+        except TaskCancelled:
+            return False, "Export dibatalkan"
+        except Exception as e:
+            return False, f"Error: {str(e)}"
+    
+    def import_from_csv(self, file_path, chunk_size=1000, rollback_chunk=False, progress=None,
+                        parse_workers=None, writer_workers=1, parse_engine=None, mode=IMPORT_INSERT,
+                        fast_load=False):
+        # Big files go through the multi-process pipeline; parse_workers=1
+        # keeps parsing in this process, a larger number forces the pool.
+        # parse_engine 'numpy' (vectorized, the default when numpy is
+        # installed) or 'csv' (csv.reader, row by row).
+        # mode IMPORT_MERGE updates the customer with the same nik instead
+        # of adding a duplicate. fast_load goes through a staging table in
+        # one transaction and writes rejected rows to <file>.errors.csv.
+        from models.customer_bulk_load import FastLoader
+        from models.customer_csv import iter_csv_rows
+        from models.customer_import import ParallelImporter, numpy_available
+
+        try:
+            if mode == IMPORT_MERGE:
+                # Writers of one import would only queue on each other's nik locks
+                writer_workers = 1
+            if parse_engine is None:
+                parse_engine = 'numpy' if numpy_available() else 'csv'
+            if parse_workers is None:
+                parallel = (os.path.getsize(file_path) >= PARALLEL_IMPORT_MIN_BYTES
+                            and (os.cpu_count() or 1) > 1)
+                parse_workers = None if parallel else 1
+
+            if fast_load:
+                loader = FastLoader(
+                    self.customer_model,
+                    parse_workers=parse_workers,
+                    engine=parse_engine,
+                    mode=mode
+                )
+                result = loader.run(file_path, progress=progress)
+            elif parse_engine == 'csv' and parse_workers == 1:
+                result = self.customer_model.import_customers(
+                    iter_csv_rows(file_path, progress=progress),
+                    chunk_size=chunk_size,
+                    rollback_chunk=rollback_chunk,
+                    progress=progress,
+                    mode=mode
+                )
+            else:
+                importer = ParallelImporter(
+                    self.customer_model,
+                    parse_workers=parse_workers,
+                    writer_workers=writer_workers,
+                    batch_size=chunk_size,
+                    engine=parse_engine,
+                    mode=mode
+                )
+                result = importer.run(file_path, rollback_chunk=rollback_chunk, progress=progress)
+                self.last_import_metrics = result['metrics']
 
             # print error messages if any
-            for message in error_messages:
+            for message in result['errors']:
                 print(message)
             
-            return True, f"Berhasil import {success_count} data, gagal {error_count} data"
+            rejected_note = ""
+            if result.get('error_file'):
+                rejected_note = f"\nBaris yang ditolak disimpan di {result['error_file']}"
+
+            if mode == IMPORT_MERGE:
+                summary = (f"{result['inserted']} data baru, {result['updated']} diperbarui, "
+                           f"{result['unchanged']} tidak berubah, gagal {result['failed']} data")
+                if result['cancelled']:
+                    return False, f"Import dibatalkan: {summary}"
+                return True, f"Berhasil import: {summary}{rejected_note}"
+
+            if result['cancelled']:
+                return False, f"Import dibatalkan: {result['inserted']} data tersimpan, gagal {result['failed']} data"
+            return True, f"Berhasil import {result['inserted']} data, gagal {result['failed']} data{rejected_note}"
         except Exception as e:
             return False, f"Error: {str(e)}"
\ No newline at end of file
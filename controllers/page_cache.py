@@ -0,0 +1,100 @@
+import sys
+import threading
+from models.customer import Customer, PAGE_NEXT, PAGE_PREV
+from utils.lru import LRUCache
+
+
+def estimate_page_bytes(page):
+    customers, _ = page
+    size = sys.getsizeof(customers)
+    for customer in customers:
+        size += sys.getsizeof(customer)
+        size += sum(sys.getsizeof(value) for value in customer.values())
+    return size
+
+
+class PageCache:
+    # Pages keyed by (search term, page size, direction, cursor, offset) with
+    # LRU eviction under a memory budget. Any committed write through the
+    # Customer model clears it; writes by other clients show once a page is
+    # older than ttl seconds.
+    def __init__(self, max_pages=64, max_bytes=8 * 1024 * 1024, ttl=None):
+        self._pages = LRUCache(max_entries=max_pages, max_bytes=max_bytes, ttl=ttl, sizeof=estimate_page_bytes,
+                               on_evict=self._forget)
+        # Reentrant: put() inside _store evicts, and _forget takes it again
+        self._lock = threading.RLock()
+        self._generation = 0
+        # Page boundaries, so a page reached going forward can be found again
+        # going backward (and vice versa) without another query
+        self._by_first = {}  # (search_term, limit, first idx) -> key
+        self._by_last = {}  # (search_term, limit, last idx) -> key
+        Customer.add_change_listener(self.invalidate)
+
+    def get_page(self, fetch, limit, search_term, cursor_idx, direction, offset):
+        key = (search_term, limit, direction, cursor_idx, offset)
+        page = self._pages.get(key)
+        if page is not None:
+            return page
+
+        generation = self._generation
+        page = fetch(limit, search_term, cursor_idx, direction, offset)
+        self._store(generation, key, page)
+        return page
+
+    def contains(self, limit, search_term, cursor_idx, direction, offset=0):
+        return (search_term, limit, direction, cursor_idx, offset) in self._pages
+
+    def invalidate(self):
+        # Called from whichever thread committed the write
+        with self._lock:
+            self._generation += 1
+            self._pages.clear()
+            self._by_first.clear()
+            self._by_last.clear()
+
+    def stats(self):
+        return self._pages.stats()
+
+    def _forget(self, key, page):
+        # An evicted page takes its boundary entries with it, unless they
+        # already point at a newer page
+        customers, _ = page
+        if not customers:
+            return
+        search_term, limit = key[0], key[1]
+        with self._lock:
+            for index, idx in ((self._by_first, customers[0]['idx']), (self._by_last, customers[-1]['idx'])):
+                if index.get((search_term, limit, idx)) == key:
+                    del index[(search_term, limit, idx)]
+
+    def _store(self, generation, key, page):
+        customers, _ = page
+        search_term, limit, direction, cursor_idx, _ = key
+
+        with self._lock:
+            # A write landed while this page was being read
+            if generation != self._generation:
+                return
+            self._pages.put(key, page)
+            if not customers:
+                return
+
+            first_idx = customers[0]['idx']
+            last_idx = customers[-1]['idx']
+            self._by_first[(search_term, limit, first_idx)] = key
+            self._by_last[(search_term, limit, last_idx)] = key
+
+            if direction == PAGE_NEXT:
+                # The page ending at cursor_idx sits right before this one
+                previous_key = self._by_last.get((search_term, limit, cursor_idx))
+                previous = self._pages.peek(previous_key) if previous_key else None
+                if previous is not None and len(previous[0]) == limit:
+                    self._pages.put((search_term, limit, PAGE_PREV, first_idx, 0), previous,
+                                    stored_at=self._pages.stored_at(previous_key))
+            elif direction == PAGE_PREV and len(customers) == limit:
+                # The page starting at cursor_idx sits right after this one
+                following_key = self._by_first.get((search_term, limit, cursor_idx))
+                following = self._pages.peek(following_key) if following_key else None
+                if following is not None:
+                    self._pages.put((search_term, limit, PAGE_NEXT, last_idx, 0), following,
+                                    stored_at=self._pages.stored_at(following_key))
@@ -0,0 +1,39 @@
+import threading
+from config.database import DatabaseConfig
+from models.customer import Customer
+from controllers.customer_controller import CustomerController
+from utils.metrics import metrics
+
+
+class Services:
+    # Application-scoped objects, built once and handed to the views: one
+    # config, one Customer model (and through it the shared backend, pool
+    # and caches) and one controller. Views take them as constructor
+    # arguments instead of building their own.
+    def __init__(self, db_config=None):
+        self.db_config = db_config or DatabaseConfig()
+        # The slow query log is process-wide: set up here, not per pool
+        metrics.configure_slow_query_log(self.db_config.slow_query_ms, self.db_config.slow_query_log_path)
+        self.customer_model = Customer(self.db_config)
+        self.controller = CustomerController(self.customer_model)
+
+    @property
+    def backend(self):
+        return self.customer_model.backend
+
+    @property
+    def page_cache(self):
+        return self.controller.page_cache
+
+
+_services = None
+_services_lock = threading.Lock()
+
+
+def get_services():
+    # The process-wide container, for callers that are not handed one
+    global _services
+    with _services_lock:
+        if _services is None:
+            _services = Services()
+        return _services
@@ -1,19 +1,26 @@
 import sys
-from PySide6.QtWidgets import QApplication
-from views.main_window import MainWindow
+from utils.startup import StartupTimer
 
 def main():
+    startup = StartupTimer()
+    # Imported here so the startup report covers them
+    from PySide6.QtWidgets import QApplication
+    from controllers.services import get_services
+    from views.main_window import MainWindow
+    startup.mark('imports')
+
     app = QApplication(sys.argv)
-    
+
     # Set application properties
     app.setApplicationName("Customer Management System")
     app.setApplicationVersion("1.0")
     app.setOrganizationName("Your Company")
-    
-    # Create and show main window
-    window = MainWindow()
+
+    # Create and show main window; the first page loads in the background
+    window = MainWindow(get_services(), startup=startup)
+    startup.mark('window')
     window.show()
-    
+
     sys.exit(app.exec())
 
 if __name__ == '__main__':
@@ -0,0 +1,69 @@
+import threading
+import time
+
+# Key of the total without a search: no conditions, no params
+UNFILTERED_KEY = ((), ())
+
+
+class CountCache:
+    # Total row counts per search, shared by every Customer instance. Writes
+    # through the model clear it; the TTL bounds staleness from other clients.
+    def __init__(self, ttl=30.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> (count, exact, stored_at)
+        self._pending = set()
+        self._generation = 0
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            count, exact, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            return count, exact
+
+    def set(self, key, count, exact=True, generation=None):
+        with self._lock:
+            # Drop results computed before the last invalidation
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (count, exact, time.monotonic())
+
+    def invalidate(self, unfiltered_delta=None):
+        # unfiltered_delta: a single-row write through the model, which moves
+        # the unfiltered total by exactly that much; only filtered totals
+        # (the row may or may not match) are dropped then
+        with self._lock:
+            unfiltered = self._entries.get(UNFILTERED_KEY) if unfiltered_delta is not None else None
+            self._entries.clear()
+            if unfiltered is not None:
+                count, exact, stored_at = unfiltered
+                self._entries[UNFILTERED_KEY] = (count + unfiltered_delta, exact, stored_at)
+            self._generation += 1
+
+    def refresh_in_background(self, key, compute):
+        # Runs compute() once per key on a daemon thread and stores it as exact
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+            generation = self._generation
+
+        def run():
+            try:
+                count = compute()
+                if count is not None:
+                    self.set(key, count, exact=True, generation=generation)
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+
+        threading.Thread(target=run, name="exact-count", daemon=True).start()
@@ -1,133 +1,593 @@
 from datetime import datetime
 from config.database import DatabaseConfig
+from models.customer_csv import record_values
+from models.customer_search import build_search_condition
+from models.count_cache import CountCache
+from models.query_cache import QueryCache, CHANGE_CREATE, CHANGE_UPDATE, CHANGE_DELETE
+from utils.metrics import metrics
+
+INSERT_CUSTOMER_SQL = """
+INSERT INTO customer (nik, name, born, active, salary)
+VALUES (%s, %s, %s, %s, %s)
+"""
+
+MERGE_UPDATE_SQL = """
+UPDATE customer
+SET name = %s, born = %s, active = %s, salary = %s
+WHERE idx = %s
+"""
+
+# Import modes: every row becomes a new customer, or rows are merged into
+# the existing customer with the same nik
+IMPORT_INSERT = 'insert'
+IMPORT_MERGE = 'merge'
+
+# Keyset pagination directions
+PAGE_FIRST = 'first'
+PAGE_NEXT = 'next'
+PAGE_PREV = 'prev'
+PAGE_LAST = 'last'
+PAGE_CURRENT = 'current'
+PAGE_OFFSET = 'offset'
+
 
 class Customer:
-    def __init__(self):
-        self.db_config = DatabaseConfig()
-    
+    # Shared across instances so a write from any form invalidates every view
+    count_cache = CountCache()
+    query_cache = QueryCache()
+    _change_listeners = []
+
+    def __init__(self, db_config=None):
+        self.db_config = db_config or DatabaseConfig()
+        self._backend = None
+        Customer.count_cache.ttl = self.db_config.count_cache_ttl
+        Customer.query_cache.configure(
+            self.db_config.query_cache_ttl,
+            self.db_config.query_cache_customers,
+            self.db_config.query_cache_pages
+        )
+
+    @property
+    def backend(self):
+        # Opened on first use, which for the GUI is the first page read on a
+        # worker thread (SQLite migrates its schema at that point)
+        if self._backend is None:
+            self._backend = self.db_config.get_backend()
+        return self._backend
+
+    @classmethod
+    def add_change_listener(cls, callback):
+        cls._change_listeners.append(callback)
+
+    @classmethod
+    def remove_change_listener(cls, callback):
+        if callback in cls._change_listeners:
+            cls._change_listeners.remove(callback)
+
+    @classmethod
+    def _notify_change(cls, change=None, customer_id=None, rows=1):
+        # change/customer_id: the write that was committed, so the caches
+        # keep what it could not have touched; rows: how many rows it
+        # created or deleted (a chunk of an import creates many)
+        if change is None:
+            cls.count_cache.invalidate()
+        else:
+            # The unfiltered total moves by exactly that many rows (or not at all)
+            cls.count_cache.invalidate(unfiltered_delta={CHANGE_CREATE: rows, CHANGE_DELETE: -rows}.get(change, 0))
+        cls.query_cache.invalidate(change, customer_id)
+        for callback in list(cls._change_listeners):
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error in change listener: {e}")
+
+    def get_pool_stats(self):
+        return self.backend.get_pool_stats()
+
+    def get_query_cache_stats(self):
+        return Customer.query_cache.stats()
+
+    def _get_connection(self):
+        try:
+            return self.backend.get_connection()
+        except Exception as e:
+            print(f"Error connecting to database: {e}")
+            return None
+
+    def _release_connection(self, connection, cursor=None):
+        try:
+            if cursor is not None:
+                cursor.close()
+        except Exception:
+            pass
+        self.backend.release_connection(connection)
+
+    def _build_search_condition(self, search_term):
+        # Returns (list of SQL conditions to AND together, params)
+        if not search_term:
+            return [], []
+        return build_search_condition(search_term, self.backend.dialect, self.backend.supports_fulltext)
+
+    @staticmethod
+    def _where(conditions):
+        return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    def _count_customers(self, cursor, conditions, params):
+        key = (tuple(conditions), tuple(params))
+        cached = Customer.count_cache.get(key)
+        if cached is not None:
+            return cached[0]
+
+        generation = Customer.count_cache.generation
+        if not conditions and self.db_config.approximate_counts:
+            # Huge unfiltered table: show the statistics estimate now and
+            # compute the exact figure off the GUI path
+            estimate = self.backend.estimate_row_count(cursor, 'customer')
+            if estimate is not None and estimate >= self.db_config.approximate_count_threshold:
+                Customer.count_cache.set(key, estimate, exact=False, generation=generation)
+                Customer.count_cache.refresh_in_background(key, self._exact_unfiltered_count)
+                return estimate
+
+        count_query = f"SELECT COUNT(*) as total FROM customer {self._where(conditions)}"
+        cursor.execute(count_query, params)
+        total = cursor.fetchone()['total']
+        Customer.count_cache.set(key, total, generation=generation)
+        return total
+
+    def _exact_unfiltered_count(self):
+        connection = self._get_connection()
+        if not connection:
+            return None
+
+        cursor = None
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT COUNT(*) FROM customer")
+            return cursor.fetchone()[0]
+        except Exception as e:
+            print(f"Error counting customers: {e}")
+            return None
+        finally:
+            self._release_connection(connection, cursor)
+
+    def is_count_exact(self, search_term=""):
+        conditions, params = self._build_search_condition(search_term)
+        cached = Customer.count_cache.get((tuple(conditions), tuple(params)))
+        return cached is None or cached[1]
+
     def get_all_customers(self, limit=10, offset=0, search_term=""):
-        connection = self.db_config.get_connection()
+        cached = Customer.query_cache.get_page(limit, offset, search_term)
+        if cached is not None:
+            return cached
+
+        generation = Customer.query_cache.generation
+        connection = self._get_connection()
         if not connection:
             return [], 0
-        
+
+        cursor = None
         try:
             cursor = connection.cursor(dictionary=True)
-            
+
             # Build search query
-            search_condition = ""
-            params = []
-            
-            if search_term:
-                search_condition = """
-                WHERE nik LIKE %s OR name LIKE %s OR 
-                born LIKE %s OR active LIKE %s OR salary LIKE %s
-                """
-                search_param = f"%{search_term}%"
-                params = [search_param] * 5
-            
+            conditions, params = self._build_search_condition(search_term)
+
             # Get total count
-            count_query = f"SELECT COUNT(*) as total FROM customer {search_condition}"
-            cursor.execute(count_query, params)
-            total_count = cursor.fetchone()['total']
-            
+            total_count = self._count_customers(cursor, conditions, params)
+
             # Get paginated data
             query = f"""
-            SELECT idx, nik, name, born, active, salary 
-            FROM customer {search_condition}
-            ORDER BY idx DESC 
+            SELECT idx, nik, name, born, active, salary
+            FROM customer {self._where(conditions)}
+            ORDER BY idx DESC
             LIMIT %s OFFSET %s
             """
             cursor.execute(query, params + [limit, offset])
             customers = cursor.fetchall()
-            
+
+            Customer.query_cache.set_page(limit, offset, search_term, (customers, total_count), generation)
             return customers, total_count
-            
+
         except Exception as e:
             print(f"Error fetching customers: {e}")
             return [], 0
         finally:
-            if connection.is_connected():
-                cursor.close()
-                connection.close()
-    
+            self._release_connection(connection, cursor)
+
+    def get_customers_page(self, limit=10, search_term="", cursor_idx=None, direction=PAGE_FIRST, offset=0):
+        # Keyset pagination over idx DESC: the cursor is the last (next) or
+        # first (prev) idx of the page on screen, so deep pages never scan
+        # and discard the rows before them like OFFSET does
+        if direction == PAGE_OFFSET:
+            return self.get_all_customers(limit, offset, search_term)
+
+        # A failed keyset read raises rather than returning an empty page, so
+        # callers (and the page cache) can tell it from the end of the table
+        connection = self._get_connection()
+        if not connection:
+            raise ConnectionError("Tidak dapat terhubung ke database")
+
+        cursor = None
+        try:
+            cursor = connection.cursor(dictionary=True)
+
+            conditions, params = self._build_search_condition(search_term)
+            total_count = self._count_customers(cursor, conditions, params)
+
+            page_conditions = list(conditions)
+            page_params = list(params)
+            order = "DESC"
+            if direction == PAGE_NEXT:
+                page_conditions.append("idx < %s")
+                page_params.append(cursor_idx)
+            elif direction == PAGE_CURRENT:
+                page_conditions.append("idx <= %s")
+                page_params.append(cursor_idx)
+            elif direction == PAGE_PREV:
+                page_conditions.append("idx > %s")
+                page_params.append(cursor_idx)
+                order = "ASC"
+            elif direction == PAGE_LAST:
+                order = "ASC"
+
+            query = f"""
+            SELECT idx, nik, name, born, active, salary
+            FROM customer {self._where(page_conditions)}
+            ORDER BY idx {order}
+            LIMIT %s
+            """
+            cursor.execute(query, page_params + [limit])
+            customers = cursor.fetchall()
+
+            # Backward reads come out ascending; the screen is always idx DESC
+            if order == "ASC":
+                customers.reverse()
+
+            return customers, total_count
+
+        finally:
+            self._release_connection(connection, cursor)
+
+    def iter_customer_batches(self, batch_size=1000):
+        # Streams the whole table through an unbuffered cursor, so rows are
+        # pulled from the server batch by batch instead of loaded up front
+        connection = self._get_connection()
+        if not connection:
+            raise ConnectionError("Tidak dapat terhubung ke database")
+
+        cursor = None
+        exhausted = False
+        try:
+            cursor = connection.cursor(buffered=False)
+            cursor.execute("""
+            SELECT idx, nik, name, born, active, salary
+            FROM customer
+            ORDER BY idx DESC
+            """)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+            exhausted = True
+        finally:
+            if exhausted:
+                self._release_connection(connection, cursor)
+            else:
+                # Unread rows are still on the wire; the connection cannot be reused
+                self.backend.discard_connection(connection)
+
+    def get_idx_bounds(self, connection):
+        # (lowest idx, highest idx), (None, None) for an empty table
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT MIN(idx), MAX(idx) FROM customer")
+            return tuple(cursor.fetchone())
+        finally:
+            cursor.close()
+
+    def iter_customer_range(self, connection, low, high, batch_size=1000):
+        # Rows with low <= idx <= high, idx DESC, streamed over a connection
+        # the caller holds, so several ranges can read one snapshot. A caller
+        # that stops early must discard the connection, as with
+        # iter_customer_batches.
+        cursor = connection.cursor(buffered=False)
+        cursor.execute("""
+        SELECT idx, nik, name, born, active, salary
+        FROM customer
+        WHERE idx BETWEEN %s AND %s
+        ORDER BY idx DESC
+        """, (low, high))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+        cursor.close()
+
     def get_customer_by_id(self, customer_id):
-        connection = self.db_config.get_connection()
+        cached = Customer.query_cache.get_customer(customer_id)
+        if cached is not None:
+            return cached
+
+        generation = Customer.query_cache.generation
+        connection = self._get_connection()
         if not connection:
             return None
-        
+
+        cursor = None
         try:
             cursor = connection.cursor(dictionary=True)
             query = "SELECT * FROM customer WHERE idx = %s"
             cursor.execute(query, (customer_id,))
-            return cursor.fetchone()
+            customer = cursor.fetchone()
+            Customer.query_cache.set_customer(customer_id, customer, generation)
+            return customer
         except Exception as e:
             print(f"Error fetching customer: {e}")
             return None
         finally:
-            if connection.is_connected():
-                cursor.close()
-                connection.close()
-    
+            self._release_connection(connection, cursor)
+
     def create_customer(self, nik, name, born, active, salary):
-        connection = self.db_config.get_connection()
+        # Returns the new row, idx included, or False
+        connection = self._get_connection()
         if not connection:
             return False
-        
+
+        cursor = None
         try:
             cursor = connection.cursor()
-            query = """
-            INSERT INTO customer (nik, name, born, active, salary) 
-            VALUES (%s, %s, %s, %s, %s)
-            """
-            cursor.execute(query, (nik, name, born, active, salary))
+            cursor.execute(INSERT_CUSTOMER_SQL, (nik, name, born, active, salary))
+            customer_id = cursor.lastrowid
             connection.commit()
-            return True
+            self._notify_change(CHANGE_CREATE, customer_id)
+            return self._customer_row(customer_id, nik, name, born, active, salary)
         except Exception as e:
             print(f"Error creating customer: {e}")
             return False
         finally:
-            if connection.is_connected():
-                cursor.close()
-                connection.close()
-    
+            self._release_connection(connection, cursor)
+
     def update_customer(self, customer_id, nik, name, born, active, salary):
-        connection = self.db_config.get_connection()
+        # Returns the row as now stored, or False
+        connection = self._get_connection()
         if not connection:
             return False
-        
+
+        cursor = None
         try:
             cursor = connection.cursor()
             query = """
-            UPDATE customer 
-            SET nik = %s, name = %s, born = %s, active = %s, salary = %s 
+            UPDATE customer
+            SET nik = %s, name = %s, born = %s, active = %s, salary = %s
             WHERE idx = %s
             """
             cursor.execute(query, (nik, name, born, active, salary, customer_id))
+            matched = cursor.rowcount
+            if not matched:
+                # MySQL counts changed rows only: a save without changes
+                # still matched, a row another client deleted did not
+                cursor.execute("SELECT COUNT(*) FROM customer WHERE idx = %s", (customer_id,))
+                matched = cursor.fetchone()[0]
             connection.commit()
-            return True
+            if not matched:
+                return False
+            self._notify_change(CHANGE_UPDATE, customer_id)
+            return self._customer_row(customer_id, nik, name, born, active, salary)
         except Exception as e:
             print(f"Error updating customer: {e}")
             return False
         finally:
-            if connection.is_connected():
-                cursor.close()
-                connection.close()
-    
+            self._release_connection(connection, cursor)
+
     def delete_customer(self, customer_id):
-        connection = self.db_config.get_connection()
+        connection = self._get_connection()
         if not connection:
             return False
-        
+
+        cursor = None
         try:
             cursor = connection.cursor()
             query = "DELETE FROM customer WHERE idx = %s"
             cursor.execute(query, (customer_id,))
+            deleted = cursor.rowcount
             connection.commit()
+            if deleted:
+                self._notify_change(CHANGE_DELETE, customer_id)
             return True
         except Exception as e:
             print(f"Error deleting customer: {e}")
             return False
         finally:
-            if connection.is_connected():
-                cursor.close()
-                connection.close()
\ No newline at end of file
+            self._release_connection(connection, cursor)
+
+    @staticmethod
+    def _customer_row(customer_id, nik, name, born, active, salary):
+        # Same keys as the rows get_customers_page returns
+        return {'idx': customer_id, 'nik': nik, 'name': name, 'born': born, 'active': active, 'salary': salary}
+
+    def import_customers(self, rows, chunk_size=1000, rollback_chunk=False, progress=None, mode=IMPORT_INSERT):
+        # rows yields (row_number, raw_row); each chunk is validated and
+        # written with executemany inside one transaction
+        from models.customer_csv import iter_chunks, validate_rows
+
+        result = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'failed': 0, 'errors': [], 'cancelled': False}
+
+        connection = self._get_connection()
+        if not connection:
+            raise ConnectionError("Tidak dapat terhubung ke database")
+
+        cursor = None
+        try:
+            cursor = connection.cursor()
+            for chunk in iter_chunks(rows, chunk_size):
+                if progress is not None and progress.cancelled:
+                    # Chunks already committed stay in the table
+                    result['cancelled'] = True
+                    break
+
+                with metrics.span('csv.parse'):
+                    records, errors = validate_rows(chunk)
+                counts, errors = self._import_chunk(
+                    connection, cursor, records, errors,
+                    chunk[0][0], chunk[-1][0], rollback_chunk, mode
+                )
+                for key, count in counts.items():
+                    result[key] += count
+                result['failed'] += len(chunk) - sum(counts.values())
+                result['errors'].extend(message for _, message in errors)
+
+                if progress is not None:
+                    progress.advance(len(chunk))
+
+            return result
+        finally:
+            if progress is not None:
+                progress.finish()
+            self._release_connection(connection, cursor)
+
+    def _import_chunk(self, connection, cursor, records, errors, first_row, last_row, rollback_chunk,
+                      mode=IMPORT_INSERT):
+        # One chunk of rows first_row..last_row, already validated into
+        # records and errors. Returns ({'inserted', 'updated', 'unchanged'},
+        # errors sorted by row).
+        if rollback_chunk and errors:
+            errors.extend(self._rolled_back_errors(records, first_row, last_row, "data tidak valid"))
+            records = []
+
+        if not records:
+            counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        elif mode == IMPORT_MERGE:
+            with metrics.span('import.write'):
+                counts, chunk_errors = self._merge_chunk(connection, cursor, records, first_row, last_row,
+                                                         rollback_chunk)
+            errors.extend(chunk_errors)
+        else:
+            with metrics.span('import.write'):
+                chunk_errors = self._insert_chunk(connection, cursor, records, first_row, last_row, rollback_chunk)
+            errors.extend(chunk_errors)
+            failed_rows = {row_number for row_number, _ in chunk_errors}
+            counts = {'inserted': len(records) - len(failed_rows), 'updated': 0, 'unchanged': 0}
+
+        if counts['updated']:
+            # Merged rows are found by nik, not idx
+            self._notify_change()
+        elif counts['inserted']:
+            self._notify_change(CHANGE_CREATE, rows=counts['inserted'])
+        errors.sort(key=lambda error: error[0])
+        return counts, errors
+
+    def _insert_chunk(self, connection, cursor, records, first_row, last_row, rollback_chunk):
+        try:
+            cursor.executemany(INSERT_CUSTOMER_SQL, record_values(records))
+            connection.commit()
+            return []
+        except Exception as e:
+            connection.rollback()
+            print(f"Error importing chunk: {e}")
+            if rollback_chunk:
+                return self._rolled_back_errors(records, first_row, last_row, str(e))
+
+        # Multi-row insert failed: retry row by row so only the bad rows are skipped
+        errors = []
+        for row_number, record in records:
+            try:
+                cursor.execute(INSERT_CUSTOMER_SQL, record)
+            except Exception as e:
+                print(f"Error creating customer: {e}")
+                errors.append((row_number, f"Row {row_number}: Gagal menyimpan data untuk NIK {record[0]}"))
+        connection.commit()
+        return errors
+
+    def _merge_chunk(self, connection, cursor, records, first_row, last_row, rollback_chunk):
+        # Upsert keyed on nik: one locking lookup of the chunk's niks, then
+        # one executemany INSERT for new niks and one UPDATE for changed ones.
+        # Rows whose content equals what is stored cost no write at all. The
+        # lookup locks the niks (absent ones included) until the commit, so
+        # another client merging the same niks waits instead of inserting
+        # them a second time.
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        try:
+            self.backend.begin_write(connection)
+            stored = self._stored_customers(cursor, {record[0] for _, record in records})
+            inserts, updates = [], []
+            pending = {}  # nik -> position in inserts, for niks new in this chunk
+            for row_number, record in records:
+                nik, content = record[0], tuple(record[1:])
+                current = stored.get(nik)
+                if current is None:
+                    pending[nik] = len(inserts)
+                    inserts.append((row_number, record))
+                    counts['inserted'] += 1
+                elif current[1] == content:
+                    counts['unchanged'] += 1
+                    continue
+                elif current[0] is None:
+                    # Repeated in the file before it reached the table
+                    inserts[pending[nik]] = (row_number, record)
+                    counts['updated'] += 1
+                else:
+                    updates.append((row_number, record[1:] + (current[0],)))
+                    counts['updated'] += 1
+                # A later row of the same file with the same nik sees this one
+                stored[nik] = (current[0] if current else None, content)
+
+            if inserts:
+                cursor.executemany(INSERT_CUSTOMER_SQL, [record for _, record in inserts])
+            if updates:
+                cursor.executemany(MERGE_UPDATE_SQL, [params for _, params in updates])
+            connection.commit()
+            return counts, []
+        except Exception as e:
+            connection.rollback()
+            print(f"Error merging chunk: {e}")
+            if rollback_chunk:
+                return {'inserted': 0, 'updated': 0, 'unchanged': 0}, \
+                    self._rolled_back_errors(records, first_row, last_row, str(e))
+
+        # Bulk merge failed: redo the chunk row by row so only the bad rows
+        # are skipped, with the same locking lookup per row
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        errors = []
+        self.backend.begin_write(connection)
+        for row_number, record in records:
+            try:
+                current = self._stored_customers(cursor, [record[0]]).get(record[0])
+                if current is None:
+                    cursor.execute(INSERT_CUSTOMER_SQL, record)
+                    counts['inserted'] += 1
+                elif current[1] == tuple(record[1:]):
+                    counts['unchanged'] += 1
+                else:
+                    cursor.execute(MERGE_UPDATE_SQL, record[1:] + (current[0],))
+                    counts['updated'] += 1
+            except Exception as e:
+                print(f"Error merging customer: {e}")
+                errors.append((row_number, f"Row {row_number}: Gagal menyimpan data untuk NIK {record[0]}"))
+        connection.commit()
+        return counts, errors
+
+    def _stored_customers(self, cursor, niks):
+        # nik -> (idx, (name, born, active, salary)) of its newest row, read
+        # with locking_read_sql. Tables imported before merge mode existed
+        # may hold a nik more than once; the merge keeps to the newest copy
+        # and leaves the older ones as they are.
+        stored = {}
+        niks = list(niks)
+        placeholders = ", ".join(["%s"] * len(niks))
+        cursor.execute(
+            f"SELECT idx, nik, name, born, active, salary FROM customer WHERE nik IN ({placeholders}) "
+            f"ORDER BY idx{self.backend.locking_read_sql}",
+            niks
+        )
+        for idx, nik, name, born, active, salary in cursor.fetchall():
+            stored[nik] = (idx, (name, born, int(active), int(salary)))
+        return stored
+
+    @staticmethod
+    def _rolled_back_errors(records, first_row, last_row, reason):
+        return [
+            (row_number, f"Row {row_number}: Dibatalkan, chunk baris {first_row}-{last_row} di-rollback ({reason})")
+            for row_number, _ in records
+        ]
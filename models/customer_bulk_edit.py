@@ -0,0 +1,177 @@
+# Bulk actions on a selection of customers, all or nothing:
+#
+#   selected idx --> batches of batch_size --> per batch, in one transaction:
+#   snapshot the rows, one set-based UPDATE / DELETE ... WHERE idx IN (...),
+#   snapshot them again --> one commit at the end
+#
+# Each run returns an undo record with the rows before and after. undo()
+# puts back only the rows that still hold what the action wrote, so a later
+# edit by someone else is never overwritten; deleted rows come back with
+# their original idx.
+
+BULK_SET_ACTIVE = 'set_active'
+BULK_ADJUST_SALARY = 'adjust_salary'
+BULK_DELETE = 'delete'
+
+ROW_COLUMNS = ('idx', 'nik', 'name', 'born', 'active', 'salary')
+
+RESTORE_UPDATE_SQL = """
+UPDATE customer SET active = %s, salary = %s
+WHERE idx = %s AND active = %s AND salary = %s
+"""
+
+RESTORE_DELETE_SQL = """
+INSERT INTO customer (idx, nik, name, born, active, salary)
+VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+SALARY_MAX = 2147483647
+
+
+class BulkEditor:
+    def __init__(self, customer_model, batch_size=500):
+        self.customer_model = customer_model
+        # Bounded by the placeholders one statement may carry (SQLite: 999)
+        self.batch_size = batch_size
+
+    def set_active(self, customer_ids, active, progress=None):
+        return self._run(BULK_SET_ACTIVE, customer_ids, progress,
+                         "UPDATE customer SET active = %s WHERE idx IN ({ids})", [1 if active else 0])
+
+    def adjust_salary(self, customer_ids, percent, progress=None):
+        # +10 raises every salary by 10%, -5 cuts it by 5%; rounded to whole IDR
+        if percent <= -100:
+            raise ValueError("Persentase harus lebih dari -100")
+        factor = 1 + percent / 100.0
+        return self._run(BULK_ADJUST_SALARY, customer_ids, progress,
+                         "UPDATE customer SET salary = ROUND(salary * %s) WHERE idx IN ({ids})", [factor])
+
+    def delete(self, customer_ids, progress=None):
+        return self._run(BULK_DELETE, customer_ids, progress, "DELETE FROM customer WHERE idx IN ({ids})", [])
+
+    def undo(self, record, progress=None):
+        # Returns {'restored', 'skipped'}; skipped rows changed after the action
+        model = self.customer_model
+        rows = record['before']
+        if record['action'] != BULK_DELETE:
+            after = {row['idx']: row for row in record['after']}
+            # Rows the action left as they were need nothing back
+            rows = [row for row in rows if row['idx'] in after and after[row['idx']] != row]
+        if progress is not None:
+            progress.set_total(total_rows=len(rows))
+
+        connection = model._get_connection()
+        if not connection:
+            raise ConnectionError("Tidak dapat terhubung ke database")
+
+        cursor = None
+        restored = 0
+        try:
+            cursor = connection.cursor()
+            for start in range(0, len(rows), self.batch_size):
+                if progress is not None:
+                    progress.check_cancelled()
+                batch = rows[start:start + self.batch_size]
+                if record['action'] == BULK_DELETE:
+                    restored += self._restore_deleted(cursor, batch)
+                else:
+                    params = [
+                        (row['active'], row['salary'], row['idx'],
+                         after[row['idx']]['active'], after[row['idx']]['salary'])
+                        for row in batch
+                    ]
+                    cursor.executemany(RESTORE_UPDATE_SQL, params)
+                    restored += cursor.rowcount
+                if progress is not None:
+                    progress.advance(len(batch))
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        finally:
+            model._release_connection(connection, cursor)
+            if progress is not None:
+                progress.finish()
+
+        if restored:
+            model._notify_change()
+        return {'restored': restored, 'skipped': len(rows) - restored}
+
+    def _run(self, action, customer_ids, progress, statement, values):
+        # Returns the undo record {'action', 'before', 'after', 'affected'}
+        model = self.customer_model
+        ids = list(dict.fromkeys(customer_ids))
+        if progress is not None:
+            progress.set_total(total_rows=len(ids))
+
+        connection = model._get_connection()
+        if not connection:
+            raise ConnectionError("Tidak dapat terhubung ke database")
+
+        cursor = None
+        record = {'action': action, 'before': [], 'after': [], 'affected': 0}
+        try:
+            cursor = connection.cursor()
+            connection.start_transaction()
+            for start in range(0, len(ids), self.batch_size):
+                if progress is not None:
+                    progress.check_cancelled()
+                batch = ids[start:start + self.batch_size]
+                placeholders = ", ".join(["%s"] * len(batch))
+
+                record['before'].extend(self._snapshot(cursor, batch, placeholders))
+                if action == BULK_ADJUST_SALARY:
+                    self._check_salary_range(cursor, batch, placeholders, values[0])
+                cursor.execute(statement.format(ids=placeholders), values + batch)
+                record['affected'] += cursor.rowcount
+                if action != BULK_DELETE:
+                    record['after'].extend(self._snapshot(cursor, batch, placeholders))
+
+                if progress is not None:
+                    progress.advance(len(batch))
+            connection.commit()
+        except BaseException:
+            # Nothing of a cancelled or failed action stays behind
+            connection.rollback()
+            raise
+        finally:
+            model._release_connection(connection, cursor)
+            if progress is not None:
+                progress.finish()
+
+        if record['affected']:
+            model._notify_change()
+        return record
+
+    @staticmethod
+    def _snapshot(cursor, batch, placeholders):
+        cursor.execute(
+            f"SELECT {', '.join(ROW_COLUMNS)} FROM customer WHERE idx IN ({placeholders})",
+            batch
+        )
+        return [
+            dict(zip(ROW_COLUMNS, row[:4] + (int(row[4]), int(row[5]))))
+            for row in cursor.fetchall()
+        ]
+
+    @staticmethod
+    def _check_salary_range(cursor, batch, placeholders, factor):
+        # Caught here with a clear message instead of an overflow (MySQL) or
+        # a silently widened value (SQLite)
+        cursor.execute(
+            f"SELECT COUNT(*) FROM customer WHERE idx IN ({placeholders}) AND ROUND(salary * %s) > %s",
+            batch + [factor, SALARY_MAX]
+        )
+        if cursor.fetchone()[0]:
+            raise ValueError("Gaji hasil penyesuaian melebihi batas maksimum")
+
+    @staticmethod
+    def _restore_deleted(cursor, batch):
+        # An idx taken again since (a replica pull, a manual insert) is skipped
+        placeholders = ", ".join(["%s"] * len(batch))
+        cursor.execute(f"SELECT idx FROM customer WHERE idx IN ({placeholders})", [row['idx'] for row in batch])
+        taken = {row[0] for row in cursor.fetchall()}
+        params = [tuple(row[column] for column in ROW_COLUMNS) for row in batch if row['idx'] not in taken]
+        if params:
+            cursor.executemany(RESTORE_DELETE_SQL, params)
+        return len(params)
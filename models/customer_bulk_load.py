@@ -0,0 +1,265 @@
+import csv
+import io
+import os
+from models.customer import IMPORT_INSERT, IMPORT_MERGE
+from models.customer_csv import CSV_DELIMITER
+from models.customer_import import iter_parsed_ranges
+from utils.progress import TaskCancelled
+
+# Fast load for very large CSV files, all or nothing:
+#
+#   parse + validate (customer_import) --> staging table through the
+#   backend's bulk loader (LOAD DATA LOCAL INFILE on MySQL) --> set-based
+#   checks against the customer column limits --> one INSERT ... SELECT,
+#   or an UPDATE + INSERT merge on nik --> one commit
+#
+# Rejected rows never reach customer. They are copied as is, with their row
+# number and reason, to a sidecar CSV next to the input (<name>.errors.csv).
+
+STAGING_TABLE = 'customer_staging'
+STAGING_COLUMNS = ('row_no', 'nik', 'name', 'born', 'active', 'salary')
+
+# Wider than customer, so overlong values arrive intact and are rejected
+# by the checks below instead of being cut short by the loader
+STAGING_DDL = {
+    'mysql': ["""
+    CREATE TEMPORARY TABLE customer_staging (
+        row_no BIGINT NOT NULL PRIMARY KEY,
+        nik VARCHAR(255) NOT NULL,
+        name TEXT NOT NULL,
+        born DATE NULL,
+        active BIGINT NOT NULL,
+        salary BIGINT NOT NULL,
+        INDEX idx_customer_staging_nik (nik)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """],
+    'sqlite': ["""
+    CREATE TEMP TABLE customer_staging (
+        row_no INTEGER PRIMARY KEY,
+        nik TEXT NOT NULL,
+        name TEXT NOT NULL,
+        born DATE NULL,
+        active INTEGER NOT NULL,
+        salary INTEGER NOT NULL
+    )
+    """, "CREATE INDEX temp.idx_customer_staging_nik ON customer_staging (nik)"],
+}
+
+DROP_STAGING_SQL = {
+    'mysql': ["DROP TEMPORARY TABLE IF EXISTS customer_staging",
+              "DROP TEMPORARY TABLE IF EXISTS customer_staging_last"],
+    'sqlite': ["DROP TABLE IF EXISTS temp.customer_staging"],
+}
+
+LENGTH_FUNCTION = {'mysql': 'CHAR_LENGTH', 'sqlite': 'LENGTH'}
+
+# (condition, reason) in the order they are reported
+REJECT_CHECKS = [
+    ("{length}(nik) > 6", "NIK lebih dari 6 karakter"),
+    ("{length}(name) > 50", "Nama lebih dari 50 karakter"),
+    ("active NOT BETWEEN -128 AND 127", "Nilai active di luar jangkauan"),
+    ("salary NOT BETWEEN -2147483648 AND 2147483647", "Nilai salary di luar jangkauan"),
+]
+
+# Merge: keep the last row of each nik repeated in the file
+DEDUPLICATE_STAGING_SQL = {
+    'mysql': [
+        "CREATE TEMPORARY TABLE customer_staging_last (row_no BIGINT NOT NULL PRIMARY KEY) ENGINE=InnoDB",
+        "INSERT INTO customer_staging_last SELECT MAX(row_no) FROM customer_staging GROUP BY nik",
+        """DELETE s FROM customer_staging s
+        LEFT JOIN customer_staging_last l ON l.row_no = s.row_no
+        WHERE l.row_no IS NULL""",
+    ],
+    'sqlite': [
+        "DELETE FROM customer_staging WHERE row_no NOT IN (SELECT MAX(row_no) FROM customer_staging GROUP BY nik)",
+    ],
+}
+
+# Merge: only rows whose content differs are written
+UPDATE_FROM_STAGING_SQL = {
+    'mysql': """
+    UPDATE customer c
+    JOIN customer_staging s ON s.nik = c.nik
+    SET c.name = s.name, c.born = s.born, c.active = s.active, c.salary = s.salary
+    WHERE NOT (BINARY c.name <=> BINARY s.name AND c.born <=> s.born
+               AND c.active <=> s.active AND c.salary <=> s.salary)
+    """,
+    'sqlite': """
+    UPDATE customer
+    SET (name, born, active, salary) = (
+        SELECT s.name, s.born, s.active, s.salary FROM customer_staging s WHERE s.nik = customer.nik
+    )
+    WHERE EXISTS (
+        SELECT 1 FROM customer_staging s
+        WHERE s.nik = customer.nik
+          AND NOT (s.name IS customer.name AND s.born IS customer.born
+                   AND s.active IS customer.active AND s.salary IS customer.salary)
+    )
+    """,
+}
+
+INSERT_FROM_STAGING_SQL = """
+INSERT INTO customer (nik, name, born, active, salary)
+SELECT s.nik, s.name, s.born, s.active, s.salary
+FROM customer_staging s {where}
+ORDER BY s.row_no
+"""
+
+BIGINT_MIN = -2 ** 63
+BIGINT_MAX = 2 ** 63 - 1
+
+
+def error_file_path(file_path):
+    return f"{os.path.splitext(file_path)[0]}.errors.csv"
+
+
+def write_rejected_rows(file_path, error_path, errors):
+    # errors: [(row_number, message)]. Each rejected line of the input is
+    # copied byte for byte after its row number and reason, so the file can
+    # be fixed up and uploaded again.
+    reasons = dict(errors)
+    with open(file_path, 'rb') as source, open(error_path, 'wb') as target:
+        header = source.readline().rstrip(b'\r\n')
+        target.write(b'row' + CSV_DELIMITER.encode() + b'error' + CSV_DELIMITER.encode() + header + b'\n')
+        remaining = len(reasons)
+        for row_number, line in enumerate(source, start=2):
+            if not remaining:
+                break
+            message = reasons.get(row_number)
+            if message is None:
+                continue
+            prefix = io.StringIO()
+            csv.writer(prefix, delimiter=CSV_DELIMITER, lineterminator=CSV_DELIMITER).writerow([row_number, message])
+            target.write(prefix.getvalue().encode('utf-8') + line.rstrip(b'\r\n') + b'\n')
+            remaining -= 1
+
+
+class FastLoader:
+    def __init__(self, customer_model, parse_workers=1, engine='csv', mode=IMPORT_INSERT):
+        self.customer_model = customer_model
+        self.parse_workers = parse_workers or max((os.cpu_count() or 2) - 1, 1)
+        self.engine = engine
+        self.mode = mode
+
+    def run(self, file_path, progress=None):
+        # Same result shape as Customer.import_customers plus 'error_file'
+        # (None when every row went in). Errors are in the file, not the list.
+        result = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'failed': 0, 'errors': [],
+                  'cancelled': False, 'error_file': None}
+        model = self.customer_model
+        dialect = model.backend.dialect
+        errors = []
+        totals = {'rows': 0}
+
+        if progress is not None:
+            progress.set_total(total_bytes=os.path.getsize(file_path))
+
+        # The backend's bulk load connection: the only one LOAD DATA LOCAL may run on
+        connection = model.backend.get_bulk_load_connection()
+        if not connection:
+            raise ConnectionError("Tidak dapat terhubung ke database")
+
+        cursor = None
+        staging_rows = self._staging_rows(file_path, progress, errors, totals)
+        try:
+            cursor = connection.cursor()
+            self._execute_all(cursor, DROP_STAGING_SQL[dialect] + STAGING_DDL[dialect])
+            model.backend.bulk_load(connection, cursor, STAGING_TABLE, STAGING_COLUMNS, staging_rows)
+            errors.extend(self._reject_invalid(cursor, dialect))
+            counts = self._merge(cursor, dialect)
+            connection.commit()
+        except TaskCancelled:
+            connection.rollback()
+            result['cancelled'] = True
+            return result
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            staging_rows.close()
+            if cursor is not None:
+                try:
+                    self._execute_all(cursor, DROP_STAGING_SQL[dialect])
+                except Exception as e:
+                    print(f"Error dropping staging table: {e}")
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+            model.backend.release_bulk_load_connection(connection)
+            if progress is not None:
+                progress.finish()
+
+        if counts['inserted'] or counts['updated']:
+            model._notify_change()
+
+        result.update(counts)
+        result['failed'] = totals['rows'] - sum(counts.values())
+        error_path = error_file_path(file_path)
+        if errors:
+            errors.sort(key=lambda error: error[0])
+            write_rejected_rows(file_path, error_path, errors)
+            result['error_file'] = error_path
+        elif os.path.exists(error_path):
+            # Left over from an earlier load of the same file
+            os.remove(error_path)
+        return result
+
+    def _staging_rows(self, file_path, progress, errors, totals):
+        # Validated rows as staging tuples; parse errors are collected on the side
+        for _, row_count, records, range_errors, range_end in iter_parsed_ranges(
+                file_path, self.parse_workers, engine=self.engine):
+            if progress is not None:
+                progress.check_cancelled()
+            errors.extend(range_errors)
+            totals['rows'] += row_count
+            for row_number, (nik, name, born, active, salary) in records:
+                # Anything past BIGINT is out of range either way; the
+                # salary/active checks reject it
+                yield (row_number, nik, name, born,
+                       min(max(active, BIGINT_MIN), BIGINT_MAX),
+                       min(max(salary, BIGINT_MIN), BIGINT_MAX))
+            if progress is not None:
+                progress.advance(row_count, bytes_done=range_end)
+
+    @staticmethod
+    def _execute_all(cursor, statements):
+        for statement in statements:
+            cursor.execute(statement)
+
+    @staticmethod
+    def _reject_invalid(cursor, dialect):
+        # Set-based: one SELECT reports every offending row, one DELETE drops them
+        conditions = [condition.format(length=LENGTH_FUNCTION[dialect]) for condition, _ in REJECT_CHECKS]
+        cases = " ".join(f"WHEN {condition} THEN {number}" for number, condition in enumerate(conditions))
+        where = " OR ".join(conditions)
+
+        cursor.execute(f"SELECT row_no, CASE {cases} END FROM customer_staging WHERE {where}")
+        rejected = [
+            (row_number, f"Row {row_number}: {REJECT_CHECKS[check][1]}")
+            for row_number, check in cursor.fetchall()
+        ]
+        if rejected:
+            cursor.execute(f"DELETE FROM customer_staging WHERE {where}")
+        return rejected
+
+    def _merge(self, cursor, dialect):
+        if self.mode != IMPORT_MERGE:
+            cursor.execute(INSERT_FROM_STAGING_SQL.format(where=""))
+            return {'inserted': cursor.rowcount, 'updated': 0, 'unchanged': 0}
+
+        self._execute_all(cursor, DEDUPLICATE_STAGING_SQL[dialect])
+        superseded = cursor.rowcount
+        cursor.execute("SELECT COUNT(*) FROM customer_staging")
+        staged = cursor.fetchone()[0]
+
+        cursor.execute(UPDATE_FROM_STAGING_SQL[dialect])
+        updated = cursor.rowcount
+        cursor.execute(INSERT_FROM_STAGING_SQL.format(
+            where="WHERE NOT EXISTS (SELECT 1 FROM customer c WHERE c.nik = s.nik)"
+        ))
+        inserted = cursor.rowcount
+        # Earlier rows of a repeated nik are counted as unchanged: the last
+        # row carries the nik's content
+        unchanged = max(staged - inserted - updated, 0) + superseded
+        return {'inserted': inserted, 'updated': updated, 'unchanged': unchanged}
@@ -0,0 +1,205 @@
+import csv
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+from config.database import DatabaseConfig
+from models.customer_csv import CSV_DELIMITER
+from models.customer_export import export_format_for_path, open_text_output
+from utils.progress import TaskCancelled
+
+# Incremental export of what changed since the previous run:
+#   insert  rows with an idx above the highest one the last run saw
+#   update  older rows whose updated_at moved past the watermark
+#   delete  customer_tombstone entries (idx and deletion time only)
+#
+# Watermarks are (updated_at, idx) of the last row and of the last tombstone
+# exported, plus that highest idx. They are kept per database in a local
+# JSON file and only advance once the export file is complete. Changes
+# younger than the settle window are left for the next run, so a transaction
+# still committing with an earlier timestamp is not skipped.
+#
+#   python -m models.customer_change_feed changes.csv     (.csv.gz / .csv.zst)
+#
+# With a local replica, the feed reads the server.
+
+CHANGE_FEED_HEADER = ['op', 'idx', 'nik', 'name', 'born', 'active', 'salary', 'changed_at']
+CHANGE_FEED_FORMATS = ('csv', 'csv.gz', 'csv.zst')
+
+CHANGED_ROWS_SQL = """
+SELECT idx, nik, name, born, active, salary, updated_at FROM customer
+WHERE {after} updated_at < %s
+ORDER BY updated_at, idx
+LIMIT %s
+"""
+
+TOMBSTONES_SQL = """
+SELECT idx, deleted_at FROM customer_tombstone
+WHERE {after} deleted_at < %s
+ORDER BY deleted_at, idx
+LIMIT %s
+"""
+
+
+def _version_text(value):
+    # Explicit microseconds: SQLite compares versions as text
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.strftime('%Y-%m-%d %H:%M:%S.%f')
+
+
+class ChangeFeed:
+    def __init__(self, backend, config, batch_size=1000):
+        # The server, not the local copy, when running on a replica
+        self.backend = getattr(backend, 'remote', backend)
+        self.config = config
+        self.batch_size = batch_size
+        self.settle = timedelta(seconds=config.change_feed_settle_seconds)
+
+    @property
+    def feed_key(self):
+        path = getattr(self.backend, 'path', None)
+        if path:
+            return f"sqlite:{os.path.abspath(path)}"
+        return f"mysql:{self.config.host}:{self.config.port}/{self.config.database}"
+
+    def get_watermark(self):
+        return self._load_state().get(self.feed_key)
+
+    def reset(self):
+        # The next run exports every row as an insert
+        state = self._load_state()
+        state.pop(self.feed_key, None)
+        self._save_state(state)
+
+    def export(self, file_path, progress=None):
+        # Returns {'inserted', 'updated', 'deleted'}
+        export_format = export_format_for_path(file_path)
+        if export_format not in CHANGE_FEED_FORMATS:
+            raise ValueError(f"Format {export_format} tidak didukung untuk ekspor perubahan")
+
+        watermark = self.get_watermark()
+        counts = {'inserted': 0, 'updated': 0, 'deleted': 0}
+        connection = self.backend.get_connection()
+        cursor = None
+        cancelled = False
+        try:
+            cursor = connection.cursor()
+            cutoff = self._cutoff(cursor)
+            if watermark is None:
+                # First run: every row is new to the consumer and older
+                # deletions mean nothing to it
+                watermark = {'rows': None, 'tombstones': [_version_text(cutoff), 0], 'max_idx': 0}
+            new_watermark = dict(watermark)
+
+            with open(file_path, 'wb') as raw:
+                output = open_text_output(raw, export_format.partition('.')[2] or None)
+                try:
+                    writer = csv.writer(output, delimiter=CSV_DELIMITER)
+                    writer.writerow(CHANGE_FEED_HEADER)
+
+                    max_idx = watermark['max_idx']
+                    for rows in self._walk(cursor, CHANGED_ROWS_SQL, 'updated_at', watermark['rows'], cutoff):
+                        if progress is not None and progress.cancelled:
+                            cancelled = True
+                            break
+                        for idx, nik, name, born, active, salary, updated_at in rows:
+                            op = 'insert' if idx > watermark['max_idx'] else 'update'
+                            counts['inserted' if op == 'insert' else 'updated'] += 1
+                            writer.writerow([op, idx, nik, name, born, active, salary, _version_text(updated_at)])
+                            max_idx = max(max_idx, idx)
+                        new_watermark['rows'] = [_version_text(rows[-1][6]), rows[-1][0]]
+                        if progress is not None:
+                            progress.advance(len(rows))
+                    new_watermark['max_idx'] = max_idx
+
+                    for rows in self._walk(cursor, TOMBSTONES_SQL, 'deleted_at', watermark['tombstones'], cutoff):
+                        if cancelled or (progress is not None and progress.cancelled):
+                            cancelled = True
+                            break
+                        for idx, deleted_at in rows:
+                            writer.writerow(['delete', idx, '', '', '', '', '', _version_text(deleted_at)])
+                        counts['deleted'] += len(rows)
+                        new_watermark['tombstones'] = [_version_text(rows[-1][1]), rows[-1][0]]
+                        if progress is not None:
+                            progress.advance(len(rows))
+                finally:
+                    output.close()
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self.backend.release_connection(connection)
+            if progress is not None:
+                progress.finish()
+
+        if cancelled:
+            # The watermark stays put; the next run exports these changes again
+            os.remove(file_path)
+            raise TaskCancelled()
+
+        state = self._load_state()
+        state[self.feed_key] = new_watermark
+        self._save_state(state)
+        return counts
+
+    def _cutoff(self, cursor):
+        # Database time, so the client clock does not matter
+        cursor.execute(f"SELECT {self.backend.now_sql}")
+        now = cursor.fetchone()[0]
+        if isinstance(now, str):
+            now = datetime.fromisoformat(now)
+        return now - self.settle
+
+    def _walk(self, cursor, query, version_column, after, cutoff):
+        # Keyset pages over (version, idx), strictly after the watermark
+        cutoff = _version_text(cutoff)
+        last_key = after
+        while True:
+            if last_key is not None:
+                condition = f"({version_column} > %s OR ({version_column} = %s AND idx > %s)) AND"
+                params = [last_key[0], last_key[0], last_key[1], cutoff, self.batch_size]
+            else:
+                condition = ""
+                params = [cutoff, self.batch_size]
+            cursor.execute(query.format(after=condition), params)
+            rows = cursor.fetchall()
+            if not rows:
+                return
+            yield rows
+            last_key = (_version_text(rows[-1][-1]), rows[-1][0])
+            if len(rows) < self.batch_size:
+                return
+
+    def _load_state(self):
+        try:
+            with open(self.config.change_feed_state_path, 'r', encoding='utf-8') as state_file:
+                return json.load(state_file)
+        except FileNotFoundError:
+            return {}
+
+    def _save_state(self, state):
+        # Written aside and renamed, so a crash never leaves half a file
+        path = self.config.change_feed_state_path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as state_file:
+            json.dump(state, state_file, indent=2)
+        os.replace(temp_path, path)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print("Usage: python -m models.customer_change_feed <output.csv|.csv.gz|.csv.zst>")
+        return 2
+
+    config = DatabaseConfig()
+    counts = ChangeFeed(config.get_backend(), config).export(argv[0])
+    print(f"Exported {counts['inserted']} inserts, {counts['updated']} updates, {counts['deleted']} deletes")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,114 @@
+import csv
+import io
+import os
+from datetime import datetime
+from itertools import islice
+
+CSV_DELIMITER = ';'
+CSV_HEADER = ['idx', 'nik', 'name', 'born', 'active', 'salary']
+
+
+def iter_csv_rows(file_path, progress=None, progress_every=1000):
+    # Stream (row_number, row) pairs; row 1 is the header
+    if progress is not None:
+        progress.set_total(total_bytes=os.path.getsize(file_path))
+
+    with open(file_path, 'r', encoding='utf-8') as csvfile:
+        reader = csv.reader(csvfile, delimiter=CSV_DELIMITER)
+        next(reader, None)
+        for row_number, row in enumerate(reader, start=2):
+            if progress is not None and row_number % progress_every == 0:
+                # Text-mode tell() is off while iterating; the byte buffer's
+                # position is within one read-ahead block, close enough here
+                progress.advance(bytes_done=csvfile.buffer.tell())
+            yield row_number, row
+
+        if progress is not None:
+            progress.advance(bytes_done=csvfile.buffer.tell())
+
+
+def iter_chunks(iterable, chunk_size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_customer_row(row):
+    nik = row[0]
+    name = row[1]
+    born = datetime.strptime(row[2], "%Y-%m-%d").date() if row[2] else None
+    active = int(row[3]) if row[3] else 0
+    salary = int(row[4]) if row[4] else 0
+    return nik, name, born, active, salary
+
+
+def validate_row(row):
+    # Returns (record, None) or (None, error detail)
+    if len(row) < 5:
+        return None, "invalid row length"
+    try:
+        return parse_customer_row(row), None
+    except ValueError as ve:
+        return None, f"Value error - {str(ve)}"
+    except Exception as e:
+        return None, f"Unexpected error - {e}"
+
+
+def validate_rows(rows):
+    # Returns ([(row_number, record)], [(row_number, message)])
+    records = []
+    errors = []
+    for row_number, row in rows:
+        record, detail = validate_row(row)
+        if detail is None:
+            records.append((row_number, record))
+        else:
+            errors.append((row_number, f"Row {row_number}: {detail}"))
+    return records, errors
+
+
+def record_values(records):
+    # The record tuples of [(row_number, record)], or of the numpy engine's
+    # RecordColumns, which builds them only now
+    return [record for _, record in records] if isinstance(records, list) else records.values()
+
+
+def split_csv_ranges(file_path, chunk_bytes):
+    # Byte ranges covering the data rows, each ending on a line boundary.
+    # A quoted field with an embedded newline must not straddle a boundary,
+    # which holds for the files this app writes and reads.
+    size = os.path.getsize(file_path)
+    ranges = []
+    with open(file_path, 'rb') as csvfile:
+        csvfile.readline()
+        start = csvfile.tell()
+        while start < size:
+            csvfile.seek(min(start + chunk_bytes, size))
+            csvfile.readline()
+            end = csvfile.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def parse_csv_range(file_path, start, end):
+    # Runs in a worker process. Row positions are local to the range (0 for
+    # its first row) because the range does not know its row number yet.
+    # Returns (row_count, [(position, record)], [(position, error detail)])
+    with open(file_path, 'rb') as csvfile:
+        csvfile.seek(start)
+        text = csvfile.read(end - start).decode('utf-8')
+
+    records = []
+    errors = []
+    position = -1
+    for position, row in enumerate(csv.reader(io.StringIO(text, newline=''), delimiter=CSV_DELIMITER)):
+        record, detail = validate_row(row)
+        if detail is None:
+            records.append((position, record))
+        else:
+            errors.append((position, detail))
+    return position + 1, records, errors
@@ -0,0 +1,272 @@
+import csv
+import io
+import mmap
+import numpy as np
+from models.customer_csv import CSV_DELIMITER, validate_row
+
+# Vectorized parse engine for import files (nik;name;born;active;salary).
+# A block of complete lines is split into fields with NumPy, and born,
+# active and salary are converted column-wise. Only rows in the plain shape
+# are handled here: five fields, no quotes, born empty or YYYY-MM-DD, active
+# and salary empty or ASCII digits. Every other row (bad dates, short rows,
+# quoted names, signs, whitespace...) is handed to validate_row one line at
+# a time, so records and error messages match the csv.reader loop exactly.
+#
+# The block is read in place (np.frombuffer over the mapped file) and the
+# validated records stay columns (RecordColumns) all the way to the writer,
+# which builds the record tuples only for executemany.
+#
+# Needs numpy; callers import this module lazily and fall back to the csv
+# engine without it.
+
+NEWLINE = ord('\n')
+CARRIAGE_RETURN = ord('\r')
+QUOTE = ord('"')
+DELIMITER = ord(CSV_DELIMITER)
+ZERO = ord('0')
+DASH = ord('-')
+MAX_INT_DIGITS = 18  # always fits in int64
+DATE_DIGITS = np.array([0, 1, 2, 3, 5, 6, 8, 9])
+DAYS_IN_MONTH = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
+class RecordColumns:
+    # Validated records of a block, column by column: row numbers as int64,
+    # nik and name as lists of str, born as datetime64[D] (NaT when empty),
+    # active and salary as int64 (object when a slow-path value does not
+    # fit). Iterating yields the csv engine's (row, record) pairs; values()
+    # builds just the record tuples.
+    __slots__ = ('rows', 'niks', 'names', 'borns', 'actives', 'salaries')
+
+    def __init__(self, rows, niks, names, borns, actives, salaries):
+        self.rows = rows
+        self.niks = niks
+        self.names = names
+        self.borns = borns
+        self.actives = actives
+        self.salaries = salaries
+
+    @classmethod
+    def from_records(cls, records):
+        # [(row, (nik, name, born, active, salary))] -> columns
+        niks, names, borns, actives, salaries = list(zip(*(record for _, record in records))) or [()] * 5
+        return cls(
+            np.array([row for row, _ in records], dtype=np.int64), list(niks), list(names),
+            np.array(borns, dtype='datetime64[D]'), _int_column(actives), _int_column(salaries)
+        )
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return zip(self.rows.tolist(), self.values())
+
+    def __getitem__(self, index):
+        # Slices only: a batch is a run of consecutive rows
+        return RecordColumns(self.rows[index], self.niks[index], self.names[index],
+                             self.borns[index], self.actives[index], self.salaries[index])
+
+    def __add__(self, other):
+        return RecordColumns(
+            np.concatenate((self.rows, other.rows)), self.niks + other.niks, self.names + other.names,
+            np.concatenate((self.borns, other.borns)), np.concatenate((self.actives, other.actives)),
+            np.concatenate((self.salaries, other.salaries))
+        )
+
+    def sorted(self):
+        order = np.argsort(self.rows, kind='stable')
+        positions = order.tolist()
+        return RecordColumns(self.rows[order], [self.niks[i] for i in positions], [self.names[i] for i in positions],
+                             self.borns[order], self.actives[order], self.salaries[order])
+
+    def values(self):
+        # (nik, name, born, active, salary) tuples, as executemany takes them
+        return list(zip(self.niks, self.names, self.borns.tolist(), self.actives.tolist(), self.salaries.tolist()))
+
+
+def parse_csv_range_numpy(file_path, start, end):
+    # Same contract as customer_csv.parse_csv_range, for the process pool
+    with open(file_path, 'rb') as csvfile:
+        with mmap.mmap(csvfile.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return parse_mapped_range(mapped, start, end)
+
+
+def parse_mapped_range(mapped, start, end, first_row=0):
+    # Parses mapped[start:end] without copying it out of the mapping first
+    try:
+        return parse_csv_bytes(np.frombuffer(mapped, dtype=np.uint8, count=end - start, offset=start), first_row)
+    except Exception as e:
+        # The traceback's frames hold views of the mapping, which could then
+        # not be closed
+        raise e.with_traceback(None)
+
+
+def parse_csv_bytes(data, first_row=0):
+    # data (any buffer) holds complete lines. Returns (row_count,
+    # RecordColumns, [(row, error detail)]) with rows numbered from first_row.
+    buf = np.frombuffer(data, dtype=np.uint8)
+    if not len(buf):
+        return 0, RecordColumns.from_records([]), []
+
+    ascii_only = int(buf.max()) < 0x80
+    if not ascii_only:
+        # Fail on bad UTF-8 the way reading the file as text does
+        str(buf, 'utf-8')
+
+    ends = np.flatnonzero(buf == NEWLINE)
+    if not len(ends) or ends[-1] != len(buf) - 1:
+        ends = np.append(ends, len(buf))
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    row_count = len(starts)
+
+    # Text mode reads "\r\n" as one line break; a lone "\r" also splits a
+    # line, which only the csv engine reproduces
+    content_ends = ends.copy()
+    returns = np.flatnonzero(buf == CARRIAGE_RETURN)
+    if len(returns):
+        followed = returns + 1 < len(buf)
+        if not followed.all() or (buf[returns[followed] + 1] != NEWLINE).any():
+            return _parse_with_csv(buf, first_row)
+        content_ends[np.searchsorted(ends, returns)] -= 1
+
+    plain = np.ones(row_count, dtype=bool)
+    quotes = np.flatnonzero(buf == QUOTE)
+    if len(quotes):
+        quote_counts = _count_between(quotes, starts, content_ends)
+        if (quote_counts % 2).any():
+            # A quoted field may run over a line break
+            return _parse_with_csv(buf, first_row)
+        plain &= quote_counts == 0
+
+    delimiters = np.flatnonzero(buf == DELIMITER)
+    first_delimiter = np.searchsorted(delimiters, starts)
+    plain &= _count_between(delimiters, starts, content_ends) == 4
+
+    lines = np.flatnonzero(plain)
+    fields = delimiters[first_delimiter[lines][:, None] + np.arange(4)] if len(lines) else np.empty((0, 4), np.int64)
+    line_starts = starts[lines]
+    line_ends = content_ends[lines]
+
+    borns, born_ok = _parse_dates(buf, fields[:, 1] + 1, fields[:, 2])
+    actives, active_ok = _parse_ints(buf, fields[:, 2] + 1, fields[:, 3])
+    salaries, salary_ok = _parse_ints(buf, fields[:, 3] + 1, line_ends)
+    ok = born_ok & active_ok & salary_ok
+
+    good = lines[ok]
+    niks, names = _split_text_fields(buf, line_starts[ok], fields[ok], ascii_only)
+    records = RecordColumns(good + first_row, niks, names, borns[ok], actives[ok], salaries[ok])
+
+    # Everything else goes through the row-at-a-time validation
+    slow = np.ones(row_count, dtype=bool)
+    slow[good] = False
+    slow_records = []
+    errors = []
+    for line in np.flatnonzero(slow).tolist():
+        line_text = str(buf[starts[line]:content_ends[line]], 'utf-8')
+        row = next(csv.reader([line_text], delimiter=CSV_DELIMITER), [])
+        record, detail = validate_row(row)
+        if detail is None:
+            slow_records.append((first_row + line, record))
+        else:
+            errors.append((first_row + line, detail))
+
+    if slow_records:
+        records = (records + RecordColumns.from_records(slow_records)).sorted()
+    return row_count, records, errors
+
+
+def _parse_with_csv(buf, first_row):
+    records = []
+    errors = []
+    row_count = 0
+    # Universal newlines, as when the file is opened in text mode
+    text = io.StringIO(str(buf, 'utf-8'), newline=None)
+    for position, row in enumerate(csv.reader(text, delimiter=CSV_DELIMITER)):
+        record, detail = validate_row(row)
+        if detail is None:
+            records.append((first_row + position, record))
+        else:
+            errors.append((first_row + position, detail))
+        row_count = position + 1
+    return row_count, RecordColumns.from_records(records), errors
+
+
+def _int_column(values):
+    # Slow-path ints are unbounded Python ints
+    try:
+        return np.array(values, dtype=np.int64)
+    except OverflowError:
+        return np.array(values, dtype=object)
+
+
+def _count_between(positions, starts, ends):
+    # How many of the sorted positions fall in [start, end) for each line
+    return np.searchsorted(positions, ends) - np.searchsorted(positions, starts)
+
+
+def _parse_dates(buf, starts, ends):
+    # Empty -> None; exactly YYYY-MM-DD with a real calendar date -> date
+    lengths = ends - starts
+    dates = np.full(len(starts), np.datetime64('NaT'), dtype='datetime64[D]')
+    ok = lengths == 0
+
+    full = np.flatnonzero(lengths == 10)
+    if len(full):
+        chars = buf[starts[full][:, None] + np.arange(10)]
+        digits = chars[:, DATE_DIGITS].astype(np.int64) - ZERO
+        shaped = ((digits >= 0) & (digits <= 9)).all(axis=1)
+        shaped &= (chars[:, 4] == DASH) & (chars[:, 7] == DASH)
+
+        year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+        month = digits[:, 4] * 10 + digits[:, 5]
+        day = digits[:, 6] * 10 + digits[:, 7]
+        month_ok = (month >= 1) & (month <= 12)
+        leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+        month_days = DAYS_IN_MONTH[np.where(month_ok, month, 0)] + (leap & (month == 2))
+        valid = shaped & (year >= 1) & month_ok & (day >= 1) & (day <= month_days)
+
+        valid_rows = full[valid]
+        months = (year[valid] - 1970) * 12 + month[valid] - 1
+        dates[valid_rows] = months.astype('datetime64[M]').astype('datetime64[D]') + (day[valid] - 1)
+        ok[valid_rows] = True
+    return dates, ok
+
+
+def _parse_ints(buf, starts, ends):
+    # Empty -> 0; 1-18 ASCII digits -> int. Signs, spaces and anything
+    # else int() might still accept are left to the slow path.
+    lengths = ends - starts
+    values = np.zeros(len(starts), dtype=np.int64)
+    ok = lengths == 0
+
+    numeric = np.flatnonzero((lengths > 0) & (lengths <= MAX_INT_DIGITS))
+    if len(numeric):
+        numeric_lengths = lengths[numeric]
+        width = int(numeric_lengths.max())
+        # Right-aligned: column k is the 10**k digit
+        place = np.arange(width)
+        present = place < numeric_lengths[:, None]
+        positions = np.maximum(ends[numeric][:, None] - 1 - place, 0)
+        digits = buf[positions].astype(np.int64) - ZERO
+        digits[~present] = 0
+        digits_ok = ((digits >= 0) & (digits <= 9)).all(axis=1)
+        values[numeric] = digits @ (10 ** place)
+        ok[numeric[digits_ok]] = True
+    return values, ok
+
+
+def _split_text_fields(buf, starts, fields, ascii_only):
+    # nik and name of every line from one decode + split: gather each
+    # line's "nik;name;" bytes, turn both delimiters into newlines (neither
+    # field can hold one) and let str.split cut them apart
+    if not len(starts):
+        return [], []
+    lengths = fields[:, 1] + 1 - starts
+    offsets = np.cumsum(lengths) - lengths
+    keep = np.arange(int(lengths.sum())) + np.repeat(starts - offsets, lengths)
+
+    text_bytes = buf[keep]
+    text_bytes[offsets + (fields[:, 0] - starts)] = NEWLINE
+    text_bytes[offsets + lengths - 1] = NEWLINE
+    pieces = text_bytes.tobytes().decode('ascii' if ascii_only else 'utf-8').split('\n')
+    return pieces[0:-1:2], pieces[1::2]
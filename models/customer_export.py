@@ -0,0 +1,193 @@
+import csv
+import gzip
+import io
+import os
+from models.customer_csv import CSV_DELIMITER, CSV_HEADER
+from utils.progress import TaskCancelled
+
+# Export formats, picked from the file name by export_format_for_path:
+#   csv        semicolon CSV, what upload_csv reads back
+#   csv.gz     the same, gzip-compressed
+#   csv.zst    the same, zstd-compressed (needs zstandard)
+#   arrow      Arrow IPC file (needs pyarrow)
+#   parquet    Parquet, zstd-compressed column chunks (needs pyarrow)
+# Every writer streams: rows are fetched and written batch by batch, and the
+# columnar ones hold at most one row group in memory.
+
+EXPORT_FORMATS = ['csv', 'csv.gz', 'csv.zst', 'arrow', 'parquet']
+EXPORT_EXTENSIONS = {
+    'csv': '.csv',
+    'csv.gz': '.csv.gz',
+    'csv.zst': '.csv.zst',
+    'arrow': '.arrow',
+    'parquet': '.parquet',
+}
+# Rows per Parquet row group / Arrow record batch
+COLUMNAR_GROUP_ROWS = 65536
+
+
+def _module_available(name):
+    try:
+        __import__(name)
+        return True
+    except ImportError:
+        return False
+
+
+def available_export_formats():
+    needs = {'csv.zst': 'zstandard', 'arrow': 'pyarrow', 'parquet': 'pyarrow'}
+    return [fmt for fmt in EXPORT_FORMATS if fmt not in needs or _module_available(needs[fmt])]
+
+
+def export_format_for_path(file_path):
+    name = file_path.lower()
+    # Longest extension first, so .csv.gz is not taken for .gz
+    for fmt, extension in sorted(EXPORT_EXTENSIONS.items(), key=lambda item: -len(item[1])):
+        if name.endswith(extension):
+            return fmt
+    if name.endswith(('.feather', '.ipc')):
+        return 'arrow'
+    return 'csv'
+
+
+def export_customers(customer_model, file_path, export_format=None, progress=None, batch_size=1000):
+    export_format = export_format or export_format_for_path(file_path)
+    return write_export(customer_model.iter_customer_batches(batch_size), file_path, export_format, progress)
+
+
+def export_customers_csv(customer_model, file_path, progress=None, batch_size=1000):
+    return export_customers(customer_model, file_path, 'csv', progress, batch_size)
+
+
+def write_export(batches, file_path, export_format, progress=None, header=True):
+    # batches: iterable of row lists (idx, nik, name, born, active, salary).
+    # header=False leaves out the CSV header line, for parts of a larger file.
+    if export_format in ('arrow', 'parquet'):
+        writer = _columnar_writer(export_format)
+    else:
+        writer = _csv_writer(export_format.partition('.')[2] or None, header)
+    return _export(batches, file_path, progress, *writer)
+
+
+def _csv_writer(compression, header):
+    # compression: None, 'gz' or 'zst'
+    def open_output(raw):
+        csvfile = open_text_output(raw, compression)
+        writer = csv.writer(csvfile, delimiter=CSV_DELIMITER)
+        if header:
+            writer.writerow(CSV_HEADER)
+        return {'file': csvfile, 'writer': writer}
+
+    def write(output, rows):
+        output['writer'].writerows(rows)
+
+    def flush(output):
+        # Uncompressed: push the text layer down so the file position is the
+        # byte count. Compressed streams report what reached the file so far;
+        # flushing them every batch would cost compression ratio.
+        if compression is None:
+            output['file'].flush()
+
+    def close(output):
+        # Writes the compression trailer; the file itself stays with _export
+        output['file'].close()
+
+    return open_output, write, flush, close
+
+
+def _columnar_writer(export_format):
+    import pyarrow as pa
+
+    schema = customer_arrow_schema()
+
+    def open_output(raw):
+        if export_format == 'parquet':
+            import pyarrow.parquet as pq
+            writer = pq.ParquetWriter(raw, schema, compression='zstd')
+        else:
+            writer = pa.ipc.new_file(raw, schema)
+        return {'writer': writer, 'pending': [], 'pending_rows': 0}
+
+    def write(output, rows):
+        # Column arrays straight from the fetch batch
+        columns = list(zip(*rows))
+        output['pending'].append(pa.record_batch(
+            [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+            schema=schema
+        ))
+        output['pending_rows'] += len(rows)
+        if output['pending_rows'] >= COLUMNAR_GROUP_ROWS:
+            write_pending(output)
+
+    def write_pending(output):
+        if output['pending']:
+            # One row group (Parquet) or record batch (Arrow) per flush
+            table = pa.Table.from_batches(output['pending'], schema=schema)
+            output['writer'].write_table(table.combine_chunks())
+            output['pending'] = []
+            output['pending_rows'] = 0
+
+    def close(output):
+        write_pending(output)
+        output['writer'].close()
+
+    return open_output, write, None, close
+
+
+def customer_arrow_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ('idx', pa.int32()),
+        ('nik', pa.string()),
+        ('name', pa.string()),
+        ('born', pa.date32()),
+        ('active', pa.int8()),
+        ('salary', pa.int32()),
+    ])
+
+
+def open_text_output(raw, compression):
+    if compression == 'gz':
+        stream = gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6)
+    elif compression == 'zst':
+        import zstandard
+        stream = zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+    else:
+        stream = raw
+    return io.TextIOWrapper(stream, encoding='utf-8', newline='')
+
+
+def _export(batches, file_path, progress, open_output, write, flush, close):
+    row_count = 0
+    cancelled = False
+
+    try:
+        with open(file_path, 'wb') as raw:
+            output = open_output(raw)
+            try:
+                for rows in batches:
+                    if progress is not None and progress.cancelled:
+                        # Closing the generator gives up its streaming connection
+                        batches.close()
+                        cancelled = True
+                        break
+
+                    write(output, rows)
+                    row_count += len(rows)
+
+                    if progress is not None:
+                        if flush is not None:
+                            flush(output)
+                        progress.advance(len(rows), raw.tell())
+            finally:
+                close(output)
+    finally:
+        if progress is not None:
+            progress.finish()
+
+    if cancelled:
+        # A partial export is worse than none
+        os.remove(file_path)
+        raise TaskCancelled()
+    return row_count
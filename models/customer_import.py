@@ -0,0 +1,343 @@
+import mmap
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from models.customer import IMPORT_INSERT
+from models.customer_csv import parse_csv_range, split_csv_ranges
+from utils.metrics import metrics
+
+# Pipelined CSV import for large files:
+#
+#   byte ranges --> process pool, or in-process with parse_workers=1
+#                   (parse + validate) --> in-order batching
+#               --> bounded queue --> writer thread(s) (executemany + commit)
+#
+# Ranges are parsed out of order but consumed in file order, so row numbers,
+# batch boundaries and the error list come out exactly as in the serial
+# Customer.import_customers path. Both hand-offs are bounded: at most
+# max_pending_ranges parsed ranges wait in memory, and the producer blocks
+# when queue_size batches are waiting for a writer.
+
+DEFAULT_CHUNK_BYTES = 4 * 1024 * 1024
+
+
+def numpy_available():
+    try:
+        import numpy  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _range_parser(engine):
+    if engine == 'numpy':
+        from models.customer_csv_numpy import parse_csv_range_numpy
+        return parse_csv_range_numpy
+    return parse_csv_range
+
+
+def iter_parsed_ranges(file_path, parse_workers, chunk_bytes=DEFAULT_CHUNK_BYTES,
+                       max_pending_ranges=None, stats=None, engine='csv'):
+    # Yields (first_row, row_count, records, errors, range_end) in file order;
+    # records and errors carry row numbers, errors as ready-made messages.
+    # engine: 'csv' (csv.reader per row) or 'numpy' (customer_csv_numpy).
+    ranges = split_csv_ranges(file_path, chunk_bytes)
+    row_number = 2  # row 1 is the header
+
+    if parse_workers == 1:
+        parsed = _parse_in_process(file_path, ranges, engine)
+        # The parse itself runs in this process
+        span = 'csv.parse'
+    else:
+        parsed = _parse_in_pool(file_path, ranges, parse_workers, max_pending_ranges, engine)
+        # Only the wait for the pool is seen here, not the parse
+        span = 'csv.parse_wait'
+
+    try:
+        for end, numbered, (row_count, records, errors) in _timed_results(parsed, stats, span):
+            if not numbered:
+                if isinstance(records, list):
+                    records = [(row_number + position, record) for position, record in records]
+                else:
+                    # The numpy engine's RecordColumns, fresh from the pool
+                    records.rows += row_number
+                errors = [(row_number + position, detail) for position, detail in errors]
+            yield (
+                row_number, row_count, records,
+                [(row, f"Row {row}: {detail}") for row, detail in errors],
+                end
+            )
+            row_number += row_count
+    finally:
+        parsed.close()
+
+
+def _timed_results(parsed, stats, span):
+    while True:
+        started = time.perf_counter()
+        try:
+            end, numbered, result = next(parsed)
+        except StopIteration:
+            return
+        waited = time.perf_counter() - started
+        metrics.observe(span, waited)
+        if stats is not None:
+            stats.add('parse_wait_time', waited)
+            stats.add('ranges_parsed', 1)
+            stats.add('rows_parsed', result[0])
+        yield end, numbered, result
+
+
+def _parse_in_process(file_path, ranges, engine):
+    # One process: the numpy engine parses the ranges in place in a memory
+    # map and numbers rows itself, skipping the renumbering pass
+    if engine != 'numpy':
+        for start, end in ranges:
+            yield end, False, parse_csv_range(file_path, start, end)
+        return
+
+    from models.customer_csv_numpy import parse_mapped_range
+
+    if not ranges:
+        return
+    row_number = 2
+    with open(file_path, 'rb') as csvfile:
+        with mmap.mmap(csvfile.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for start, end in ranges:
+                result = parse_mapped_range(mapped, start, end, first_row=row_number)
+                row_number += result[0]
+                yield end, True, result
+
+
+def _parse_in_pool(file_path, ranges, parse_workers, max_pending_ranges, engine):
+    parse = _range_parser(engine)
+    max_pending = max_pending_ranges or parse_workers * 2
+
+    # Spawned, not forked: the GUI process has Qt and pool threads running
+    with ProcessPoolExecutor(parse_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        pending = []
+        next_range = 0
+        try:
+            while pending or next_range < len(ranges):
+                while next_range < len(ranges) and len(pending) < max_pending:
+                    start, end = ranges[next_range]
+                    pending.append((end, executor.submit(parse, file_path, start, end)))
+                    next_range += 1
+
+                end, future = pending.pop(0)
+                yield end, False, future.result()
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+
+def _record_rows(records):
+    # Row numbers of [(row, record)], or of the numpy engine's RecordColumns
+    return [row for row, _ in records] if isinstance(records, list) else records.rows
+
+
+class ImportStats:
+    # Counters shared by the producer and the writer threads
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {
+            'ranges_parsed': 0,
+            'rows_parsed': 0,
+            'batches_written': 0,
+            'rows_written': 0,
+            'parse_wait_time': 0.0,   # producer waiting on the process pool
+            'queue_full_waits': 0,    # producer blocked by a full queue (backpressure)
+            'queue_full_time': 0.0,
+            'queue_max_depth': 0,
+            'writer_idle_time': 0.0,  # writers waiting for the next batch
+            'write_time': 0.0,
+        }
+        self.started_at = time.monotonic()
+
+    def add(self, key, value):
+        with self._lock:
+            self._stats[key] += value
+
+    def track_depth(self, depth):
+        with self._lock:
+            self._stats['queue_max_depth'] = max(self._stats['queue_max_depth'], depth)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['elapsed'] = time.monotonic() - self.started_at
+        stats['rows_per_second'] = stats['rows_written'] / stats['elapsed'] if stats['elapsed'] > 0 else 0.0
+        return stats
+
+
+class ParallelImporter:
+    def __init__(self, customer_model, parse_workers=None, writer_workers=1, batch_size=1000,
+                 chunk_bytes=DEFAULT_CHUNK_BYTES, queue_size=8, engine='csv', mode=IMPORT_INSERT):
+        self.customer_model = customer_model
+        self.engine = engine
+        self.mode = mode
+        self.parse_workers = parse_workers or max((os.cpu_count() or 2) - 1, 1)
+        self.writer_workers = writer_workers
+        self.batch_size = batch_size
+        self.chunk_bytes = chunk_bytes
+        self.queue_size = queue_size
+
+    def run(self, file_path, rollback_chunk=False, progress=None):
+        # Same result shape as Customer.import_customers, plus 'metrics'
+        result = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'failed': 0, 'errors': [], 'cancelled': False}
+        stats = ImportStats()
+        batches = queue.Queue(maxsize=self.queue_size)
+        outcomes = []
+        outcomes_lock = threading.Lock()
+        stop = threading.Event()
+
+        if progress is not None:
+            progress.set_total(total_bytes=os.path.getsize(file_path))
+
+        writers = [
+            threading.Thread(
+                target=self._write_batches,
+                args=(batches, rollback_chunk, progress, stats, outcomes, outcomes_lock, stop),
+                name=f"import-writer-{number}", daemon=True
+            )
+            for number in range(self.writer_workers)
+        ]
+        for writer in writers:
+            writer.start()
+
+        produced = self._iter_batches(file_path, progress, stats)
+        try:
+            for batch in produced:
+                if stop.is_set():
+                    # A writer lost its connection; stop reading the file
+                    break
+                if progress is not None and progress.cancelled:
+                    result['cancelled'] = True
+                    break
+                self._put(batches, batch, stats, stop)
+        finally:
+            # Stops the parse pool too when we left early
+            produced.close()
+            for _ in writers:
+                self._put(batches, None, stats, stop, force=True)
+            for writer in writers:
+                writer.join()
+            if progress is not None:
+                progress.finish()
+
+        failures = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+        if failures:
+            raise failures[0]
+
+        # Writers finish batches in any order; report them in file order
+        errors = []
+        for counts, failed, batch_errors in outcomes:
+            for key, count in counts.items():
+                result[key] += count
+            result['failed'] += failed
+            errors.extend(batch_errors)
+        errors.sort(key=lambda error: error[0])
+        result['errors'] = [message for _, message in errors]
+        result['metrics'] = stats.get_stats()
+        return result
+
+    def _iter_batches(self, file_path, progress, stats):
+        # Regroups parsed ranges into batch_size consecutive rows, the same
+        # chunks the serial import would form: (first_row, last_row, records,
+        # errors). Records are sliced, not copied row by row, so the numpy
+        # engine's columns reach the writer as columns.
+        first_row = None
+        records, errors = None, []
+        rows_in_batch = 0
+
+        for range_first, row_count, range_records, range_errors, range_end in iter_parsed_ranges(
+                file_path, self.parse_workers, self.chunk_bytes, stats=stats, engine=self.engine):
+            if progress is not None:
+                progress.advance(bytes_done=range_end)
+
+            record_rows = _record_rows(range_records)
+            record_at = error_at = 0
+            row = range_first
+            range_last = range_first + row_count
+            while row < range_last:
+                if first_row is None:
+                    first_row = row
+                take = min(self.batch_size - rows_in_batch, range_last - row)
+                row += take
+                rows_in_batch += take
+                record_end = bisect_left(record_rows, row, record_at)
+                piece = range_records[record_at:record_end]
+                records = piece if records is None else records + piece
+                record_at = record_end
+                while error_at < len(range_errors) and range_errors[error_at][0] < row:
+                    errors.append(range_errors[error_at])
+                    error_at += 1
+
+                if rows_in_batch == self.batch_size:
+                    yield first_row, row - 1, records, errors
+                    first_row = None
+                    records, errors = None, []
+                    rows_in_batch = 0
+
+        if rows_in_batch:
+            yield first_row, first_row + rows_in_batch - 1, records, errors
+
+    def _put(self, batches, batch, stats, stop, force=False):
+        if batches.full():
+            stats.add('queue_full_waits', 1)
+        waited = time.perf_counter()
+        while True:
+            try:
+                batches.put(batch, timeout=0.5)
+                break
+            except queue.Full:
+                if stop.is_set() and not force:
+                    return
+        stats.add('queue_full_time', time.perf_counter() - waited)
+        stats.track_depth(batches.qsize())
+
+    def _write_batches(self, batches, rollback_chunk, progress, stats, outcomes, outcomes_lock, stop):
+        model = self.customer_model
+        connection = None
+        cursor = None
+        try:
+            connection = model._get_connection()
+            if not connection:
+                raise ConnectionError("Tidak dapat terhubung ke database")
+            cursor = connection.cursor()
+
+            while True:
+                waited = time.perf_counter()
+                batch = batches.get()
+                stats.add('writer_idle_time', time.perf_counter() - waited)
+                if batch is None:
+                    break
+
+                first_row, last_row, records, errors = batch
+                started = time.perf_counter()
+                counts, errors = model._import_chunk(
+                    connection, cursor, records, errors, first_row, last_row, rollback_chunk, self.mode
+                )
+                stats.add('write_time', time.perf_counter() - started)
+                stats.add('batches_written', 1)
+                stats.add('rows_written', counts['inserted'] + counts['updated'])
+
+                row_count = last_row - first_row + 1
+                with outcomes_lock:
+                    outcomes.append((counts, row_count - sum(counts.values()), errors))
+                if progress is not None:
+                    progress.advance(row_count)
+        except Exception as e:
+            with outcomes_lock:
+                outcomes.append(e)
+            stop.set()
+            # Keep draining so the producer is never stuck on a full queue
+            while batches.get() is not None:
+                pass
+        finally:
+            if connection:
+                model._release_connection(connection, cursor)
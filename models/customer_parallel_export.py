@@ -0,0 +1,241 @@
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from models.customer_export import EXPORT_EXTENSIONS, export_format_for_path, write_export
+from utils.progress import TaskCancelled
+
+# Range-partitioned export for big tables:
+#
+#   MIN/MAX(idx) --> `parts` equal idx ranges, highest first
+#               --> `parallelism` threads, each streaming ranges over its own
+#                   pooled connection into one part file per range
+#               --> part files as they are, or merged in range order into one
+#                   file with the same rows, in the same order, as the serial
+#                   export
+#
+# consistent_snapshot: every connection reads the same point in time. Writers
+# are held off (StorageBackend.lock_writes) only while the snapshots start.
+
+
+class ParallelExporter:
+    def __init__(self, customer_model, parallelism=None, parts=None, batch_size=1000,
+                 consistent_snapshot=True, merge=True):
+        self.customer_model = customer_model
+        pool_size = customer_model.get_pool_stats()['max_size']
+        parallelism = parallelism or customer_model.db_config.export_parallelism
+        # One connection per reader, plus one holding the write lock
+        self.parallelism = max(1, min(parallelism, pool_size - 1 if consistent_snapshot else pool_size))
+        self.parts = parts or self.parallelism * 4
+        self.batch_size = batch_size
+        self.consistent_snapshot = consistent_snapshot
+        self.merge = merge
+
+    def run(self, file_path, export_format=None, progress=None):
+        # Returns {'rows': exported rows, 'files': files written}
+        export_format = export_format or export_format_for_path(file_path)
+        part_dir = None
+        part_paths = []
+        connections = []
+        # The target is only ours to remove once the merge has begun writing it
+        writing_target = False
+        try:
+            connections, bounds = self._open_readers()
+            ranges = self._split(bounds)
+
+            if self.merge:
+                # Same directory as the target, so the parts land on its disk
+                part_dir = tempfile.mkdtemp(prefix='.export-', dir=os.path.dirname(os.path.abspath(file_path)))
+                part_paths = [os.path.join(part_dir, f"part-{number:04d}") for number in range(len(ranges))]
+            else:
+                part_paths = [self.part_path(file_path, export_format, number + 1) for number in range(len(ranges))]
+
+            # From here on each reader releases its own connection
+            readers, connections = connections, []
+            counts = self._read_parts(readers, ranges, part_paths, export_format, progress)
+
+            if self.merge:
+                writing_target = True
+                self._merge_parts(part_paths, file_path, export_format)
+                files = [file_path]
+            else:
+                files = []
+                for path, count in zip(part_paths, counts):
+                    if count:
+                        files.append(path)
+                    else:
+                        os.remove(path)
+            return {'rows': sum(counts), 'files': files}
+        except BaseException:
+            # Cancelled or failed: leave nothing half written behind
+            for path in part_paths + ([file_path] if writing_target else []):
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+        finally:
+            for connection in connections:
+                self.customer_model._release_connection(connection)
+            if part_dir is not None:
+                shutil.rmtree(part_dir, ignore_errors=True)
+            if progress is not None:
+                progress.finish()
+
+    @staticmethod
+    def part_path(file_path, export_format, number):
+        # customers.csv.gz -> customers.part-0001.csv.gz
+        extension = EXPORT_EXTENSIONS[export_format]
+        root = file_path[:-len(extension)] if file_path.lower().endswith(extension) else file_path
+        return f"{root}.part-{number:04d}{extension}"
+
+    def _open_readers(self):
+        model = self.customer_model
+        backend = model.backend
+        connections = []
+        lock_connection = None
+        try:
+            # Everything is checked out before the lock is taken, so writers
+            # never wait on the pool
+            for _ in range(self.parallelism + (1 if self.consistent_snapshot else 0)):
+                connection = model._get_connection()
+                if not connection:
+                    raise ConnectionError("Tidak dapat terhubung ke database")
+                connections.append(connection)
+
+            if not self.consistent_snapshot:
+                return connections, model.get_idx_bounds(connections[0])
+
+            lock_connection = connections.pop()
+            backend.lock_writes(lock_connection, 'customer')
+            try:
+                for connection in connections:
+                    backend.start_snapshot(connection, 'customer')
+                bounds = model.get_idx_bounds(connections[0])
+            finally:
+                backend.unlock_writes(lock_connection)
+            return connections, bounds
+        except BaseException:
+            for connection in connections:
+                model._release_connection(connection)
+            raise
+        finally:
+            if lock_connection is not None:
+                model._release_connection(lock_connection)
+
+    def _split(self, bounds):
+        # Equal idx ranges, highest first: the serial export order
+        low, high = bounds
+        if low is None:
+            return []
+        width = max(-(-(high - low + 1) // self.parts), 1)
+        ranges = []
+        top = high
+        while top >= low:
+            ranges.append((max(top - width + 1, low), top))
+            top -= width
+        return ranges
+
+    def _read_parts(self, connections, ranges, part_paths, export_format, progress):
+        # Each worker owns one connection and takes ranges until none are left
+        pending = queue.Queue()
+        for number, (low, high) in enumerate(ranges):
+            pending.put((number, low, high))
+        counts = [0] * len(ranges)
+        stop = threading.Event()
+
+        def read(connection):
+            clean = False
+            try:
+                while not stop.is_set():
+                    try:
+                        number, low, high = pending.get_nowait()
+                    except queue.Empty:
+                        clean = True
+                        return
+                    batches = self.customer_model.iter_customer_range(connection, low, high, self.batch_size)
+                    counts[number] = write_export(
+                        self._tracked(batches, progress, stop), part_paths[number], export_format,
+                        header=not self.merge
+                    )
+            except BaseException:
+                stop.set()
+                raise
+            finally:
+                if clean:
+                    self.customer_model._release_connection(connection)
+                else:
+                    # May still have unread rows on the wire
+                    self.customer_model.backend.discard_connection(connection)
+
+        with ThreadPoolExecutor(len(connections), thread_name_prefix='export-reader') as executor:
+            futures = [executor.submit(read, connection) for connection in connections]
+        # A failing reader stops the others with TaskCancelled: report its
+        # error, and a cancel only when the user asked for one
+        errors = [future.exception() for future in futures]
+        for error in errors:
+            if error is not None and not isinstance(error, TaskCancelled):
+                raise error
+        if progress is not None and progress.cancelled:
+            raise TaskCancelled()
+        for future in futures:
+            future.result()
+        return counts
+
+    @staticmethod
+    def _tracked(batches, progress, stop):
+        for rows in batches:
+            if stop.is_set() or (progress is not None and progress.cancelled):
+                raise TaskCancelled()
+            yield rows
+            if progress is not None:
+                progress.advance(len(rows))
+
+    @staticmethod
+    def _merge_parts(part_paths, file_path, export_format):
+        if not part_paths:
+            # Empty table: a file with just the header / schema
+            write_export([], file_path, export_format)
+            return
+
+        if export_format == 'parquet':
+            import pyarrow.parquet as pq
+
+            writer = None
+            try:
+                for path in part_paths:
+                    part = pq.ParquetFile(path)
+                    if writer is None:
+                        writer = pq.ParquetWriter(file_path, part.schema_arrow, compression='zstd')
+                    for group in range(part.num_row_groups):
+                        writer.write_table(part.read_row_group(group))
+            finally:
+                if writer is not None:
+                    writer.close()
+            return
+
+        if export_format == 'arrow':
+            import pyarrow as pa
+
+            writer = None
+            try:
+                for path in part_paths:
+                    with pa.memory_map(path) as source:
+                        part = pa.ipc.open_file(source)
+                        if writer is None:
+                            writer = pa.ipc.new_file(file_path, part.schema)
+                        for batch in range(part.num_record_batches):
+                            writer.write_batch(part.get_batch(batch))
+            finally:
+                if writer is not None:
+                    writer.close()
+            return
+
+        # CSV: a header-only file, then the headerless parts byte for byte.
+        # Compressed parts become extra gzip members / zstd frames, which
+        # both formats define as one concatenated stream.
+        write_export([], file_path, export_format)
+        with open(file_path, 'ab') as target:
+            for path in part_paths:
+                with open(path, 'rb') as source:
+                    shutil.copyfileobj(source, target, 1024 * 1024)
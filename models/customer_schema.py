@@ -0,0 +1,320 @@
+from config.database import DatabaseConfig
+from config.sqlite_backend import SQLITE_NOW_SQL
+
+# Versioned schema migrations for the customer table. Apply pending ones with
+#   python -m models.customer_schema
+# Index builds on a large MySQL table take a while, so this is never run on
+# app start there. The embedded SQLite backend and the local replica
+# migrate themselves when opened.
+
+SCHEMA_MIGRATIONS_DDL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INT PRIMARY KEY,
+    description VARCHAR(200) NOT NULL,
+    applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+CUSTOMER_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS customer (
+    idx INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    nik VARCHAR(6) NOT NULL,
+    name VARCHAR(50) NOT NULL,
+    born DATE NULL,
+    active TINYINT(1) NOT NULL DEFAULT 0,
+    salary INT NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+
+def index_exists(cursor, table, index_name):
+    cursor.execute("""
+    SELECT COUNT(*) FROM information_schema.statistics
+    WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+    """, (table, index_name))
+    return cursor.fetchone()[0] > 0
+
+
+def column_exists(cursor, table, column):
+    cursor.execute("""
+    SELECT COUNT(*) FROM information_schema.columns
+    WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+    """, (table, column))
+    return cursor.fetchone()[0] > 0
+
+
+def sqlite_column_exists(cursor, table, column):
+    cursor.execute(f"PRAGMA table_info({table})")
+    return any(row[1] == column for row in cursor.fetchall())
+
+
+def add_index(cursor, table, index_name, ddl):
+    # Databases set up by hand may already carry the index
+    if not index_exists(cursor, table, index_name):
+        cursor.execute(ddl)
+
+
+# Change tracking read by the local replica sync (models.customer_sync):
+# updated_at is the row version, deletes leave a tombstone behind
+CUSTOMER_TOMBSTONE_DDL = """
+CREATE TABLE IF NOT EXISTS customer_tombstone (
+    idx INT NOT NULL PRIMARY KEY,
+    deleted_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    INDEX idx_customer_tombstone_deleted_at (deleted_at, idx)
+) ENGINE=InnoDB
+"""
+
+CUSTOMER_TOMBSTONE_TRIGGER = """
+CREATE TRIGGER customer_tombstone_delete AFTER DELETE ON customer FOR EACH ROW
+INSERT INTO customer_tombstone (idx, deleted_at) VALUES (OLD.idx, CURRENT_TIMESTAMP(6))
+ON DUPLICATE KEY UPDATE deleted_at = CURRENT_TIMESTAMP(6)
+"""
+
+SQLITE_CUSTOMER_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS customer (
+    idx INTEGER PRIMARY KEY AUTOINCREMENT,
+    nik VARCHAR(6) NOT NULL,
+    name VARCHAR(50) NOT NULL,
+    born DATE NULL,
+    active INTEGER NOT NULL DEFAULT 0,
+    salary INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+# External-content FTS5 index on name, kept in step by triggers
+SQLITE_NAME_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS customer_fts USING fts5(name, content='customer', content_rowid='idx')",
+    """CREATE TRIGGER IF NOT EXISTS customer_fts_insert AFTER INSERT ON customer BEGIN
+        INSERT INTO customer_fts (rowid, name) VALUES (new.idx, new.name);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS customer_fts_delete AFTER DELETE ON customer BEGIN
+        INSERT INTO customer_fts (customer_fts, rowid, name) VALUES ('delete', old.idx, old.name);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS customer_fts_update AFTER UPDATE OF name ON customer BEGIN
+        INSERT INTO customer_fts (customer_fts, rowid, name) VALUES ('delete', old.idx, old.name);
+        INSERT INTO customer_fts (rowid, name) VALUES (new.idx, new.name);
+    END""",
+    "INSERT INTO customer_fts (customer_fts) VALUES ('rebuild')",
+]
+
+
+def _create_customer_table(cursor, fulltext=True):
+    cursor.execute(CUSTOMER_TABLE_DDL)
+
+
+def _add_search_indexes(cursor, fulltext=True):
+    # Secondary InnoDB indexes carry the primary key, so each of these also
+    # serves "ORDER BY idx DESC" within the matching rows
+    add_index(cursor, 'customer', 'idx_customer_nik',
+              "CREATE INDEX idx_customer_nik ON customer (nik)")
+    if fulltext:
+        add_index(cursor, 'customer', 'ft_customer_name',
+                  "CREATE FULLTEXT INDEX ft_customer_name ON customer (name)")
+    add_index(cursor, 'customer', 'idx_customer_born',
+              "CREATE INDEX idx_customer_born ON customer (born)")
+    add_index(cursor, 'customer', 'idx_customer_active',
+              "CREATE INDEX idx_customer_active ON customer (active)")
+    add_index(cursor, 'customer', 'idx_customer_salary',
+              "CREATE INDEX idx_customer_salary ON customer (salary)")
+
+
+def _add_change_tracking(cursor, fulltext=True):
+    if not column_exists(cursor, 'customer', 'updated_at'):
+        cursor.execute(
+            "ALTER TABLE customer ADD COLUMN updated_at TIMESTAMP(6) NOT NULL "
+            "DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)"
+        )
+    add_index(cursor, 'customer', 'idx_customer_updated_at',
+              "CREATE INDEX idx_customer_updated_at ON customer (updated_at, idx)")
+    cursor.execute(CUSTOMER_TOMBSTONE_DDL)
+    cursor.execute("DROP TRIGGER IF EXISTS customer_tombstone_delete")
+    cursor.execute(CUSTOMER_TOMBSTONE_TRIGGER)
+
+
+def _sqlite_create_customer_table(cursor, fulltext=True):
+    cursor.execute(SQLITE_CUSTOMER_TABLE_DDL)
+
+
+def _sqlite_add_search_indexes(cursor, fulltext=True):
+    for column in ('nik', 'born', 'active', 'salary'):
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_customer_{column} ON customer ({column})")
+    if fulltext:
+        for statement in SQLITE_NAME_FTS_DDL:
+            cursor.execute(statement)
+
+
+# Same change tracking as the MySQL migration 3, read by the change feed
+# (models.customer_change_feed). Triggers stand in for ON UPDATE
+# CURRENT_TIMESTAMP and only bump updated_at when a value really changed.
+# Every statement can run again after a failed attempt (see
+# _sqlite_add_updated_at).
+SQLITE_CHANGE_TRACKING_DDL = [
+    f"UPDATE customer SET updated_at = {SQLITE_NOW_SQL} WHERE updated_at IS NULL",
+    "CREATE INDEX IF NOT EXISTS idx_customer_updated_at ON customer (updated_at, idx)",
+    f"""CREATE TRIGGER IF NOT EXISTS customer_touch_insert AFTER INSERT ON customer
+    WHEN new.updated_at IS NULL
+    BEGIN
+        UPDATE customer SET updated_at = {SQLITE_NOW_SQL} WHERE idx = new.idx;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS customer_touch_update AFTER UPDATE OF nik, name, born, active, salary ON customer
+    WHEN old.nik IS NOT new.nik OR old.name IS NOT new.name OR old.born IS NOT new.born
+        OR old.active IS NOT new.active OR old.salary IS NOT new.salary
+    BEGIN
+        UPDATE customer SET updated_at = {SQLITE_NOW_SQL} WHERE idx = new.idx;
+    END""",
+    """CREATE TABLE IF NOT EXISTS customer_tombstone (
+        idx INTEGER PRIMARY KEY,
+        deleted_at DATETIME NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_customer_tombstone_deleted_at ON customer_tombstone (deleted_at, idx)",
+    f"""CREATE TRIGGER IF NOT EXISTS customer_tombstone_delete AFTER DELETE ON customer
+    BEGIN
+        INSERT OR REPLACE INTO customer_tombstone (idx, deleted_at) VALUES (old.idx, {SQLITE_NOW_SQL});
+    END""",
+]
+
+
+def _sqlite_add_updated_at(cursor):
+    # sqlite3 commits an ALTER TABLE on its own, so a migration that failed
+    # after it is retried against a table that already has the column
+    if not sqlite_column_exists(cursor, 'customer', 'updated_at'):
+        cursor.execute("ALTER TABLE customer ADD COLUMN updated_at DATETIME NULL")
+
+
+def _sqlite_add_change_tracking(cursor, fulltext=True):
+    _sqlite_add_updated_at(cursor)
+    for statement in SQLITE_CHANGE_TRACKING_DDL:
+        cursor.execute(statement)
+
+
+# Local replica of the MySQL table. updated_at holds the server version a
+# row was last synced at (NULL until a local insert reaches the server).
+# Local writes are captured into sync_outbox by triggers, except while the
+# sync itself applies server changes (a row in sync_applying).
+REPLICA_SYNC_DDL = [
+    """CREATE TABLE IF NOT EXISTS sync_outbox (
+        idx INTEGER PRIMARY KEY,
+        op TEXT NOT NULL,
+        base_updated_at DATETIME NULL,
+        seq INTEGER NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_sync_outbox_seq ON sync_outbox (seq)",
+    "CREATE TABLE IF NOT EXISTS sync_applying (active INTEGER NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT)",
+    """CREATE TABLE IF NOT EXISTS sync_conflict (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        idx INTEGER NOT NULL,
+        op TEXT NOT NULL,
+        nik TEXT, name TEXT, born DATE, active INTEGER, salary INTEGER,
+        reason TEXT NOT NULL,
+        detected_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS customer_outbox_insert AFTER INSERT ON customer
+    WHEN NOT EXISTS (SELECT 1 FROM sync_applying)
+    BEGIN
+        INSERT OR REPLACE INTO sync_outbox (idx, op, base_updated_at, seq)
+        VALUES (new.idx, 'insert', NULL, (SELECT COALESCE(MAX(seq), 0) + 1 FROM sync_outbox));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS customer_outbox_update AFTER UPDATE ON customer
+    WHEN NOT EXISTS (SELECT 1 FROM sync_applying)
+    BEGIN
+        INSERT INTO sync_outbox (idx, op, base_updated_at, seq)
+        VALUES (new.idx, 'update', old.updated_at, (SELECT COALESCE(MAX(seq), 0) + 1 FROM sync_outbox))
+        ON CONFLICT(idx) DO UPDATE SET seq = excluded.seq;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS customer_outbox_delete AFTER DELETE ON customer
+    WHEN NOT EXISTS (SELECT 1 FROM sync_applying)
+    BEGIN
+        DELETE FROM sync_outbox WHERE idx = old.idx AND op = 'insert';
+        INSERT INTO sync_outbox (idx, op, base_updated_at, seq)
+        SELECT old.idx, 'delete', old.updated_at, (SELECT COALESCE(MAX(seq), 0) + 1 FROM sync_outbox)
+        WHERE old.updated_at IS NOT NULL
+        ON CONFLICT(idx) DO UPDATE SET op = 'delete', seq = excluded.seq;
+    END""",
+]
+
+# Rows created offline get ids above anything the server will hand out,
+# and are renumbered to the server idx once pushed
+REPLICA_LOCAL_ID_BASE = 2000000000
+
+
+def _replica_add_sync_tables(cursor, fulltext=True):
+    _sqlite_add_updated_at(cursor)
+    for statement in REPLICA_SYNC_DDL:
+        cursor.execute(statement)
+    cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, %s) WHERE name = 'customer'",
+                   (REPLICA_LOCAL_ID_BASE,))
+    if cursor.rowcount == 0:
+        cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('customer', %s)",
+                       (REPLICA_LOCAL_ID_BASE,))
+
+
+MIGRATIONS = {
+    'mysql': [
+        (1, "Create customer table", _create_customer_table),
+        (2, "Add search indexes on nik, name (FULLTEXT), born, active, salary", _add_search_indexes),
+        (3, "Track row changes (updated_at, tombstones) for replica sync", _add_change_tracking),
+    ],
+    'sqlite': [
+        (1, "Create customer table", _sqlite_create_customer_table),
+        (2, "Add search indexes on nik, name (FTS5), born, active, salary", _sqlite_add_search_indexes),
+        (3, "Track row changes (updated_at, tombstones) for the change feed", _sqlite_add_change_tracking),
+    ],
+}
+# The replica's updated_at is the server version, set by the sync itself
+MIGRATIONS['replica'] = MIGRATIONS['sqlite'][:2] + [
+    (3, "Add replica sync outbox, state and conflict tables", _replica_add_sync_tables),
+]
+
+
+def get_applied_versions(connection):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(SCHEMA_MIGRATIONS_DDL)
+        cursor.execute("SELECT version FROM schema_migrations")
+        return {row[0] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+
+def pending_migrations(connection, schema='mysql'):
+    applied = get_applied_versions(connection)
+    return [migration for migration in MIGRATIONS[schema] if migration[0] not in applied]
+
+
+def apply_migrations(connection, schema='mysql', fulltext=True):
+    # schema: 'mysql', 'sqlite' or 'replica' (SQLite plus the sync tables)
+    applied = []
+    for version, description, migrate in pending_migrations(connection, schema):
+        cursor = connection.cursor()
+        try:
+            migrate(cursor, fulltext=fulltext)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                (version, description)
+            )
+            connection.commit()
+            applied.append((version, description))
+        finally:
+            cursor.close()
+    return applied
+
+
+def main():
+    backend = DatabaseConfig().get_backend()
+    # With a local replica, migrate the server it syncs with
+    backend = getattr(backend, 'remote', backend)
+    connection = backend.get_connection()
+    try:
+        applied = apply_migrations(connection, backend.schema, fulltext=backend.fulltext_available)
+        for version, description in applied:
+            print(f"Applied migration {version}: {description}")
+        if not applied:
+            print("Schema is up to date")
+        return 0
+    finally:
+        backend.release_connection(connection)
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,226 @@
+import re
+from calendar import monthrange
+from datetime import date
+
+# Search terms are split into typed predicates, each answered by an indexed
+# query path instead of a leading-wildcard LIKE over every column:
+#   nik:A12            NIK prefix                -> idx_customer_nik
+#   budi / nama:budi   name words (full-text)    -> ft_customer_name
+#   1990-05-17         birth date, also 1990-05, 1990 or a..b ranges -> idx_customer_born
+#   aktif / nonaktif   active flag               -> idx_customer_active
+#   gaji:>5000000      salary, also a..b, a-b, <=, >=               -> idx_customer_salary
+# A bare number is matched as a NIK prefix or an exact salary.
+# Predicates are ANDed together. On SQLite, name words go through the
+# customer_fts FTS5 table instead of a MySQL FULLTEXT index.
+
+NIK_MAX_LENGTH = 6
+FULLTEXT_MIN_TOKEN = 3  # innodb_ft_min_token_size
+LIKE_ESCAPE = '!'
+
+FIELD_ALIASES = {
+    'nik': 'nik',
+    'nama': 'name', 'name': 'name',
+    'lahir': 'born', 'born': 'born', 'tgl': 'born', 'tanggal': 'born',
+    'status': 'active', 'aktif': 'active', 'active': 'active',
+    'gaji': 'salary', 'salary': 'salary',
+}
+ACTIVE_WORDS = {'aktif': 1, 'active': 1, 'ya': 1, 'yes': 1, 'true': 1, '1': 1,
+                'nonaktif': 0, 'inactive': 0, 'tidak': 0, 'no': 0, 'false': 0, '0': 0}
+
+DATE_RE = re.compile(r'^(\d{4})(?:-(\d{1,2})(?:-(\d{1,2}))?)?$')
+FULL_DATE_RE = re.compile(r'^\d{4}-\d{1,2}(?:-\d{1,2})?(?:\.\.\d{4}(?:-\d{1,2}(?:-\d{1,2})?)?)?$')
+SALARY_RE = re.compile(r'^(>=|<=|>|<)?(?:rp)?([\d.,]+)$')
+SALARY_RANGE_RE = re.compile(r'^(?:rp)?([\d.,]+)(?:\.\.|-)(?:rp)?([\d.,]+)$')
+NAME_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def parse_search_term(search_term):
+    # Returns a list of (kind, value) predicates
+    term = re.sub(r'\b(tidak|non)[\s-]+aktif\b', 'nonaktif', search_term.strip().lower())
+    predicates = []
+    name_words = []
+
+    for token in term.split():
+        field, _, value = token.partition(':')
+        field = FIELD_ALIASES.get(field) if value else None
+
+        if field == 'nik':
+            predicates.append(('nik_prefix', value))
+        elif field == 'name':
+            name_words.extend(NAME_WORD_RE.findall(value))
+        elif field == 'born':
+            born_range = _parse_date_range(value)
+            if born_range:
+                predicates.append(('born', born_range))
+        elif field == 'active':
+            if value in ACTIVE_WORDS:
+                predicates.append(('active', ACTIVE_WORDS[value]))
+        elif field == 'salary':
+            salary_range = _parse_salary(value)
+            if salary_range:
+                predicates.append(('salary', salary_range))
+        else:
+            _classify_bare_token(token, predicates, name_words)
+
+    if name_words:
+        predicates.append(('name', name_words))
+    return predicates
+
+
+def build_search_condition(search_term, dialect='mysql', fulltext=True):
+    # Returns (list of SQL conditions to AND together, params)
+    conditions = []
+    params = []
+
+    for kind, value in parse_search_term(search_term):
+        if kind == 'nik_prefix':
+            conditions.append(f"nik LIKE %s ESCAPE '{LIKE_ESCAPE}'")
+            params.append(_escape_like(value) + '%')
+        elif kind == 'nik_or_salary':
+            nik_prefix, salary = value
+            conditions.append(f"(nik LIKE %s ESCAPE '{LIKE_ESCAPE}' OR salary = %s)")
+            params.extend([_escape_like(nik_prefix) + '%', salary])
+        elif kind == 'name':
+            _append_name_condition(value, conditions, params, dialect, fulltext)
+        elif kind == 'born':
+            conditions.append("born BETWEEN %s AND %s")
+            params.extend(value)
+        elif kind == 'active':
+            conditions.append("active = %s")
+            params.append(value)
+        elif kind == 'salary':
+            low, high = value
+            if low is not None:
+                conditions.append("salary >= %s")
+                params.append(low)
+            if high is not None:
+                conditions.append("salary <= %s")
+                params.append(high)
+
+    return conditions, params
+
+
+def _classify_bare_token(token, predicates, name_words):
+    if token in ('aktif', 'nonaktif'):
+        predicates.append(('active', ACTIVE_WORDS[token]))
+        return
+
+    if FULL_DATE_RE.match(token):
+        # Impossible dates such as 2000-13-01 are dropped rather than searched as words
+        born_range = _parse_date_range(token)
+        if born_range:
+            predicates.append(('born', born_range))
+        return
+
+    if token[0] in '<>' or token.startswith('rp') or SALARY_RANGE_RE.match(token):
+        salary_range = _parse_salary(token)
+        if salary_range:
+            predicates.append(('salary', salary_range))
+            return
+
+    if token.isdigit():
+        if len(token) <= NIK_MAX_LENGTH:
+            predicates.append(('nik_or_salary', (token, int(token))))
+        else:
+            predicates.append(('salary', (int(token), int(token))))
+        return
+
+    if any(ch.isdigit() for ch in token) and len(token) <= NIK_MAX_LENGTH and token.isalnum():
+        predicates.append(('nik_prefix', token))
+        return
+
+    name_words.extend(NAME_WORD_RE.findall(token))
+
+
+def _parse_date_range(value):
+    start_text, sep, end_text = value.partition('..')
+    start = _date_bounds(start_text)
+    if not start:
+        return None
+    if not sep:
+        return start
+    end = _date_bounds(end_text)
+    if not end:
+        return None
+    return start[0], end[1]
+
+
+def _date_bounds(text):
+    match = DATE_RE.match(text)
+    if not match:
+        return None
+    year, month, day = match.groups()
+    try:
+        year = int(year)
+        if month is None:
+            return date(year, 1, 1), date(year, 12, 31)
+        month = int(month)
+        if day is None:
+            return date(year, month, 1), date(year, month, monthrange(year, month)[1])
+        exact = date(year, month, int(day))
+        return exact, exact
+    except ValueError:
+        return None
+
+
+def _parse_salary(value):
+    range_match = SALARY_RANGE_RE.match(value)
+    if range_match:
+        low, high = (_parse_amount(part) for part in range_match.groups())
+        return (low, high) if low is not None and high is not None else None
+
+    match = SALARY_RE.match(value)
+    if not match:
+        return None
+    operator, amount = match.groups()
+    amount = _parse_amount(amount)
+    if amount is None:
+        return None
+    if operator == '>':
+        return amount + 1, None
+    if operator == '>=':
+        return amount, None
+    if operator == '<':
+        return None, amount - 1
+    if operator == '<=':
+        return None, amount
+    return amount, amount
+
+
+def _parse_amount(text):
+    # Thousands separators are common in rupiah amounts: 5.000.000 or 5,000,000
+    digits = text.replace('.', '').replace(',', '')
+    return int(digits) if digits.isdigit() else None
+
+
+def _append_name_condition(words, conditions, params, dialect='mysql', fulltext=True):
+    if not fulltext:
+        # No full-text index (not migrated yet, or SQLite without FTS5): each
+        # word must still start a word of the name, as it would in MATCH
+        for word in words:
+            conditions.append(f"(name LIKE %s ESCAPE '{LIKE_ESCAPE}' OR name LIKE %s ESCAPE '{LIKE_ESCAPE}')")
+            params.extend([_escape_like(word) + '%', '% ' + _escape_like(word) + '%'])
+        return
+    if dialect == 'sqlite':
+        # FTS5 has no minimum token size
+        fulltext_words, short_words = words, []
+    else:
+        fulltext_words = [word for word in words if len(word) >= FULLTEXT_MIN_TOKEN]
+        short_words = [word for word in words if len(word) < FULLTEXT_MIN_TOKEN]
+
+    if fulltext_words and dialect == 'sqlite':
+        conditions.append("idx IN (SELECT rowid FROM customer_fts WHERE customer_fts MATCH %s)")
+        params.append(' '.join(f'"{word}"*' for word in fulltext_words))
+    elif fulltext_words:
+        conditions.append("MATCH(name) AGAINST (%s IN BOOLEAN MODE)")
+        params.append(' '.join(f"+{word}*" for word in fulltext_words))
+    # Words below the full-text token size are matched as a name prefix
+    for word in short_words:
+        conditions.append(f"name LIKE %s ESCAPE '{LIKE_ESCAPE}'")
+        params.append(_escape_like(word) + '%')
+
+
+def _escape_like(value):
+    # An explicit ESCAPE character behaves the same on MySQL and SQLite
+    return (value.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+            .replace('%', LIKE_ESCAPE + '%').replace('_', LIKE_ESCAPE + '_'))
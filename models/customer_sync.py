@@ -0,0 +1,398 @@
+from datetime import datetime, timedelta
+from models.customer import Customer, INSERT_CUSTOMER_SQL
+
+# Two-way sync between the local replica (config.replica_backend) and MySQL.
+#
+# Pull: server rows with updated_at past the stored watermark are upserted
+# locally, and customer_tombstone entries delete local rows. Rows with local
+# changes still waiting in the outbox are left alone until they are pushed.
+#
+# Push: triggers record local creates/updates/deletes in sync_outbox (one
+# entry per row, coalesced). Entries are replayed on the server in batches,
+# one transaction per batch. Updates and deletes only apply while the server
+# row still has the updated_at the local edit was based on; otherwise it is
+# a conflict: the local attempt is kept in sync_conflict and the server copy
+# wins.
+
+CUSTOMER_COLUMNS = "idx, nik, name, born, active, salary, updated_at"
+
+# A transaction that commits late can carry an updated_at just below the
+# watermark, so each pull re-reads this window; re-applying a row is harmless
+PULL_OVERLAP = timedelta(seconds=60)
+
+UPSERT_LOCAL_SQL = f"""
+INSERT INTO customer ({CUSTOMER_COLUMNS}) VALUES (%s, %s, %s, %s, %s, %s, %s)
+ON CONFLICT(idx) DO UPDATE SET
+    nik = excluded.nik, name = excluded.name, born = excluded.born,
+    active = excluded.active, salary = excluded.salary, updated_at = excluded.updated_at
+WHERE customer.updated_at IS NOT excluded.updated_at
+"""
+
+UPDATE_REMOTE_SQL = """
+UPDATE customer
+SET nik = %s, name = %s, born = %s, active = %s, salary = %s, updated_at = CURRENT_TIMESTAMP(6)
+WHERE idx = %s AND updated_at = %s
+"""
+
+CONFLICT_CHANGED = "Data sudah diubah di server"
+CONFLICT_DELETED = "Data sudah dihapus di server"
+
+
+class CustomerSync:
+    def __init__(self, backend, push_batch_size=200, pull_batch_size=1000):
+        self.local = backend
+        self.remote = backend.remote
+        self.push_batch_size = push_batch_size
+        self.pull_batch_size = pull_batch_size
+
+    def sync(self):
+        # Push first, so local edits are checked against the server state
+        # they were made on, then pull everything that changed since
+        result = {'pushed': 0, 'conflicts': 0, 'pulled': 0, 'deleted': 0, 'skipped': False}
+        if not self.local.sync_lock.acquire(blocking=False):
+            result['skipped'] = True
+            return result
+        try:
+            result.update(self.push())
+            result.update(self.pull())
+            self._apply_locally(lambda cursor: self._put_state(
+                cursor, 'last_sync', datetime.now().isoformat(sep=' ')))
+        finally:
+            self.local.sync_lock.release()
+
+        if result['pushed'] or result['conflicts'] or result['pulled'] or result['deleted']:
+            Customer._notify_change()
+        return result
+
+    def status(self):
+        connection = self.local.get_connection()
+        cursor = None
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT COUNT(*) FROM sync_outbox")
+            pending = cursor.fetchone()[0]
+            cursor.execute("SELECT COUNT(*) FROM sync_conflict")
+            conflicts = cursor.fetchone()[0]
+            return {
+                'pending': pending,
+                'conflicts': conflicts,
+                'last_sync': self._get_state(cursor, 'last_sync'),
+                'watermark': self._get_state(cursor, 'pull_watermark'),
+            }
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self.local.release_connection(connection)
+
+    def get_conflicts(self, limit=100):
+        connection = self.local.get_connection()
+        cursor = None
+        try:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("""
+            SELECT id, idx, op, nik, name, born, active, salary, reason, detected_at
+            FROM sync_conflict ORDER BY id DESC LIMIT %s
+            """, (limit,))
+            return cursor.fetchall()
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self.local.release_connection(connection)
+
+    # Pull
+
+    def pull(self):
+        result = {'pulled': 0, 'deleted': 0}
+        remote = self.remote.get_connection()
+        cursor = None
+        try:
+            cursor = remote.cursor(dictionary=True)
+            result['pulled'] = self._pull_changes(cursor, 'pull_watermark', f"""
+            SELECT {CUSTOMER_COLUMNS} FROM customer {{where}}
+            ORDER BY updated_at, idx LIMIT %s
+            """, 'updated_at', self._upsert_rows)
+            result['deleted'] = self._pull_changes(cursor, 'tombstone_watermark', """
+            SELECT idx, deleted_at FROM customer_tombstone {where}
+            ORDER BY deleted_at, idx LIMIT %s
+            """, 'deleted_at', self._delete_rows)
+            # Reads only; nothing to keep open on the server
+            remote.commit()
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self.remote.release_connection(remote)
+        return result
+
+    def _pull_changes(self, cursor, state_key, query, version_column, apply):
+        # Keyset walk over (version, idx) starting just before the watermark
+        watermark = self._read_state(state_key)
+        since = datetime.fromisoformat(watermark) - PULL_OVERLAP if watermark else None
+        last_key = None
+        applied = 0
+
+        while True:
+            if last_key is not None:
+                where = f"WHERE {version_column} > %s OR ({version_column} = %s AND idx > %s)"
+                params = [last_key[0], last_key[0], last_key[1], self.pull_batch_size]
+            elif since is not None:
+                where = f"WHERE {version_column} >= %s"
+                params = [since, self.pull_batch_size]
+            else:
+                where = ""
+                params = [self.pull_batch_size]
+            cursor.execute(query.format(where=where), params)
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            last_key = (rows[-1][version_column], rows[-1]['idx'])
+            newest = last_key[0].isoformat(sep=' ')
+
+            def apply_batch(local_cursor, rows=rows, newest=newest):
+                pending = self._pending_ids(local_cursor, [row['idx'] for row in rows])
+                count = apply(local_cursor, [row for row in rows if row['idx'] not in pending])
+                self._put_state(local_cursor, state_key, newest)
+                return count
+
+            applied += self._apply_locally(apply_batch)
+            if len(rows) < self.pull_batch_size:
+                break
+        return applied
+
+    @staticmethod
+    def _upsert_rows(cursor, rows):
+        if not rows:
+            return 0
+        cursor.executemany(UPSERT_LOCAL_SQL, [
+            (row['idx'], row['nik'], row['name'], row['born'], row['active'], row['salary'], row['updated_at'])
+            for row in rows
+        ])
+        # Rows re-read through the pull overlap and already current are not counted
+        return cursor.rowcount
+
+    @staticmethod
+    def _delete_rows(cursor, rows):
+        deleted = 0
+        for row in rows:
+            cursor.execute("DELETE FROM customer WHERE idx = %s", (row['idx'],))
+            deleted += cursor.rowcount
+        return deleted
+
+    # Push
+
+    def push(self):
+        result = {'pushed': 0, 'conflicts': 0}
+        last_seq = 0
+        while True:
+            entries = self._read_outbox(last_seq)
+            if not entries:
+                break
+            last_seq = entries[-1]['seq']
+
+            outcome = self._push_batch(entries)
+            self._apply_locally(lambda cursor: self._settle(cursor, entries, outcome))
+            result['pushed'] += len(entries) - len(outcome['conflicts'])
+            result['conflicts'] += len(outcome['conflicts'])
+
+            if len(entries) < self.push_batch_size:
+                break
+        return result
+
+    def _read_outbox(self, after_seq):
+        connection = self.local.get_connection()
+        cursor = None
+        try:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("""
+            SELECT o.idx, o.op, o.base_updated_at, o.seq,
+                   c.nik, c.name, c.born, c.active, c.salary
+            FROM sync_outbox o LEFT JOIN customer c ON c.idx = o.idx
+            WHERE o.seq > %s
+            ORDER BY o.seq
+            LIMIT %s
+            """, (after_seq, self.push_batch_size))
+            return cursor.fetchall()
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self.local.release_connection(connection)
+
+    def _push_batch(self, entries):
+        # One server transaction per batch. Returns the server idx of each
+        # pushed insert, the conflicts, and the current server copy of every
+        # row touched so the replica can take over its new version.
+        outcome = {'inserted': {}, 'conflicts': {}, 'rows': {}}
+        remote = self.remote.get_connection()
+        cursor = None
+        try:
+            cursor = remote.cursor()
+            remote.start_transaction()
+            touched = []
+            for entry in entries:
+                idx = entry['idx']
+                values = (entry['nik'], entry['name'], entry['born'], entry['active'], entry['salary'])
+                if entry['op'] == 'insert':
+                    cursor.execute(INSERT_CUSTOMER_SQL, values)
+                    outcome['inserted'][idx] = cursor.lastrowid
+                    touched.append(cursor.lastrowid)
+                elif entry['op'] == 'update':
+                    cursor.execute(UPDATE_REMOTE_SQL, values + (idx, entry['base_updated_at']))
+                    if cursor.rowcount == 0:
+                        outcome['conflicts'][idx] = self._conflict_reason(cursor, idx)
+                    touched.append(idx)
+                elif entry['op'] == 'delete':
+                    cursor.execute("DELETE FROM customer WHERE idx = %s AND updated_at = %s",
+                                   (idx, entry['base_updated_at']))
+                    if cursor.rowcount == 0 and self._conflict_reason(cursor, idx) == CONFLICT_CHANGED:
+                        # Already gone on the server is what we wanted anyway
+                        outcome['conflicts'][idx] = CONFLICT_CHANGED
+                        touched.append(idx)
+
+            if touched:
+                placeholders = ', '.join(['%s'] * len(touched))
+                cursor.execute(
+                    f"SELECT {CUSTOMER_COLUMNS} FROM customer WHERE idx IN ({placeholders})",
+                    touched
+                )
+                columns = [column[0] for column in cursor.description]
+                for row in cursor.fetchall():
+                    row = dict(zip(columns, row))
+                    outcome['rows'][row['idx']] = row
+            remote.commit()
+            return outcome
+        except Exception:
+            remote.rollback()
+            raise
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self.remote.release_connection(remote)
+
+    @staticmethod
+    def _conflict_reason(cursor, idx):
+        cursor.execute("SELECT 1 FROM customer WHERE idx = %s", (idx,))
+        return CONFLICT_CHANGED if cursor.fetchone() else CONFLICT_DELETED
+
+    def _settle(self, cursor, entries, outcome):
+        # Runs in one local transaction with the outbox triggers muted. A row
+        # edited again while its push was in flight keeps an outbox entry,
+        # rebased on the version the push just created.
+        for entry in entries:
+            idx = entry['idx']
+            cursor.execute("SELECT seq FROM sync_outbox WHERE idx = %s", (idx,))
+            current = cursor.fetchone()
+            edited_since = current is None or current['seq'] != entry['seq']
+
+            if idx in outcome['conflicts']:
+                self._record_conflict(cursor, entry, outcome['conflicts'][idx])
+                cursor.execute("DELETE FROM sync_outbox WHERE idx = %s", (idx,))
+                # The server copy replaces the local edit even if its version did not move
+                cursor.execute("DELETE FROM customer WHERE idx = %s", (idx,))
+                server_row = outcome['rows'].get(idx)
+                if server_row is not None:
+                    self._upsert_rows(cursor, [server_row])
+                continue
+
+            if entry['op'] == 'insert':
+                self._renumber(cursor, idx, outcome['rows'][outcome['inserted'][idx]], edited_since)
+            elif entry['op'] == 'update':
+                version = outcome['rows'][idx]['updated_at']
+                cursor.execute("UPDATE customer SET updated_at = %s WHERE idx = %s", (version, idx))
+                if edited_since:
+                    cursor.execute("UPDATE sync_outbox SET base_updated_at = %s WHERE idx = %s",
+                                   (version, idx))
+                else:
+                    cursor.execute("DELETE FROM sync_outbox WHERE idx = %s", (idx,))
+            elif not edited_since:
+                cursor.execute("DELETE FROM sync_outbox WHERE idx = %s", (idx,))
+
+    def _renumber(self, cursor, local_idx, server_row, edited_since):
+        # The offline id gives way to the server idx. Delete and re-insert
+        # (rather than UPDATE idx) so the FTS triggers follow the rowid.
+        server_idx = server_row['idx']
+        version = server_row['updated_at']
+        cursor.execute("SELECT nik, name, born, active, salary FROM customer WHERE idx = %s", (local_idx,))
+        local_row = cursor.fetchone()
+        cursor.execute("DELETE FROM sync_outbox WHERE idx = %s", (local_idx,))
+        cursor.execute("DELETE FROM customer WHERE idx = %s", (local_idx,))
+
+        if local_row is None:
+            # Deleted locally while the insert was in flight
+            self._queue(cursor, server_idx, 'delete', version)
+            return
+        row = dict(server_row)
+        if edited_since:
+            row.update(local_row)
+            self._queue(cursor, server_idx, 'update', version)
+        self._upsert_rows(cursor, [row])
+
+    @staticmethod
+    def _queue(cursor, idx, op, base_updated_at):
+        cursor.execute("""
+        INSERT INTO sync_outbox (idx, op, base_updated_at, seq)
+        VALUES (%s, %s, %s, (SELECT COALESCE(MAX(seq), 0) + 1 FROM sync_outbox))
+        """, (idx, op, base_updated_at))
+
+    @staticmethod
+    def _record_conflict(cursor, entry, reason):
+        cursor.execute("""
+        INSERT INTO sync_conflict (idx, op, nik, name, born, active, salary, reason)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        """, (entry['idx'], entry['op'], entry['nik'], entry['name'], entry['born'],
+              entry['active'], entry['salary'], reason))
+
+    # Local store
+
+    def _apply_locally(self, apply):
+        # Server-originated changes must not land back in the outbox
+        connection = self.local.get_connection()
+        cursor = None
+        try:
+            cursor = connection.cursor(dictionary=True)
+            connection.start_transaction()
+            cursor.execute("INSERT INTO sync_applying (active) VALUES (1)")
+            result = apply(cursor)
+            cursor.execute("DELETE FROM sync_applying")
+            connection.commit()
+            return result
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self.local.release_connection(connection)
+
+    @staticmethod
+    def _pending_ids(cursor, ids):
+        if not ids:
+            return set()
+        placeholders = ', '.join(['%s'] * len(ids))
+        cursor.execute(f"SELECT idx FROM sync_outbox WHERE idx IN ({placeholders})", ids)
+        return {row['idx'] for row in cursor.fetchall()}
+
+    def _read_state(self, key):
+        connection = self.local.get_connection()
+        cursor = None
+        try:
+            cursor = connection.cursor()
+            return self._get_state(cursor, key)
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self.local.release_connection(connection)
+
+    @staticmethod
+    def _get_state(cursor, key):
+        cursor.execute("SELECT value FROM sync_state WHERE key = %s", (key,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return row['value'] if isinstance(row, dict) else row[0]
+
+    @staticmethod
+    def _put_state(cursor, key, value):
+        cursor.execute("""
+        INSERT INTO sync_state (key, value) VALUES (%s, %s)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+        """, (key, value))
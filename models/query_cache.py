@@ -0,0 +1,90 @@
+import threading
+from utils.lru import LRUCache
+
+# What a committed write through the model can have touched
+CHANGE_CREATE = 'create'
+CHANGE_UPDATE = 'update'
+CHANGE_DELETE = 'delete'
+
+
+class QueryCache:
+    # Results of Customer.get_customer_by_id (by idx) and get_all_customers
+    # (by limit, offset, search term), shared by every Customer instance.
+    # Writes through the model drop only the entries they can have changed;
+    # the TTL bounds staleness from other clients.
+    def __init__(self, ttl=30.0, max_customers=1024, max_pages=256):
+        self._customers = LRUCache(max_entries=max_customers, ttl=ttl)
+        self._pages = LRUCache(max_entries=max_pages, ttl=ttl)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.invalidated = 0
+
+    def configure(self, ttl, max_customers, max_pages):
+        for cache, max_entries in ((self._customers, max_customers), (self._pages, max_pages)):
+            cache.ttl = ttl
+            cache.max_entries = max_entries
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def get_customer(self, customer_id):
+        # Copies, so a caller editing the dict does not edit the cache
+        customer = self._customers.get(customer_id)
+        return None if customer is None else dict(customer)
+
+    def set_customer(self, customer_id, customer, generation):
+        if customer is not None:
+            self._store(self._customers, customer_id, dict(customer), generation)
+
+    def get_page(self, limit, offset, search_term):
+        page = self._pages.get((limit, offset, search_term))
+        if page is None:
+            return None
+        customers, total = page
+        return [dict(customer) for customer in customers], total
+
+    def set_page(self, limit, offset, search_term, page, generation):
+        customers, total = page
+        self._store(self._pages, (limit, offset, search_term),
+                    ([dict(customer) for customer in customers], total), generation)
+
+    def invalidate(self, change=None, customer_id=None):
+        # change/customer_id describe a single-row write; None means anything
+        # may have changed (imports, replica sync)
+        with self._lock:
+            # Reads still in flight must not store what they saw before the write
+            self._generation += 1
+            if change == CHANGE_UPDATE:
+                # Row count and positions are unchanged: unfiltered pages
+                # without the row still hold. Filtered pages may gain or lose it.
+                dropped = self._customers.pop(customer_id) is not None
+                dropped += self._pages.discard_where(
+                    lambda key, page: key[2] or any(c['idx'] == customer_id for c in page[0])
+                )
+            elif change == CHANGE_CREATE:
+                # Other customers are untouched; every page total moves
+                dropped = len(self._pages)
+                self._pages.clear()
+            elif change == CHANGE_DELETE:
+                dropped = (self._customers.pop(customer_id) is not None) + len(self._pages)
+                self._pages.clear()
+            else:
+                dropped = len(self._customers) + len(self._pages)
+                self._customers.clear()
+                self._pages.clear()
+            self.invalidated += dropped
+
+    def stats(self):
+        return {
+            'customers': self._customers.stats(),
+            'pages': self._pages.stats(),
+            'invalidated': self.invalidated,
+        }
+
+    def _store(self, cache, key, value, generation):
+        with self._lock:
+            # A write landed while this result was being read
+            if generation != self._generation:
+                return
+            cache.put(key, value)
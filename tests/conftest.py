@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.customer import Customer  # noqa: E402
+from models.customer_csv import CSV_DELIMITER  # noqa: E402
+
+
+@pytest.fixture
+def customer_model(tmp_path, monkeypatch):
+    # A fresh embedded database per test; backends are shared per path
+    monkeypatch.setenv('CUSTOMER_DB_BACKEND', 'sqlite')
+    monkeypatch.setenv('CUSTOMER_DB_PATH', str(tmp_path / 'customers.db'))
+    # The read caches are class-level and would serve the previous test's rows
+    Customer.count_cache.invalidate()
+    Customer.query_cache.invalidate()
+    return Customer()
+
+
+@pytest.fixture
+def write_csv(tmp_path):
+    # write_csv(lines) -> path of an import file with the header and lines
+    def write(lines, name='customers.csv'):
+        path = tmp_path / name
+        path.write_text("\n".join([CSV_DELIMITER.join(['nik', 'name', 'born', 'active', 'salary'])] + lines) + "\n",
+                        encoding='utf-8')
+        return str(path)
+    return write
+
+
+@pytest.fixture
+def stored_customers(customer_model):
+    # stored_customers() -> (nik, name, salary) of every row, oldest first
+    def read():
+        connection = customer_model._get_connection()
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT nik, name, salary FROM customer ORDER BY idx")
+            return cursor.fetchall()
+        finally:
+            customer_model._release_connection(connection, cursor)
+    return read
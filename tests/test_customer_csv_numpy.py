@@ -0,0 +1,49 @@
+import pytest
+
+from models.customer_csv import parse_csv_range
+from models.customer_import import iter_parsed_ranges
+
+np = pytest.importorskip('numpy')
+from models.customer_csv_numpy import parse_csv_bytes  # noqa: E402
+
+MALFORMED = [
+    "A00001;Ani;1990-01-01;1;100",
+    "A00002;Budi;1990-02-30;1;200",            # impossible date
+    "A00003;Citra;1991-3-3;0;300",             # date not zero-padded
+    "A00004;Dewi",                             # too short
+    "A00005;Eko;1990-01-01;1;5;extra",         # too long
+    'A00006;"Fajar; Jr";1992-06-06;1;600',     # quoted delimiter
+    "A00007;Gita;;;",                          # empty fields
+    "A00008;Hadi;1990-01-01;-1;+700",          # signs
+    "A00009;Indah;1990-01-01; 1;700 ",         # spaces around numbers
+    "A00010;Joko;1990-01-01;1;99999999999999999999",  # past int64
+    "A00011;Kiki;1990-01-01;yes;1",            # not a number
+    "A00012;Lestari Ünal;2000-02-29;1;1200",   # non-ASCII name, leap day
+    "A00013;Made;1900-02-29;1;1300",           # not a leap year
+    "",                                        # blank line
+]
+
+
+def test_numpy_block_parse_matches_csv_engine(tmp_path):
+    data = ("\n".join(MALFORMED) + "\n").encode('utf-8')
+    path = tmp_path / 'block.csv'
+    path.write_bytes(data)
+
+    row_count, records, errors = parse_csv_bytes(data)
+    assert (row_count, list(records), errors) == parse_csv_range(str(path), 0, len(data))
+
+
+@pytest.mark.parametrize('line_end', ["\n", "\r\n"])
+def test_numpy_engine_matches_csv_engine_across_ranges(tmp_path, line_end):
+    lines = ["nik;name;born;active;salary"] + [MALFORMED[row % len(MALFORMED)] for row in range(3000)]
+    path = tmp_path / 'import.csv'
+    path.write_bytes(line_end.join(lines).encode('utf-8') + line_end.encode('utf-8'))
+
+    def parse(engine):
+        results = []
+        for first_row, row_count, records, errors, _ in iter_parsed_ranges(str(path), 1, chunk_bytes=4096,
+                                                                          engine=engine):
+            results.append((first_row, row_count, list(records), errors))
+        return results
+
+    assert parse('numpy') == parse('csv')
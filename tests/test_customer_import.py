@@ -0,0 +1,71 @@
+from models.customer import IMPORT_MERGE
+from models.customer_csv import iter_csv_rows
+
+LINES = [
+    "A00001;Ani;1990-01-01;1;100",   # row 2
+    "A00002;Budi;1990-02-30;1;200",  # row 3: no such date
+    "A00003;Citra;1991-03-03;0;300",  # row 4
+    "A00004;Dewi",                    # row 5: too short
+    "A00005;Eko;;1;",                 # row 6
+    "A00006;Fajar;1992-06-06;x;600",  # row 7: active is not a number
+    "A00007;Gita;1993-07-07;1;700",  # row 8
+]
+
+
+def test_import_reports_bad_rows_by_file_row(customer_model, write_csv, stored_customers):
+    path = write_csv(LINES)
+    result = customer_model.import_customers(iter_csv_rows(path), chunk_size=3)
+
+    assert result['inserted'] == 4
+    assert result['failed'] == 3
+    assert [error.split(':')[0] for error in result['errors']] == ["Row 3", "Row 5", "Row 7"]
+    assert result['errors'][1] == "Row 5: invalid row length"
+    assert [nik for nik, _, _ in stored_customers()] == ['A00001', 'A00003', 'A00005', 'A00007']
+
+
+def test_import_rollback_chunk_fails_the_whole_chunk(customer_model, write_csv, stored_customers):
+    path = write_csv(LINES)
+    # Chunks: rows 2-4, 5-7, 8; the first two hold bad rows
+    result = customer_model.import_customers(iter_csv_rows(path), chunk_size=3, rollback_chunk=True)
+
+    assert result['inserted'] == 1
+    assert result['failed'] == 6
+    assert [error.split(':')[0] for error in result['errors']] == [f"Row {row}" for row in range(2, 8)]
+    assert result['errors'][0] == "Row 2: Dibatalkan, chunk baris 2-4 di-rollback (data tidak valid)"
+    assert result['errors'][2] == "Row 4: Dibatalkan, chunk baris 2-4 di-rollback (data tidak valid)"
+    assert [nik for nik, _, _ in stored_customers()] == ['A00007']
+
+
+def test_merge_counts_inserted_updated_and_unchanged(customer_model, write_csv, stored_customers):
+    customer_model.import_customers(iter_csv_rows(write_csv([
+        "M00001;Ani;1990-01-01;1;100",
+        "M00002;Budi;1990-02-02;1;200",
+    ], name='first.csv')))
+
+    result = customer_model.import_customers(iter_csv_rows(write_csv([
+        "M00001;Ani;1990-01-01;1;100",     # unchanged
+        "M00002;Budi S;1990-02-02;1;250",  # updated
+        "M00003;Citra;1991-03-03;0;300",   # inserted
+        "M00003;Citra;1991-03-03;0;300",   # same as the row above: unchanged
+        "M00003;Citra A;1991-03-03;0;300",  # changes the row inserted above
+    ], name='second.csv')), chunk_size=2, mode=IMPORT_MERGE)
+
+    assert (result['inserted'], result['updated'], result['unchanged'], result['failed']) == (1, 2, 2, 0)
+    assert stored_customers() == [
+        ('M00001', 'Ani', 100), ('M00002', 'Budi S', 250), ('M00003', 'Citra A', 300),
+    ]
+
+
+def test_merge_updates_only_the_newest_copy_of_a_nik(customer_model, write_csv, stored_customers):
+    # Tables imported before merge mode existed may repeat a nik
+    customer_model.import_customers(iter_csv_rows(write_csv([
+        "D00001;Old;1990-01-01;1;100",
+        "D00001;Newer;1990-01-01;1;100",
+    ], name='first.csv')))
+
+    result = customer_model.import_customers(iter_csv_rows(write_csv([
+        "D00001;Newest;1990-01-01;1;100",
+    ], name='second.csv')), mode=IMPORT_MERGE)
+
+    assert result['updated'] == 1
+    assert stored_customers() == [('D00001', 'Old', 100), ('D00001', 'Newest', 100)]
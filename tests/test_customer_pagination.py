@@ -0,0 +1,46 @@
+import pytest
+
+from models.customer import PAGE_FIRST, PAGE_LAST, PAGE_NEXT, PAGE_PREV
+
+
+@pytest.fixture
+def customers(customer_model):
+    # idx 1..25
+    customer_model.import_customers(
+        [(row, [f"P{row:05d}", f"Name {row}", "", "1", str(row)]) for row in range(2, 27)]
+    )
+    return customer_model
+
+
+def idxs(page):
+    customers, _ = page
+    return [customer['idx'] for customer in customers]
+
+
+def test_first_and_next_pages(customers):
+    first = customers.get_customers_page(10, direction=PAGE_FIRST)
+    assert idxs(first) == list(range(25, 15, -1))
+    assert first[1] == 25
+
+    second = customers.get_customers_page(10, cursor_idx=16, direction=PAGE_NEXT)
+    assert idxs(second) == list(range(15, 5, -1))
+
+    third = customers.get_customers_page(10, cursor_idx=6, direction=PAGE_NEXT)
+    assert idxs(third) == [5, 4, 3, 2, 1]
+
+
+def test_prev_page_comes_back_newest_first(customers):
+    # From the page starting at idx 15, back to the first page
+    previous = customers.get_customers_page(10, cursor_idx=15, direction=PAGE_PREV)
+    assert idxs(previous) == list(range(25, 15, -1))
+
+
+def test_last_page_holds_the_oldest_rows(customers):
+    assert idxs(customers.get_customers_page(10, direction=PAGE_LAST)) == list(range(10, 0, -1))
+
+
+def test_keyset_pages_respect_the_search(customers):
+    # Salary range 11..20 matches idx 10..19
+    page = customers.get_customers_page(4, search_term="gaji:11..20", cursor_idx=16, direction=PAGE_NEXT)
+    assert idxs(page) == [15, 14, 13, 12]
+    assert page[1] == 10
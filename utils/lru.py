@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    # Thread-safe LRU bounded by entry count and optionally by an estimated
+    # byte budget (sizeof(value)) and a time-to-live per entry. on_evict(key,
+    # value) is called, outside the lock, for every entry the cache drops by
+    # itself (eviction or expiry), so owners can prune their own indexes.
+    def __init__(self, max_entries=128, max_bytes=None, ttl=None, sizeof=None, on_evict=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.on_evict = on_evict
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()  # key -> (value, size, stored_at)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, _, stored_at = entry
+            expired = self.ttl is not None and time.monotonic() - stored_at > self.ttl
+            if expired:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+        self._evicted([(key, value)])
+        return default
+
+    def peek(self, key, default=None):
+        # Lookup without touching recency or the hit/miss counters
+        with self._lock:
+            entry = self._entries.get(key)
+            return default if entry is None else entry[0]
+
+    def stored_at(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else entry[2]
+
+    def __contains__(self, key):
+        # An expired entry counts as absent, without touching the counters
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (self.ttl is None or time.monotonic() - entry[2] <= self.ttl)
+
+    def put(self, key, value, stored_at=None):
+        # stored_at: when value was read (time.monotonic()), for a value that
+        # is already cached under another key and must expire with it
+        size = self.sizeof(value) if self.sizeof else 0
+        evicted = []
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic() if stored_at is None else stored_at)
+            self._bytes += size
+            while self._entries and (
+                    len(self._entries) > self.max_entries
+                    or (self.max_bytes is not None and self._bytes > self.max_bytes)):
+                oldest = next(iter(self._entries))
+                evicted.append((oldest, self._remove(oldest)))
+                self.evictions += 1
+        self._evicted(evicted)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            return self._remove(key)
+
+    def discard_where(self, predicate):
+        # Drops every entry whose (key, value) matches; returns how many
+        with self._lock:
+            doomed = [key for key, (value, _, _) in self._entries.items() if predicate(key, value)]
+            for key in doomed:
+                self._remove(key)
+            return len(doomed)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def _evicted(self, entries):
+        if self.on_evict is not None:
+            for key, value in entries:
+                self.on_evict(key, value)
+
+    def _remove(self, key):
+        value, size, _ = self._entries.pop(key)
+        self._bytes -= size
+        return value
@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+
+# Process-wide timing spans, counters and latency histograms:
+#
+#   with metrics.span('csv.parse'):
+#       ...
+#   metrics.increment('import.rows', len(rows))
+#
+# Spans in use: db.checkout (pool), db.connect (new connection), db.execute,
+# db.executemany, db.fetch, db.commit (config.instrumented), csv.parse,
+# csv.parse_wait (waiting on the parse process pool), import.write
+# (models.customer), ui.page_load and ui.render (MainWindow),
+# ui.form_open (CustomerForm, open to interactive).
+# dump() writes everything as JSON or Prometheus text. Statements slower than
+# the slow query threshold are appended, with their parameters, to a JSON
+# lines log.
+
+# Histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Latest samples kept per span for percentiles and the diagnostics panel
+RECENT_SAMPLES = 256
+PROMETHEUS_PREFIX = 'customer_app'
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS, recent=RECENT_SAMPLES):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=recent)
+
+    def observe(self, seconds):
+        self.bucket_counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def summary(self):
+        recent = sorted(self.recent)
+
+        def percentile(fraction):
+            if not recent:
+                return 0.0
+            return recent[min(int(fraction * len(recent)), len(recent) - 1)]
+
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'max': self.max,
+            'last': self.recent[-1] if self.recent else 0.0,
+            # Over the recent samples only
+            'p50': percentile(0.50),
+            'p95': percentile(0.95),
+            'p99': percentile(0.99),
+        }
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self.slow_query_seconds = None
+        self.slow_query_log_path = None
+        self._slow_log_lock = threading.Lock()
+
+    def configure_slow_query_log(self, threshold_ms, path):
+        # threshold_ms None switches the log off
+        self.slow_query_seconds = None if threshold_ms is None else threshold_ms / 1000.0
+        self.slow_query_log_path = path
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def span(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def record_query(self, name, query, params, seconds):
+        # A timed statement: one histogram sample, plus a slow log line when
+        # it took longer than the threshold
+        self.observe(name, seconds)
+        threshold = self.slow_query_seconds
+        if threshold is None or seconds < threshold or not self.slow_query_log_path:
+            return
+        self.increment('db.slow_queries')
+        entry = {
+            'at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'span': name,
+            'ms': round(seconds * 1000.0, 3),
+            'sql': ' '.join(query.split()),
+            'params': params,
+        }
+        try:
+            with self._slow_log_lock:
+                directory = os.path.dirname(self.slow_query_log_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.slow_query_log_path, 'a', encoding='utf-8') as log:
+                    log.write(json.dumps(entry, default=str) + '\n')
+        except OSError as e:
+            print(f"Error writing slow query log: {e}")
+
+    def summaries(self):
+        # span name -> Histogram.summary(), for the diagnostics panel
+        with self._lock:
+            return {name: histogram.summary() for name, histogram in sorted(self._histograms.items())}
+
+    def recent(self, name):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            return list(histogram.recent) if histogram is not None else []
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {}
+            for name, histogram in sorted(self._histograms.items()):
+                summary = histogram.summary()
+                summary['buckets'] = [
+                    [bound, count] for bound, count in zip(histogram.buckets + ('+Inf',), histogram.bucket_counts)
+                ]
+                histograms[name] = summary
+        return {'counters': counters, 'histograms': histograms}
+
+    def to_prometheus(self):
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in sorted(snapshot['counters'].items()):
+            metric = f"{PROMETHEUS_PREFIX}_{_metric_name(name)}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        for name, histogram in snapshot['histograms'].items():
+            metric = f"{PROMETHEUS_PREFIX}_{_metric_name(name)}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in histogram['buckets']:
+                cumulative += count
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+            lines += [f"{metric}_sum {histogram['sum']}", f"{metric}_count {histogram['count']}"]
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path):
+        # .json -> snapshot(); anything else (.prom, .txt) -> Prometheus text
+        if path.lower().endswith('.json'):
+            text = json.dumps(self.snapshot(), indent=2)
+        else:
+            text = self.to_prometheus()
+        with open(path, 'w', encoding='utf-8') as output:
+            output.write(text)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def _metric_name(name):
+    return ''.join(char if char.isalnum() else '_' for char in name)
+
+
+metrics = Metrics()
@@ -0,0 +1,61 @@
+import threading
+import time
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class TaskProgress:
+    # Shared between a worker and the UI: the worker advances it, the UI polls snapshot()
+    def __init__(self, total_rows=None, total_bytes=None):
+        self._lock = threading.Lock()
+        self.total_rows = total_rows
+        self.total_bytes = total_bytes
+        self.rows = 0
+        self.bytes = 0
+        self.cancelled = False
+        self.finished = False
+        self.started_at = time.monotonic()
+        self.finished_at = None
+
+    def advance(self, rows=0, bytes_done=None):
+        with self._lock:
+            self.rows += rows
+            if bytes_done is not None:
+                self.bytes = bytes_done
+
+    def set_total(self, total_rows=None, total_bytes=None):
+        with self._lock:
+            if total_rows is not None:
+                self.total_rows = total_rows
+            if total_bytes is not None:
+                self.total_bytes = total_bytes
+
+    def cancel(self):
+        # Workers check this between batches; work already committed stays
+        self.cancelled = True
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise TaskCancelled()
+
+    def finish(self):
+        with self._lock:
+            self.finished = True
+            self.finished_at = time.monotonic()
+
+    def snapshot(self):
+        with self._lock:
+            end = self.finished_at or time.monotonic()
+            elapsed = end - self.started_at
+            return {
+                'rows': self.rows,
+                'bytes': self.bytes,
+                'total_rows': self.total_rows,
+                'total_bytes': self.total_bytes,
+                'cancelled': self.cancelled,
+                'finished': self.finished,
+                'elapsed': elapsed,
+                'rows_per_second': self.rows / elapsed if elapsed > 0 else 0.0,
+            }
@@ -0,0 +1,50 @@
+import json
+import os
+import sys
+import time
+from utils.metrics import metrics
+
+# Cold-start milestones, in seconds since main() started:
+#   imports      PySide6 and the main window module imported
+#   window       MainWindow constructed
+#   first_paint  the window painted for the first time
+#   first_data   the first page of customers on screen
+# Once all are in, the report goes to stderr, and is appended as one JSON
+# line per start to the file named by CUSTOMER_STARTUP_REPORT, so cold-start
+# regressions can be tracked across versions.
+
+MILESTONES = ('imports', 'window', 'first_paint', 'first_data')
+
+
+class StartupTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.marks = {}
+        self.reported = False
+
+    def mark(self, milestone):
+        # Only the first time each milestone is reached counts
+        if milestone in self.marks:
+            return
+        elapsed = time.perf_counter() - self.started
+        self.marks[milestone] = elapsed
+        metrics.observe(f"startup.{milestone}", elapsed)
+        if not self.reported and all(name in self.marks for name in MILESTONES):
+            self.report()
+
+    def report(self):
+        self.reported = True
+        print("Startup: " + ", ".join(
+            f"{name} {self.marks[name] * 1000:.0f} ms" for name in MILESTONES if name in self.marks
+        ), file=sys.stderr)
+
+        path = os.environ.get('CUSTOMER_STARTUP_REPORT')
+        if not path:
+            return
+        entry = {'at': time.strftime('%Y-%m-%d %H:%M:%S')}
+        entry.update({name: round(seconds, 4) for name, seconds in self.marks.items()})
+        try:
+            with open(path, 'a', encoding='utf-8') as report:
+                report.write(json.dumps(entry) + '\n')
+        except OSError as e:
+            print(f"Error writing startup report: {e}")
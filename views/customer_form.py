@@ -1,19 +1,29 @@
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QFormLayout,
                                QLineEdit, QDateEdit, QComboBox, QSpinBox,
                                QPushButton, QMessageBox)
-from PySide6.QtCore import QDate, Qt
+import time
+from PySide6.QtCore import QDate, Qt, QTimer
 from PySide6.QtGui import QFont
-from controllers.customer_controller import CustomerController
+from models.customer import CHANGE_CREATE, CHANGE_UPDATE, CHANGE_DELETE
+from utils.metrics import metrics
 
 class CustomerForm(QDialog):
-    def __init__(self, parent=None, customer_id=None):
+    # Built once and reused: open_for() re-populates the widgets for another
+    # customer (or a new one) instead of rebuilding them and re-parsing the
+    # stylesheet. The controller comes from the application's Services.
+    def __init__(self, parent=None, customer_id=None, controller=None):
         super().__init__(parent)
-        self.customer_id = customer_id
-        self.controller = CustomerController()
+        if controller is None:
+            from controllers.services import get_services
+            controller = get_services().controller
+        self.controller = controller
+        self.customer_id = None
+        self.opened_at = None
+        # (CHANGE_CREATE / CHANGE_UPDATE / CHANGE_DELETE, row) once accepted,
+        # so the caller can patch its table instead of reloading it
+        self.change = None
         self.init_ui()
-        
-        if customer_id:
-            self.load_customer_data()
+        self.open_for(customer_id)
     
     def init_ui(self):
         self.setWindowTitle("Form Customer")
@@ -94,17 +104,44 @@ class CustomerForm(QDialog):
         button_layout.addWidget(self.save_btn)
         button_layout.addWidget(self.cancel_btn)
         
-        if self.customer_id:
-            self.delete_btn = QPushButton("Hapus")
-            self.delete_btn.setObjectName("deleteBtn")
-            self.delete_btn.clicked.connect(self.delete_customer)
-            button_layout.addWidget(self.delete_btn)
+        # Only shown when editing an existing customer
+        self.delete_btn = QPushButton("Hapus")
+        self.delete_btn.setObjectName("deleteBtn")
+        self.delete_btn.clicked.connect(self.delete_customer)
+        button_layout.addWidget(self.delete_btn)
         
         layout.addLayout(button_layout)
         self.setLayout(layout)
     
-    def load_customer_data(self):
-        customer = self.controller.get_customer(self.customer_id)
+    def open_for(self, customer_id=None, customer=None):
+        # customer: the row already on screen, which saves the lookup
+        self.opened_at = time.perf_counter()
+        self.customer_id = customer_id
+        self.change = None
+        self.nik_edit.clear()
+        self.name_edit.clear()
+        self.born_edit.setDate(QDate.currentDate())
+        self.active_combo.setCurrentIndex(0)
+        self.salary_spin.setValue(0)
+        self.delete_btn.setVisible(bool(customer_id))
+        self.nik_edit.setFocus()
+        
+        if customer_id:
+            self.load_customer_data(customer)
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        # Interactive once the event loop runs again after the show
+        QTimer.singleShot(0, self.record_open_time)
+    
+    def record_open_time(self):
+        if self.opened_at is not None:
+            metrics.observe('ui.form_open', time.perf_counter() - self.opened_at)
+            self.opened_at = None
+    
+    def load_customer_data(self, customer=None):
+        if customer is None:
+            customer = self.controller.get_customer(self.customer_id)
         if customer:
             self.nik_edit.setText(customer['nik'])
             self.name_edit.setText(customer['name'])
@@ -121,15 +158,18 @@ class CustomerForm(QDialog):
         salary = self.salary_spin.value()
         
         if self.customer_id:
-            success, message = self.controller.update_customer(
+            success, message, customer = self.controller.update_customer(
                 self.customer_id, nik, name, born, active, salary
             )
+            change = CHANGE_UPDATE
         else:
-            success, message = self.controller.create_customer(
+            success, message, customer = self.controller.create_customer(
                 nik, name, born, active, salary
             )
+            change = CHANGE_CREATE
         
         if success:
+            self.change = (change, customer)
             QMessageBox.information(self, "Sukses", message)
             self.accept()
         else:
@@ -145,6 +185,7 @@ class CustomerForm(QDialog):
         if reply == QMessageBox.StandardButton.Yes:
             success, message = self.controller.delete_customer(self.customer_id)
             if success:
+                self.change = (CHANGE_DELETE, {'idx': self.customer_id})
                 QMessageBox.information(self, "Sukses", message)
                 self.accept()
             else:
@@ -0,0 +1,233 @@
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from models.customer import PAGE_FIRST, PAGE_NEXT
+from utils.lru import LRUCache
+
+COLUMNS = [
+    ("ID", 'idx'),
+    ("NIK", 'nik'),
+    ("Nama", 'name'),
+    ("Tanggal Lahir", 'born'),
+    ("Status", 'active'),
+    ("Gaji", 'salary'),
+]
+
+
+def format_cell(customer, column):
+    # Cells are formatted on demand, only for what the view actually paints
+    key = COLUMNS[column][1]
+    value = customer[key]
+    if key == 'idx':
+        return str(value)
+    if key == 'born':
+        return str(value) if value else ""
+    if key == 'active':
+        return "Aktif" if value else "Tidak Aktif"
+    if key == 'salary':
+        return f"Rp {value:,}" if value else "Rp 0"
+    return value
+
+
+class CustomerTableModel(QAbstractTableModel):
+    # One page of customers, as returned by the controller
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._customers = []
+
+    def set_customers(self, customers):
+        self.beginResetModel()
+        self._customers = list(customers)
+        self.endResetModel()
+
+    def customer_at(self, row):
+        if 0 <= row < len(self._customers):
+            return self._customers[row]
+        return None
+
+    def customers(self):
+        return list(self._customers)
+
+    def row_of(self, customer_id):
+        for row, customer in enumerate(self._customers):
+            if customer['idx'] == customer_id:
+                return row
+        return None
+
+    # In-place patches after a single-row write; only the touched rows are
+    # repainted, the rest of the view is left alone
+    def replace_customer(self, customer):
+        row = self.row_of(customer['idx'])
+        if row is None:
+            return False
+        self._customers[row] = customer
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(COLUMNS) - 1))
+        return True
+
+    def insert_customer(self, row, customer, max_rows=None):
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._customers.insert(row, customer)
+        self.endInsertRows()
+        if max_rows is not None and len(self._customers) > max_rows:
+            # Pushed off the end of the page
+            last = len(self._customers) - 1
+            self.beginRemoveRows(QModelIndex(), last, last)
+            self._customers.pop()
+            self.endRemoveRows()
+
+    def remove_customer(self, customer_id):
+        row = self.row_of(customer_id)
+        if row is None:
+            return False
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._customers[row]
+        self.endRemoveRows()
+        return True
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._customers)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        customer = self.customer_at(index.row())
+        if customer is None:
+            return "…"
+        return format_cell(customer, index.column())
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return COLUMNS[section][0]
+        return str(section + 1)
+
+
+class LazyCustomerTableModel(CustomerTableModel):
+    # "Infinite scroll" over the whole table. Rows arrive in keyset blocks via
+    # canFetchMore/fetchMore as the view scrolls; only max_blocks blocks stay
+    # in memory and an evicted block is re-read by its cursor when painted.
+    def __init__(self, controller, tasks, block_size=200, max_blocks=20, parent=None):
+        super().__init__(parent)
+        self.controller = controller
+        self.tasks = tasks
+        self.block_size = block_size
+        self.search_term = ""
+        self.total = 0
+        self._blocks = LRUCache(max_entries=max_blocks)
+        self._block_cursors = [None]  # block k starts after idx _block_cursors[k]
+        self._row_count = 0
+        self._exhausted = False
+        self._loading = set()
+        self._generation = 0
+
+    def reset(self, search_term=""):
+        self.beginResetModel()
+        self.search_term = search_term
+        self.total = 0
+        self._blocks.clear()
+        self._block_cursors = [None]
+        self._row_count = 0
+        self._exhausted = False
+        self._loading.clear()
+        self._generation += 1
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def customer_at(self, row):
+        if not 0 <= row < self._row_count:
+            return None
+        block_number, offset = divmod(row, self.block_size)
+        block = self._blocks.get(block_number)
+        if block is None:
+            self._load_block(block_number)
+            return None
+        return block[offset] if offset < len(block) else None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        next_block = len(self._block_cursors) - 1
+        return not self._exhausted and next_block not in self._loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            self._load_block(len(self._block_cursors) - 1)
+
+    def block_stats(self):
+        return self._blocks.stats()
+
+    def replace_customer(self, customer):
+        # Patches the row if its block is loaded; rows never move on an update
+        for block_number in self._blocks.keys():
+            block = self._blocks.peek(block_number)
+            for offset, current in enumerate(block or []):
+                if current['idx'] == customer['idx']:
+                    # A copy: the block may be the page cache's own list
+                    block = list(block)
+                    block[offset] = customer
+                    self._blocks.put(block_number, block)
+                    row = block_number * self.block_size + offset
+                    self.dataChanged.emit(self.index(row, 0), self.index(row, len(COLUMNS) - 1))
+                    return True
+        return False
+
+    # Inserts and deletes shift every row after them, and _customers is not
+    # what this model shows: re-read from the top, as apply_customer_change
+    # does in infinite scroll
+    def insert_customer(self, row, customer, max_rows=None):
+        self.reset(self.search_term)
+
+    def remove_customer(self, customer_id):
+        self.reset(self.search_term)
+        return True
+
+    def _load_block(self, block_number):
+        if block_number in self._loading or block_number >= len(self._block_cursors):
+            return
+        self._loading.add(block_number)
+
+        cursor_idx = self._block_cursors[block_number]
+        generation = self._generation
+        self.tasks.submit(
+            self.controller.get_customers_page,
+            limit=self.block_size,
+            search_term=self.search_term,
+            cursor_idx=cursor_idx,
+            direction=PAGE_FIRST if cursor_idx is None else PAGE_NEXT,
+            on_result=lambda result: self._on_block_loaded(generation, block_number, result),
+            on_error=lambda message: self._on_block_failed(generation, block_number, message)
+        )
+
+    def _on_block_failed(self, generation, block_number, message):
+        # Not exhausted: the block is asked for again on the next scroll or repaint
+        if generation == self._generation:
+            self._loading.discard(block_number)
+        print(f"Error loading customers: {message}")
+
+    def _on_block_loaded(self, generation, block_number, result):
+        if generation != self._generation:
+            return
+        self._loading.discard(block_number)
+        customers, total = result
+        self.total = total
+        self._blocks.put(block_number, customers)
+
+        first_row = block_number * self.block_size
+        is_new_block = block_number == len(self._block_cursors) - 1
+        if is_new_block:
+            if len(customers) < self.block_size:
+                self._exhausted = True
+            if customers:
+                self._block_cursors.append(customers[-1]['idx'])
+                self.beginInsertRows(QModelIndex(), first_row, first_row + len(customers) - 1)
+                self._row_count += len(customers)
+                self.endInsertRows()
+        elif customers:
+            # A re-read of an evicted block: repaint its rows
+            last_row = min(first_row + len(customers), self._row_count) - 1
+            self.dataChanged.emit(self.index(first_row, 0), self.index(last_row, len(COLUMNS) - 1))
@@ -0,0 +1,93 @@
+from PySide6.QtWidgets import (QDockWidget, QWidget, QVBoxLayout, QHBoxLayout, QTableWidget,
+                               QTableWidgetItem, QHeaderView, QLabel, QPushButton, QFileDialog,
+                               QMessageBox)
+from PySide6.QtCore import Qt, QTimer
+
+COLUMNS = ["Span", "Jumlah", "Terakhir (ms)", "p50 (ms)", "p95 (ms)", "Maks (ms)"]
+
+
+class DiagnosticsPanel(QDockWidget):
+    # Recent latencies per timing span plus pool and cache counters. Hidden
+    # until toggled (Ctrl+Shift+D in MainWindow); refreshes only while shown.
+    def __init__(self, controller, parent=None):
+        super().__init__("Diagnostik", parent)
+        self.controller = controller
+        self.setObjectName("diagnosticsPanel")
+
+        content = QWidget()
+        layout = QVBoxLayout()
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        layout.addWidget(self.table)
+
+        self.stats_label = QLabel()
+        self.stats_label.setWordWrap(True)
+        layout.addWidget(self.stats_label)
+
+        buttons = QHBoxLayout()
+        save_btn = QPushButton("Simpan Metrik")
+        save_btn.clicked.connect(self.save_metrics)
+        reset_btn = QPushButton("Reset")
+        reset_btn.clicked.connect(self.reset_metrics)
+        buttons.addStretch()
+        buttons.addWidget(save_btn)
+        buttons.addWidget(reset_btn)
+        layout.addLayout(buttons)
+
+        content.setLayout(layout)
+        self.setWidget(content)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(1000)
+        self.timer.timeout.connect(self.refresh)
+        self.visibilityChanged.connect(self.on_visibility_changed)
+
+    def on_visibility_changed(self, visible):
+        if visible:
+            self.refresh()
+            self.timer.start()
+        else:
+            self.timer.stop()
+
+    def refresh(self):
+        summaries = self.controller.get_latency_summaries()
+        self.table.setRowCount(len(summaries))
+        for row, (name, summary) in enumerate(summaries.items()):
+            values = [name, f"{summary['count']:,}"] + [
+                f"{summary[key] * 1000:.2f}" for key in ('last', 'p50', 'p95', 'max')
+            ]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.table.setItem(row, column, item)
+
+        pool = self.controller.get_pool_stats()
+        query_cache = self.controller.get_query_cache_stats()
+        page_cache = self.controller.get_page_cache_stats()
+        self.stats_label.setText(
+            f"Pool: {pool['in_use']}/{pool['max_size']} dipakai, {pool['waits']} antre | "
+            f"Cache data: {query_cache['customers']['hit_ratio']:.0%} hit, "
+            f"halaman {query_cache['pages']['hit_ratio']:.0%} hit, "
+            f"{query_cache['pages']['evictions'] + query_cache['customers']['evictions']} evict | "
+            f"Cache tampilan: {page_cache['hit_ratio']:.0%} hit"
+        )
+
+    def save_metrics(self):
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Simpan Metrik", "metrics.prom", "Prometheus (*.prom *.txt);;JSON (*.json)"
+        )
+        if file_path:
+            success, message = self.controller.dump_metrics(file_path)
+            if success:
+                QMessageBox.information(self, "Sukses", message)
+            else:
+                QMessageBox.warning(self, "Error", message)
+
+    def reset_metrics(self):
+        self.controller.reset_metrics()
+        self.refresh()
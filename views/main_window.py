@@ -1,21 +1,52 @@
+import os
+import time
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                               QTableWidget, QTableWidgetItem, QPushButton,
+                               QTableView, QAbstractItemView, QPushButton,
                                QComboBox, QLabel, QLineEdit, QMessageBox,
-                               QFileDialog, QHeaderView, QDialog)
+                               QFileDialog, QHeaderView, QDialog, QSpinBox,
+                               QCheckBox, QMenu, QInputDialog)
 from PySide6.QtCore import Qt, QTimer
-from PySide6.QtGui import QFont
-from controllers.customer_controller import CustomerController
-from views.customer_form import CustomerForm
+from PySide6.QtGui import QFont, QKeySequence, QShortcut
+from models.customer import (PAGE_FIRST, PAGE_NEXT, PAGE_PREV, PAGE_LAST, PAGE_CURRENT, PAGE_OFFSET,
+                             IMPORT_INSERT, IMPORT_MERGE, CHANGE_CREATE, CHANGE_UPDATE, CHANGE_DELETE)
+from utils.metrics import metrics
+from utils.progress import TaskProgress
+from views.customer_table_model import CustomerTableModel, LazyCustomerTableModel
+from views.task_progress_dialog import TaskProgressDialog
+from views.workers import TaskRunner
+
+# Bulk actions that can still be undone
+MAX_UNDO = 10
 
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    # The customer form and the diagnostics panel are imported when first
+    # opened, so start-up only pays for the table view
+    def __init__(self, services=None, startup=None):
         super().__init__()
-        self.controller = CustomerController()
+        if services is None:
+            from controllers.services import get_services
+            services = get_services()
+        # Application-scoped controller/model, shared with every form
+        self.services = services
+        # utils.startup.StartupTimer from main(), for first paint / first data
+        self.startup = startup
+        self.controller = services.controller
+        self.customer_form = None
+        # Database calls run on a thread pool so the event loop never blocks
+        self.tasks = TaskRunner(self)
         self.current_page = 1
         self.rows_per_page = 10
         self.total_records = 0
         self.search_term = ""
+        # Keyset cursors: idx of the first and last row on the current page
+        self.first_idx = None
+        self.last_idx = None
+        self.infinite_scroll = False
+        self.lazy_model = None
+        self.page_requested_at = None
+        # Undo records of the latest bulk actions, newest last
+        self.undo_stack = []
         self.init_ui()
         self.load_data()
 
@@ -28,18 +59,18 @@ class MainWindow(QMainWindow):
             QMainWindow {
                 background-color: #f5f5f5;
             }
-            QTableWidget {
+            QTableView {
                 background-color: white;
                 border: 1px solid #ddd;
                 border-radius: 5px;
                 gridline-color: #e0e0e0;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
                 border-bottom: 1px solid #e0e0e0;
                 color: #000;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #e3f2fd;
             }
             QHeaderView::section {
@@ -77,7 +108,7 @@ class MainWindow(QMainWindow):
             QLineEdit:focus {
                 border-color: #4CAF50;
             }
-            QComboBox {
+            QComboBox, QSpinBox {
                 padding: 8px;
                 border: 2px solid #ddd;
                 border-radius: 5px;
@@ -119,7 +150,9 @@ class MainWindow(QMainWindow):
         # Search
         search_label = QLabel("Pencarian:")
         self.search_edit = QLineEdit()
-        self.search_edit.setPlaceholderText("Cari berdasarkan NIK, Nama, Tanggal Lahir, Status, atau Gaji...")
+        self.search_edit.setPlaceholderText(
+            "Cari NIK, nama, tanggal lahir (1990-05-17), aktif/nonaktif, atau gaji (gaji:>5000000)..."
+        )
         self.search_edit.textChanged.connect(self.on_search_changed)
 
         controls_layout.addWidget(search_label)
@@ -129,19 +162,28 @@ class MainWindow(QMainWindow):
         # Rows per page
         rows_label = QLabel("Baris per halaman:")
         self.rows_combo = QComboBox()
-        self.rows_combo.addItems(["1", "5", "10", "25", "50", "100"])
+        self.rows_combo.addItems(["1", "5", "10", "25", "50", "100", "250", "500", "1000"])
         self.rows_combo.setCurrentText("10")
         self.rows_combo.currentTextChanged.connect(self.on_rows_per_page_changed)
 
         controls_layout.addWidget(rows_label)
         controls_layout.addWidget(self.rows_combo)
 
+        # Infinite scroll over the whole table instead of pages
+        self.infinite_check = QCheckBox("Gulir tanpa batas")
+        self.infinite_check.toggled.connect(self.on_infinite_scroll_toggled)
+        controls_layout.addWidget(self.infinite_check)
+
         layout.addLayout(controls_layout)
 
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(6)
-        self.table.setHorizontalHeaderLabels(["ID", "NIK", "Nama", "Tanggal Lahir", "Status", "Gaji"])
+        self.page_model = CustomerTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.page_model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        # Shift/Ctrl-click picks several rows for the bulk actions
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
 
         # Set column widths
         header = self.table.horizontalHeader()
@@ -151,29 +193,45 @@ class MainWindow(QMainWindow):
         header.setSectionResizeMode(3, QHeaderView.ResizeMode.ResizeToContents)
         header.setSectionResizeMode(4, QHeaderView.ResizeMode.ResizeToContents)
         header.setSectionResizeMode(5, QHeaderView.ResizeMode.ResizeToContents)
+        # Size columns from the rows on screen only, never the whole model
+        header.setResizeContentsPrecision(0)
 
-        self.table.cellDoubleClicked.connect(self.on_row_double_clicked)
+        self.table.doubleClicked.connect(self.on_row_double_clicked)
 
         layout.addWidget(self.table)
 
         # Pagination and action buttons
         bottom_layout = QHBoxLayout()
 
-        # Pagination info
-        self.info_label = QLabel()
+        # Pagination info; a placeholder until the first page arrives
+        self.info_label = QLabel("Memuat data...")
         bottom_layout.addWidget(self.info_label)
 
         bottom_layout.addStretch()
 
         # Pagination buttons
+        self.first_btn = QPushButton("« Awal")
+        self.first_btn.clicked.connect(self.first_page)
+
         self.prev_btn = QPushButton("← Sebelumnya")
         self.prev_btn.clicked.connect(self.prev_page)
 
         self.next_btn = QPushButton("Selanjutnya →")
         self.next_btn.clicked.connect(self.next_page)
 
-        bottom_layout.addWidget(self.prev_btn)
-        bottom_layout.addWidget(self.next_btn)
+        self.last_btn = QPushButton("Akhir »")
+        self.last_btn.clicked.connect(self.last_page)
+
+        self.page_spin = QSpinBox()
+        self.page_spin.setMinimum(1)
+
+        self.goto_btn = QPushButton("Ke Halaman")
+        self.goto_btn.clicked.connect(self.goto_page)
+
+        self.pagination_widgets = [self.first_btn, self.prev_btn, self.next_btn,
+                                   self.last_btn, self.page_spin, self.goto_btn]
+        for widget in self.pagination_widgets:
+            bottom_layout.addWidget(widget)
 
         # Action buttons
         self.add_btn = QPushButton("Tambah Data")
@@ -185,70 +243,215 @@ class MainWindow(QMainWindow):
         self.download_btn = QPushButton("Download CSV")
         self.download_btn.clicked.connect(self.download_csv)
 
+        # Bulk actions on the selected rows
+        self.bulk_btn = QPushButton("Aksi Massal")
+        bulk_menu = QMenu(self.bulk_btn)
+        bulk_menu.addAction("Set Aktif", lambda: self.bulk_set_active(True))
+        bulk_menu.addAction("Set Tidak Aktif", lambda: self.bulk_set_active(False))
+        bulk_menu.addAction("Ubah Gaji (%)...", self.bulk_adjust_salary)
+        bulk_menu.addAction("Hapus", self.bulk_delete)
+        bulk_menu.addSeparator()
+        self.undo_action = bulk_menu.addAction("Urungkan", self.undo_last_bulk)
+        self.undo_action.setEnabled(False)
+        self.bulk_btn.setMenu(bulk_menu)
+
         bottom_layout.addWidget(self.add_btn)
+        bottom_layout.addWidget(self.bulk_btn)
         bottom_layout.addWidget(self.upload_btn)
         bottom_layout.addWidget(self.download_btn)
 
         layout.addLayout(bottom_layout)
+
+        # Local replica: reads never wait on the server, changes sync in the background
+        self.sync_timer = None
+        if self.controller.is_replica():
+            sync_layout = QHBoxLayout()
+            self.sync_label = QLabel("Belum tersinkron")
+            self.sync_btn = QPushButton("Sinkronkan")
+            self.sync_btn.clicked.connect(self.sync_replica)
+            sync_layout.addWidget(self.sync_label)
+            sync_layout.addStretch()
+            sync_layout.addWidget(self.sync_btn)
+            layout.addLayout(sync_layout)
+
+            self.sync_timer = QTimer(self)
+            self.sync_timer.setInterval(int(self.controller.get_sync_interval() * 1000))
+            self.sync_timer.timeout.connect(self.sync_replica)
+            self.sync_timer.start()
+            QTimer.singleShot(0, self.sync_replica)
+
         central_widget.setLayout(layout)
 
+        # Latency panel for support and tuning, kept out of the way
+        self.diagnostics_panel = None
+        QShortcut(QKeySequence("Ctrl+Shift+D"), self, self.toggle_diagnostics)
+        QShortcut(QKeySequence.StandardKey.Undo, self, self.undo_last_bulk)
+
         # Search timer
         self.search_timer = QTimer()
         self.search_timer.setSingleShot(True)
         self.search_timer.timeout.connect(self.perform_search)
 
-    def load_data(self):
-        offset = (self.current_page - 1) * self.rows_per_page
-        customers, total = self.controller.get_customers(
-            limit=self.rows_per_page,
-            offset=offset,
-            search_term=self.search_term
+    def load_data(self, direction=None):
+        if self.infinite_scroll:
+            self.lazy_model.reset(self.search_term)
+            return
+
+        if direction is None:
+            # Reload the page on screen, anchored at its first row
+            direction = PAGE_FIRST if self.current_page == 1 or self.first_idx is None else PAGE_CURRENT
+
+        request = {
+            'limit': self.rows_per_page,
+            'search_term': self.search_term,
+            'direction': direction,
+        }
+        if direction == PAGE_OFFSET:
+            # Explicit "go to page N" is the only offset-based read
+            request['offset'] = (self.current_page - 1) * self.rows_per_page
+        elif direction == PAGE_LAST:
+            # Only the remainder lands on the last page
+            last_page_rows = self.total_records - (self.current_page - 1) * self.rows_per_page
+            request['limit'] = max(last_page_rows, 1)
+        elif direction != PAGE_FIRST:
+            request['cursor_idx'] = self.first_idx if direction in (PAGE_PREV, PAGE_CURRENT) else self.last_idx
+
+        # A newer request on the "page" channel supersedes this one, so
+        # results for an outdated search term or page are never shown
+        self.page_requested_at = time.perf_counter()
+        self.tasks.submit(
+            self.controller.get_customers_page,
+            on_result=self.on_page_loaded,
+            on_error=self.on_task_error,
+            channel='page',
+            **request
         )
 
+    def on_page_loaded(self, result):
+        customers, total = result
+        if self.page_requested_at is not None:
+            metrics.observe('ui.page_load', time.perf_counter() - self.page_requested_at)
+            self.page_requested_at = None
+
+        if not customers and self.current_page > 1 and total:
+            # The page emptied under us (e.g. its last rows were deleted)
+            self.current_page = 1
+            self.first_idx = None
+            self.total_records = total
+            self.last_page()
+            return
+
         self.total_records = total
-        self.table.setRowCount(len(customers))
+        self.first_idx = customers[0]['idx'] if customers else None
+        self.last_idx = customers[-1]['idx'] if customers else None
+        with metrics.span('ui.render'):
+            # A reconcile after an in-place patch usually finds the same rows
+            if customers != self.page_model.customers():
+                self.page_model.set_customers(customers)
+            self.update_pagination_info()
+        if self.startup is not None:
+            self.startup.mark('first_data')
+        self.prefetch_neighbors()
+
+    def prefetch_neighbors(self):
+        # Speculatively read the next and previous pages in the background
+        if self.first_idx is None:
+            return
+        self.tasks.submit(
+            self.controller.prefetch_pages,
+            self.rows_per_page, self.search_term, self.first_idx, self.last_idx,
+            # Page 1 is always re-read from the top, never through PAGE_PREV
+            self.current_page > 2, self.current_page < self.total_pages()
+        )
+
+    def on_task_error(self, message):
+        QMessageBox.warning(self, "Error", message)
 
-        for row, customer in enumerate(customers):
-            self.table.setItem(row, 0, QTableWidgetItem(str(customer['idx'])))
-            self.table.setItem(row, 1, QTableWidgetItem(customer['nik']))
-            self.table.setItem(row, 2, QTableWidgetItem(customer['name']))
-            self.table.setItem(row, 3, QTableWidgetItem(str(customer['born']) if customer['born'] else ""))
-            self.table.setItem(row, 4, QTableWidgetItem("Aktif" if customer['active'] else "Tidak Aktif"))
-            self.table.setItem(row, 5, QTableWidgetItem(f"Rp {customer['salary']:,}" if customer['salary'] else "Rp 0"))
+    def toggle_diagnostics(self):
+        if self.diagnostics_panel is None:
+            from views.diagnostics_panel import DiagnosticsPanel
 
-        self.update_pagination_info()
+            self.diagnostics_panel = DiagnosticsPanel(self.controller, self)
+            self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.diagnostics_panel)
+            return
+        self.diagnostics_panel.setVisible(not self.diagnostics_panel.isVisible())
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.startup is not None:
+            self.startup.mark('first_paint')
+
+    def total_pages(self):
+        return max((self.total_records + self.rows_per_page - 1) // self.rows_per_page, 1)
 
     def update_pagination_info(self):
-        total_pages = (self.total_records + self.rows_per_page - 1) // self.rows_per_page
-        if total_pages == 0:
-            total_pages = 1
+        total_pages = self.total_pages()
 
         start_record = (self.current_page - 1) * self.rows_per_page + 1
         end_record = min(self.current_page * self.rows_per_page, self.total_records)
 
+        # Estimated totals (approximate count mode) are marked with "~"
+        approx = "" if self.controller.is_count_exact(self.search_term) else "~"
         self.info_label.setText(
-            f"Halaman {self.current_page} dari {total_pages} | "
-            f"Menampilkan {start_record}-{end_record} dari {self.total_records} record"
+            f"Halaman {self.current_page} dari {approx}{total_pages} | "
+            f"Menampilkan {start_record}-{end_record} dari {approx}{self.total_records} record"
         )
 
+        self.first_btn.setEnabled(self.current_page > 1)
         self.prev_btn.setEnabled(self.current_page > 1)
         self.next_btn.setEnabled(self.current_page < total_pages)
+        self.last_btn.setEnabled(self.current_page < total_pages)
+        self.page_spin.setMaximum(total_pages)
+
+    def first_page(self):
+        self.current_page = 1
+        self.load_data(PAGE_FIRST)
 
     def prev_page(self):
         if self.current_page > 1:
             self.current_page -= 1
-            self.load_data()
+            # Page 1 is re-read from the top so rows added meanwhile show up
+            self.load_data(PAGE_PREV if self.current_page > 1 else PAGE_FIRST)
 
     def next_page(self):
-        total_pages = (self.total_records + self.rows_per_page - 1) // self.rows_per_page
-        if self.current_page < total_pages:
+        if self.current_page < self.total_pages():
             self.current_page += 1
-            self.load_data()
+            self.load_data(PAGE_NEXT)
+
+    def last_page(self):
+        self.current_page = self.total_pages()
+        self.load_data(PAGE_LAST if self.current_page > 1 else PAGE_FIRST)
+
+    def goto_page(self):
+        self.current_page = min(self.page_spin.value(), self.total_pages())
+        self.load_data(PAGE_OFFSET)
 
     def on_rows_per_page_changed(self, value):
         self.rows_per_page = int(value)
         self.current_page = 1
-        self.load_data()
+        self.load_data(PAGE_FIRST)
+
+    def on_infinite_scroll_toggled(self, checked):
+        self.infinite_scroll = checked
+        for widget in self.pagination_widgets + [self.rows_combo]:
+            widget.setVisible(not checked)
+
+        if checked:
+            if self.lazy_model is None:
+                self.lazy_model = LazyCustomerTableModel(self.controller, self.tasks, parent=self)
+                self.lazy_model.rowsInserted.connect(self.update_scroll_info)
+                self.lazy_model.modelReset.connect(self.update_scroll_info)
+            self.table.setModel(self.lazy_model)
+        else:
+            self.table.setModel(self.page_model)
+            self.current_page = 1
+        self.load_data(PAGE_FIRST)
+
+    def update_scroll_info(self):
+        approx = "" if self.controller.is_count_exact(self.search_term) else "~"
+        self.info_label.setText(
+            f"Dimuat {self.lazy_model.rowCount()} dari {approx}{self.lazy_model.total} record"
+        )
 
     def on_search_changed(self):
         self.search_timer.stop()
@@ -257,57 +460,290 @@ class MainWindow(QMainWindow):
     def perform_search(self):
         self.search_term = self.search_edit.text().strip()
         self.current_page = 1
-        self.load_data()
+        self.load_data(PAGE_FIRST)
+
+    def on_row_double_clicked(self, index):
+        customer = self.table.model().customer_at(index.row())
+        if customer:
+            self.edit_customer(customer['idx'], customer)
+
+    def open_customer_form(self, customer_id=None, customer=None):
+        # One dialog for the whole session, re-populated on every open
+        if self.customer_form is None:
+            from views.customer_form import CustomerForm
 
-    def on_row_double_clicked(self, row, column):
-        customer_id = int(self.table.item(row, 0).text())
-        self.edit_customer(customer_id)
+            self.customer_form = CustomerForm(self, controller=self.controller)
+        self.customer_form.open_for(customer_id, customer)
+        return self.customer_form
 
     def add_customer(self):
-        dialog = CustomerForm(self)
+        dialog = self.open_customer_form()
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.load_data()
+            self.apply_customer_change(dialog.change)
+            self.sync_replica()
 
-    def edit_customer(self, customer_id):
-        dialog = CustomerForm(self, customer_id)
+    def edit_customer(self, customer_id, customer=None):
+        dialog = self.open_customer_form(customer_id, customer)
         if dialog.exec() == QDialog.DialogCode.Accepted:
+            self.apply_customer_change(dialog.change)
+            self.sync_replica()
+
+    def apply_customer_change(self, change):
+        # Show a single-row write at once by patching the row on screen and
+        # the total, then reconcile with the database in the background
+        if change is None:
+            self.load_data()
+            return
+        kind, customer = change
+
+        if self.infinite_scroll:
+            # Inserts and deletes shift every block after them: reload those
+            if kind != CHANGE_UPDATE or not self.lazy_model.replace_customer(customer):
+                self.load_data()
+            return
+
+        with metrics.span('ui.render'):
+            if kind == CHANGE_UPDATE:
+                self.page_model.replace_customer(customer)
+            elif kind == CHANGE_CREATE and not self.search_term:
+                # Newest idx: top of the first page, whether it matches is
+                # only known for the unfiltered list
+                self.total_records += 1
+                if self.current_page == 1:
+                    self.page_model.insert_customer(0, customer, self.rows_per_page)
+            elif kind == CHANGE_DELETE:
+                if self.page_model.remove_customer(customer['idx']) or not self.search_term:
+                    self.total_records = max(self.total_records - 1, 0)
+
+            first = self.page_model.customer_at(0)
+            last = self.page_model.customer_at(self.page_model.rowCount() - 1)
+            self.first_idx = first['idx'] if first else None
+            self.last_idx = last['idx'] if last else None
+            self.update_pagination_info()
+        self.load_data()
+
+    def selected_customer_ids(self):
+        model = self.table.model()
+        ids = []
+        for index in self.table.selectionModel().selectedRows():
+            customer = model.customer_at(index.row())
+            # Rows of a block still loading have nothing to act on yet
+            if customer:
+                ids.append(customer['idx'])
+        return ids
+
+    def bulk_set_active(self, active):
+        ids = self.selected_customer_ids()
+        if ids:
+            status = "Aktif" if active else "Tidak Aktif"
+            self.run_bulk_action(f"Set {status}", self.controller.bulk_set_active, ids, active)
+
+    def bulk_adjust_salary(self):
+        ids = self.selected_customer_ids()
+        if not ids:
+            return
+        percent, ok = QInputDialog.getDouble(
+            self, "Ubah Gaji",
+            f"Persentase perubahan gaji untuk {len(ids)} data (mis. 10 atau -5):",
+            0.0, -99.99, 1000.0, 2
+        )
+        if ok and percent:
+            self.run_bulk_action("Ubah Gaji", self.controller.bulk_adjust_salary, ids, percent)
+
+    def bulk_delete(self):
+        ids = self.selected_customer_ids()
+        if not ids:
+            return
+        reply = QMessageBox.question(
+            self, "Konfirmasi Hapus",
+            f"Apakah Anda yakin ingin menghapus {len(ids)} data terpilih?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if reply == QMessageBox.StandardButton.Yes:
+            self.run_bulk_action("Hapus", self.controller.bulk_delete, ids)
+
+    def run_bulk_action(self, title, action, ids, *args):
+        # All selected rows change in one transaction, or none of them
+        progress = TaskProgress(total_rows=len(ids))
+        dialog = TaskProgressDialog(self, title, f"Memproses {len(ids)} data...", progress)
+        self.bulk_btn.setEnabled(False)
+
+        def on_done(result):
+            dialog.finish()
+            self.bulk_btn.setEnabled(True)
+            success, message, record = result
+            if success:
+                if record['affected']:
+                    self.undo_stack = self.undo_stack[-(MAX_UNDO - 1):] + [record]
+                    self.undo_action.setEnabled(True)
+                self.table.clearSelection()
+                self.load_data()
+                self.sync_replica()
+                QMessageBox.information(self, "Sukses", message)
+            else:
+                QMessageBox.warning(self, "Error", message)
+
+        def on_error(message):
+            dialog.finish()
+            self.bulk_btn.setEnabled(True)
+            self.on_task_error(message)
+
+        self.tasks.submit(action, ids, *args, progress=progress, on_result=on_done, on_error=on_error)
+
+    def undo_last_bulk(self):
+        if not self.undo_stack or not self.bulk_btn.isEnabled():
+            return
+        record = self.undo_stack[-1]
+        progress = TaskProgress(total_rows=len(record['before']))
+        dialog = TaskProgressDialog(self, "Urungkan", "Mengembalikan data...", progress)
+        self.bulk_btn.setEnabled(False)
+
+        def on_done(result):
+            dialog.finish()
+            self.bulk_btn.setEnabled(True)
+            success, message = result
+            if success:
+                # Only popped once it went through, so a failed undo can be retried
+                self.undo_stack.remove(record)
+                self.undo_action.setEnabled(bool(self.undo_stack))
+                self.load_data()
+                self.sync_replica()
+                QMessageBox.information(self, "Sukses", message)
+            else:
+                QMessageBox.warning(self, "Error", message)
+
+        def on_error(message):
+            dialog.finish()
+            self.bulk_btn.setEnabled(True)
+            self.on_task_error(message)
+
+        self.tasks.submit(
+            self.controller.undo_bulk, record,
+            progress=progress, on_result=on_done, on_error=on_error
+        )
+
+    def sync_replica(self):
+        if self.sync_timer is None or self.tasks.is_busy('sync'):
+            return
+        self.sync_btn.setEnabled(False)
+        self.tasks.submit(
+            self.controller.sync_replica,
+            on_result=self.on_replica_synced,
+            on_error=self.on_replica_sync_error,
+            channel='sync'
+        )
+
+    def on_replica_synced(self, result):
+        success, message = result
+        self.sync_btn.setEnabled(True)
+        self.sync_label.setText(message)
+        if success:
+            # Served from the page cache unless the sync changed something
             self.load_data()
 
+    def on_replica_sync_error(self, message):
+        self.sync_btn.setEnabled(True)
+        self.sync_label.setText(message)
+
     def upload_csv(self):
         file_path, _ = QFileDialog.getOpenFileName(
             self, "Pilih File CSV", "", "CSV Files (*.csv)"
         )
 
         if file_path:
-            reply = QMessageBox.question(
-                self, "Konfirmasi Upload",
-                "Apakah Anda yakin ingin mengupload file CSV ini?",
-                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            confirm = QMessageBox(self)
+            confirm.setWindowTitle("Konfirmasi Upload")
+            confirm.setIcon(QMessageBox.Icon.Question)
+            confirm.setText("Apakah Anda yakin ingin mengupload file CSV ini?")
+            confirm.setInformativeText(
+                "Gabungkan: NIK yang sudah ada diperbarui, bukan ditambahkan lagi.\n"
+                "Tambah Semua: setiap baris disimpan sebagai data baru."
             )
-
-            if reply == QMessageBox.StandardButton.Yes:
-                success, message = self.controller.import_from_csv(file_path)
-                if success:
-                    QMessageBox.information(self, "Sukses", message)
+            merge_btn = confirm.addButton("Gabungkan (NIK)", QMessageBox.ButtonRole.AcceptRole)
+            insert_btn = confirm.addButton("Tambah Semua", QMessageBox.ButtonRole.AcceptRole)
+            confirm.addButton("Batal", QMessageBox.ButtonRole.RejectRole)
+            confirm.setDefaultButton(merge_btn)
+            fast_load = QCheckBox("Mode cepat (satu transaksi, baris ditolak disimpan ke file .errors.csv)")
+            confirm.setCheckBox(fast_load)
+            confirm.exec()
+
+            if confirm.clickedButton() in (merge_btn, insert_btn):
+                mode = IMPORT_MERGE if confirm.clickedButton() is merge_btn else IMPORT_INSERT
+                progress = TaskProgress()
+                dialog = TaskProgressDialog(self, "Upload CSV", "Mengimpor data...", progress)
+                self.upload_btn.setEnabled(False)
+
+                def on_done(result):
+                    dialog.finish()
+                    self.upload_btn.setEnabled(True)
+                    success, message = result
+                    if success:
+                        QMessageBox.information(self, "Sukses", message)
+                    else:
+                        QMessageBox.warning(self, "Error", message)
+                    # Committed chunks stay even when the import was cancelled
                     self.load_data()
-                else:
-                    QMessageBox.warning(self, "Error", message)
+
+                def on_error(message):
+                    dialog.finish()
+                    self.upload_btn.setEnabled(True)
+                    self.on_task_error(message)
+
+                self.tasks.submit(
+                    self.controller.import_from_csv, file_path,
+                    progress=progress, mode=mode, fast_load=fast_load.isChecked(),
+                    on_result=on_done, on_error=on_error
+                )
 
     def download_csv(self):
-        file_path, _ = QFileDialog.getSaveFileName(
-            self, "Simpan File CSV", "customers.csv", "CSV Files (*.csv)"
+        filters = {
+            'csv': "CSV Files (*.csv)",
+            'csv.gz': "CSV gzip (*.csv.gz)",
+            'csv.zst': "CSV zstd (*.csv.zst)",
+            'arrow': "Arrow IPC (*.arrow)",
+            'parquet': "Parquet (*.parquet)",
+        }
+        formats = self.controller.get_export_formats()
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Simpan File CSV", "customers.csv", ";;".join(filters[fmt] for fmt in formats)
         )
 
         if file_path:
-            reply = QMessageBox.question(
-                self, "Konfirmasi Download",
+            export_format = next((fmt for fmt in formats if filters[fmt] == selected_filter), 'csv')
+            extension = filters[export_format].split('*')[1].rstrip(')')
+            if not file_path.lower().endswith(extension):
+                file_path = os.path.splitext(file_path)[0] + extension
+            confirm = QMessageBox(
+                QMessageBox.Icon.Question, "Konfirmasi Download",
                 "Apakah Anda yakin ingin mendownload data ke file CSV?",
-                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, self
             )
-
-            if reply == QMessageBox.StandardButton.Yes:
-                success, message = self.controller.export_to_csv(file_path)
-                if success:
-                    QMessageBox.information(self, "Sukses", message)
-                else:
-                    QMessageBox.warning(self, "Error", message)
+            parallel = QCheckBox("Ekspor paralel (beberapa koneksi, satu snapshot)")
+            confirm.setCheckBox(parallel)
+
+            if confirm.exec() == QMessageBox.StandardButton.Yes:
+                export = self.controller.export_parallel if parallel.isChecked() else self.controller.export_to_csv
+                # The unfiltered total is the export size
+                progress = TaskProgress(total_rows=None if self.search_term else self.total_records)
+                dialog = TaskProgressDialog(self, "Download CSV", "Mengekspor data...", progress)
+                self.download_btn.setEnabled(False)
+
+                def on_done(result):
+                    dialog.finish()
+                    self.download_btn.setEnabled(True)
+                    success, message = result
+                    if success:
+                        QMessageBox.information(self, "Sukses", message)
+                    else:
+                        QMessageBox.warning(self, "Error", message)
+
+                def on_error(message):
+                    dialog.finish()
+                    self.download_btn.setEnabled(True)
+                    self.on_task_error(message)
+
+                self.tasks.submit(
+                    export, file_path,
+                    progress=progress, export_format=export_format,
+                    on_result=on_done, on_error=on_error
+                )
@@ -0,0 +1,46 @@
+from PySide6.QtWidgets import QProgressDialog
+from PySide6.QtCore import Qt, QTimer
+
+
+class TaskProgressDialog(QProgressDialog):
+    # Polls a TaskProgress shared with a background worker
+    def __init__(self, parent, title, label, progress):
+        super().__init__(label, "Batal", 0, 100, parent)
+        self.label = label
+        self.progress = progress
+
+        self.setWindowTitle(title)
+        self.setWindowModality(Qt.WindowModality.WindowModal)
+        self.setMinimumDuration(0)
+        self.setAutoClose(False)
+        self.setAutoReset(False)
+        self.canceled.connect(self.on_cancel)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(200)
+        self.refresh()
+
+    def refresh(self):
+        snapshot = self.progress.snapshot()
+
+        if snapshot['total_bytes']:
+            self.setValue(min(int(snapshot['bytes'] * 100 / snapshot['total_bytes']), 100))
+        elif snapshot['total_rows']:
+            self.setValue(min(int(snapshot['rows'] * 100 / snapshot['total_rows']), 100))
+        else:
+            # Unknown size: busy indicator
+            self.setRange(0, 0)
+
+        self.setLabelText(
+            f"{self.label}\n"
+            f"{snapshot['rows']:,} baris | {snapshot['bytes'] / (1024 * 1024):.1f} MB | "
+            f"{snapshot['rows_per_second']:,.0f} baris/detik"
+        )
+
+    def on_cancel(self):
+        self.progress.cancel()
+
+    def finish(self):
+        self.timer.stop()
+        self.close()
@@ -0,0 +1,76 @@
+import itertools
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+
+
+class WorkerSignals(QObject):
+    # Created on the GUI thread, so emits from the pool thread are queued back to it
+    finished = Signal(int, object)
+    error = Signal(int, str)
+
+
+class Worker(QRunnable):
+    def __init__(self, task_id, fn, args, kwargs):
+        super().__init__()
+        self.task_id = task_id
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.signals.error.emit(self.task_id, str(e))
+        else:
+            self.signals.finished.emit(self.task_id, result)
+
+
+class TaskRunner(QObject):
+    # Runs controller calls off the GUI thread and delivers results on it.
+    # Tasks submitted on the same channel supersede each other: only the
+    # newest one's result is delivered, stale ones are dropped.
+    def __init__(self, parent=None, max_threads=4):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self._ids = itertools.count(1)
+        self._tasks = {}  # task_id -> (on_result, on_error, channel)
+        self._latest = {}  # channel -> newest task_id
+
+    def submit(self, fn, *args, on_result=None, on_error=None, channel=None, **kwargs):
+        task_id = next(self._ids)
+        self._tasks[task_id] = (on_result, on_error, channel)
+        if channel is not None:
+            self._latest[channel] = task_id
+
+        worker = Worker(task_id, fn, args, kwargs)
+        worker.signals.finished.connect(self._on_finished)
+        worker.signals.error.connect(self._on_error)
+        self.pool.start(worker)
+        return task_id
+
+    def cancel_channel(self, channel):
+        # Running work cannot be interrupted, but its result will be ignored
+        self._latest[channel] = None
+
+    def is_busy(self, channel):
+        return any(task[2] == channel for task in self._tasks.values())
+
+    def _take(self, task_id):
+        on_result, on_error, channel = self._tasks.pop(task_id, (None, None, None))
+        if channel is not None and self._latest.get(channel) != task_id:
+            return None, None
+        return on_result, on_error
+
+    @Slot(int, object)
+    def _on_finished(self, task_id, result):
+        on_result, _ = self._take(task_id)
+        if on_result is not None:
+            on_result(result)
+
+    @Slot(int, str)
+    def _on_error(self, task_id, message):
+        _, on_error = self._take(task_id)
+        if on_error is not None:
+            on_error(message)